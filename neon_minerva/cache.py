@@ -0,0 +1,259 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import shutil
+
+from dataclasses import dataclass
+from hashlib import sha256
+from os.path import expanduser, getsize, isdir, join
+from tempfile import mkdtemp
+from typing import List, Optional
+
+from ovos_utils.log import LOG
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024  # 1 GiB per cache
+
+
+def get_cache_root() -> str:
+    """
+    Get the root directory for persistent Minerva caches. This is resolved from
+    `MINERVA_CACHE_DIR` if set, else the user's XDG cache directory.
+    @returns: path to the persistent cache root
+    """
+    if os.environ.get("MINERVA_CACHE_DIR"):
+        return expanduser(os.environ["MINERVA_CACHE_DIR"])
+    xdg_cache = os.environ.get("XDG_CACHE_HOME") or expanduser("~/.cache")
+    return join(xdg_cache, "neon_minerva")
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    path: str
+    size: int
+    last_used: float
+
+
+class DiskCache:
+    def __init__(self, name: str, root: Optional[str] = None,
+                 max_size: int = DEFAULT_MAX_SIZE):
+        """
+        A persistent, content-addressed cache where each entry is a directory
+        named by its key. Entry modification time tracks last use so the cache
+        can be pruned in least-recently-used order.
+        @param name: name of this cache (subdirectory of the cache root)
+        @param root: cache root directory (default `get_cache_root()`)
+        @param max_size: maximum size in bytes to keep when pruning
+        """
+        self.name = name
+        self.path = join(root or get_cache_root(), name)
+        self.max_size = max_size
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get the directory for a cached entry and mark it as recently used.
+        @param key: cache key to look up
+        @returns: path to the entry directory if cached, else None
+        """
+        entry = join(self.path, key)
+        if not isdir(entry):
+            return None
+        try:
+            os.utime(entry)
+        except OSError as e:
+            LOG.warning(f"Failed to update {entry}: {e}")
+        return entry
+
+    def put(self, key: str, src_dir: str) -> str:
+        """
+        Move a populated directory into the cache as the entry for `key`. If
+        an entry already exists, `src_dir` is discarded.
+        @param key: cache key to store
+        @param src_dir: directory containing entry files; must be on the same
+            filesystem as the cache (see `make_staging_dir`)
+        @returns: path to the cached entry directory
+        """
+        entry = join(self.path, key)
+        try:
+            os.rename(src_dir, entry)
+        except OSError:
+            # Another process stored this entry first
+            shutil.rmtree(src_dir, ignore_errors=True)
+        return entry
+
+    def make_staging_dir(self) -> str:
+        """
+        Create a temporary directory to populate before calling `put`.
+        @returns: path to a new, empty directory in this cache
+        """
+        staging = join(self.path, ".staging")
+        os.makedirs(staging, exist_ok=True)
+        return mkdtemp(dir=staging)
+
+    def entries(self) -> List[CacheEntry]:
+        """
+        Get all entries in this cache, least-recently used first.
+        """
+        if not isdir(self.path):
+            return []
+        entries = list()
+        for key in os.listdir(self.path):
+            path = join(self.path, key)
+            if key.startswith('.') or not isdir(path):
+                continue
+            size = 0
+            for dir_path, _, files in os.walk(path):
+                size += sum(getsize(join(dir_path, f)) for f in files)
+            entries.append(CacheEntry(key, path, size,
+                                      os.stat(path).st_mtime))
+        entries.sort(key=lambda e: e.last_used)
+        return entries
+
+    @property
+    def size(self) -> int:
+        """
+        Total size in bytes of all cached entries.
+        """
+        return sum(e.size for e in self.entries())
+
+    def prune(self, max_size: Optional[int] = None) -> List[CacheEntry]:
+        """
+        Remove least-recently used entries until the cache fits in `max_size`.
+        @param max_size: maximum total bytes to keep (default `self.max_size`)
+        @returns: list of removed entries
+        """
+        max_size = self.max_size if max_size is None else max_size
+        entries = self.entries()
+        total = sum(e.size for e in entries)
+        removed = list()
+        for entry in entries:
+            if total <= max_size:
+                break
+            shutil.rmtree(entry.path, ignore_errors=True)
+            total -= entry.size
+            removed.append(entry)
+        if removed:
+            LOG.info(f"Pruned {len(removed)} entries from {self.path}")
+        return removed
+
+    def clear(self):
+        """
+        Remove every entry from this cache.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Get a hash of a file's contents.
+    @param file_path: path to file to hash
+    @returns: hex digest of the file contents
+    """
+    digest = sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_directory(directory: str) -> str:
+    """
+    Get a hash of every file path and file contents in a directory, ignoring
+    version control and Python bytecode.
+    @param directory: path to directory to hash
+    @returns: hex digest of the directory contents
+    """
+    digest = sha256()
+    for dir_path, dir_names, files in os.walk(directory):
+        dir_names[:] = sorted(d for d in dir_names
+                              if d not in (".git", "__pycache__"))
+        for file in sorted(files):
+            if file.endswith(".pyc"):
+                continue
+            path = join(dir_path, file)
+            digest.update(os.path.relpath(path, directory).encode())
+            digest.update(hash_file(path).encode())
+    return digest.hexdigest()
+
+
+class ResultCache(DiskCache):
+    def __init__(self, *args, **kwargs):
+        """
+        Persistent cache of test reports, keyed by everything that can change
+        a test result.
+        """
+        DiskCache.__init__(self, "results", *args, **kwargs)
+
+    @staticmethod
+    def get_key(*parts: str) -> str:
+        """
+        Get a cache key for a test run.
+        @param parts: strings that identify the test run
+        @returns: hex digest identifying the test run
+        """
+        return sha256("|".join(parts).encode()).hexdigest()
+
+    def get_result(self, key: str) -> Optional[dict]:
+        """
+        Get a cached test report.
+        @param key: cache key of the test run
+        @returns: cached report if available, else None
+        """
+        entry = self.get(key)
+        if not entry:
+            return None
+        try:
+            with open(join(entry, "result.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            LOG.warning(f"Ignoring invalid cached result {entry}: {e}")
+            return None
+
+    def put_result(self, key: str, result: dict):
+        """
+        Cache a test report.
+        @param key: cache key of the test run
+        @param result: JSON-serializable test report
+        """
+        staging = self.make_staging_dir()
+        with open(join(staging, "result.json"), 'w') as f:
+            json.dump(result, f)
+        self.put(key, staging)
+
+
+def get_caches(root: Optional[str] = None) -> List[DiskCache]:
+    """
+    Get every cache that exists under the cache root.
+    @param root: cache root directory (default `get_cache_root()`)
+    @returns: list of DiskCache objects
+    """
+    root = root or get_cache_root()
+    if not isdir(root):
+        return []
+    return [DiskCache(name, root) for name in sorted(os.listdir(root))
+            if isdir(join(root, name))]
@@ -25,13 +25,15 @@
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import os
+import sys
 import click
 import yaml
 
 from os.path import expanduser, relpath, isfile, isdir
+from typing import Callable, List, Optional
 from click_default_group import DefaultGroup
 from unittest.runner import TextTestRunner
-from unittest import makeSuite
+from unittest import TestSuite, makeSuite
 
 from neon_minerva.version import __version__
 
@@ -40,6 +42,9 @@ def _init_tests(debug: bool = False):
     from os.path import join
     from os import makedirs
     from tempfile import mkdtemp
+    from neon_minerva.cache import get_cache_root
+    # Resolve persistent caches before XDG paths are overridden
+    os.environ["MINERVA_CACHE_DIR"] = get_cache_root()
     base_dir = mkdtemp()
     config = join(base_dir, "config")
     data = join(base_dir, "data")
@@ -83,6 +88,182 @@ def _get_skill_entrypoint(skill_entrypoint: str) -> str:
     return skill_entrypoint
 
 
+def _get_intent_test_langs(test_file: str) -> List[str]:
+    """
+    Get every language with tests defined in an intent test file.
+    @param test_file: path to intent test file
+    @returns: list of languages in the order they are defined
+    """
+    from neon_minerva.skill import get_intent_test_languages, \
+        load_intent_tests
+    return get_intent_test_languages(load_intent_tests(test_file))
+
+
+class _TeeStream:
+    def __init__(self):
+        """
+        Stream that writes to stderr and keeps a copy of everything written.
+        """
+        from io import StringIO
+        self.buffer = StringIO()
+
+    def write(self, data: str):
+        sys.stderr.write(data)
+        self.buffer.write(data)
+
+    def flush(self):
+        sys.stderr.flush()
+
+
+def _run_test_suite(suite: TestSuite) -> dict:
+    """
+    Run a test suite, printing results to stderr.
+    @param suite: unittest.TestSuite to run
+    @returns: dict test report with `success` and `output`
+    """
+    stream = _TeeStream()
+    result = TextTestRunner(stream=stream).run(suite)
+    return {"success": result.wasSuccessful(),
+            "output": stream.buffer.getvalue()}
+
+
+# Environment variables that change which tests run or how intents register
+_RESULT_CACHE_ENV = ("INTENT_TEST_LANGS", "INTENT_REPLAY_FILE",
+                     "INTENT_RECORD_FILE")
+
+
+def _get_result_cache_key(command: str, skill_entrypoint: str,
+                          test_files: List[str],
+                          options: Optional[List[str]] = None) -> \
+        Optional[str]:
+    """
+    Get a result cache key for a test command. Environment variables in
+    `_RESULT_CACHE_ENV` are included, so call this after test configuration
+    is written to the environment.
+    @param command: name of the test command
+    @param skill_entrypoint: resolved skill entrypoint or path
+    @param test_files: paths to test files
+    @param options: strings describing any options that change the result
+    @returns: cache key, or None if the skill version can't be determined
+    """
+    from neon_minerva.cache import ResultCache, hash_file
+    from neon_minerva.skill import get_skill_version
+    skill_version = get_skill_version(skill_entrypoint)
+    if not skill_version:
+        click.echo(f"Not caching results; unable to determine version of "
+                   f"{skill_entrypoint}", err=True)
+        return None
+    return ResultCache.get_key(__version__, command, skill_version,
+                               *[hash_file(f) for f in test_files],
+                               *(options or list()),
+                               *[f"{var}={os.environ.get(var, '')}"
+                                 for var in _RESULT_CACHE_ENV])
+
+
+def _run_cached(cache_key: Optional[str], run_tests: Callable[[], dict]):
+    """
+    Replay a cached test report if available, otherwise run tests and cache
+    the resulting report if all tests passed.
+    @param cache_key: result cache key, or None to run without caching
+    @param run_tests: callable that runs tests and returns a test report
+    """
+    from neon_minerva.cache import ResultCache
+    cache = ResultCache() if cache_key else None
+    result = cache.get_result(cache_key) if cache else None
+    if result:
+        click.echo("Replaying cached test results (use `--no-cache` to "
+                   "re-run)", err=True)
+        click.echo(result["output"], err=True, nl=False)
+        return
+    result = run_tests()
+    if cache and result.get("success"):
+        cache.put_result(cache_key, result)
+        cache.prune()
+
+
+def _run_intent_test_worker(langs: List[str], debug: bool) -> dict:
+    """
+    Run intent tests for a subset of languages. This is called in a worker
+    process that inherits test configuration from the environment.
+    @param langs: languages to test
+    @param debug: enable debug logging
+    @returns: dict summary of the test results
+    """
+    from io import StringIO
+    _init_tests(debug)
+    os.environ["INTENT_TEST_LANGS"] = ",".join(langs)
+    from neon_minerva.tests.test_skill_intents import TestSkillIntentMatching
+    stream = StringIO()
+    result = TextTestRunner(stream=stream).run(
+        makeSuite(TestSkillIntentMatching))
+    return {"langs": langs,
+            "tests_run": result.testsRun,
+            "failures": [(str(test), err) for test, err in result.failures],
+            "errors": [(str(test), err) for test, err in result.errors],
+            "output": stream.getvalue()}
+
+
+def _load_tts(module: Optional[str], lang: str):
+    """
+    Load a TTS plugin to synthesize prompt audio locally.
+    @param module: TTS plugin module name (None to synthesize with core)
+    @param lang: language to synthesize
+    @returns: TTS plugin object, or None if no module is specified
+    """
+    if not module:
+        return None
+    from ovos_plugin_manager.tts import OVOSTTSFactory
+    return OVOSTTSFactory.create({"module": module, "lang": lang})
+
+
+def _run_intent_tests_parallel(test_file: str, jobs: int,
+                               debug: bool) -> dict:
+    """
+    Run intent tests with languages split across worker processes and print
+    one merged report.
+    @param test_file: path to intent test file
+    @param jobs: maximum number of worker processes
+    @param debug: enable debug logging
+    @returns: dict test report with `success` and `output`
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+    from time import time
+
+    langs = _get_intent_test_langs(test_file)
+    jobs = max(1, min(jobs, len(langs)))
+    lang_groups = [langs[i::jobs] for i in range(jobs)]
+    click.echo(f"Testing {len(langs)} languages with {jobs} workers")
+    start = time()
+    # Spawn so each worker imports a fresh, language-specific test case
+    with ProcessPoolExecutor(jobs, mp_context=get_context("spawn")) as ex:
+        results = list(ex.map(_run_intent_test_worker, lang_groups,
+                              [debug] * jobs))
+    elapsed = time() - start
+
+    tests_run = sum(r["tests_run"] for r in results)
+    failures = sum(len(r["failures"]) for r in results)
+    errors = sum(len(r["errors"]) for r in results)
+    output = list()
+    for result in results:
+        for flavor in ("errors", "failures"):
+            for test, err in result[flavor]:
+                label = "ERROR" if flavor == "errors" else "FAIL"
+                output.append("=" * 70)
+                output.append(f"{label}: {test} [{','.join(result['langs'])}]")
+                output.append("-" * 70)
+                output.append(err)
+    output.append("-" * 70)
+    output.append(f"Ran {tests_run} tests in {elapsed:.3f}s\n")
+    if failures or errors:
+        output.append(f"FAILED (failures={failures}, errors={errors})")
+    else:
+        output.append("OK")
+    output = "\n".join(output) + "\n"
+    click.echo(output, err=True, nl=False)
+    return {"success": not (failures or errors), "output": output}
+
+
 @click.group("minerva", cls=DefaultGroup,
              no_args_is_help=True, invoke_without_command=True,
              help="Minerva: Modular INtelligent Evaluation for a Reliable "
@@ -98,18 +279,27 @@ def neon_minerva_cli(version: bool = False):
 @neon_minerva_cli.command
 @click.option('--debug', is_flag=True, default=False,
               help="Flag to enable debug logging")
+@click.option('--no-cache', is_flag=True, default=False,
+              help="Flag to run tests even if a cached result is available")
 @click.argument("skill_entrypoint")
 @click.argument("test_file")
-def test_resources(skill_entrypoint, test_file, debug):
+def test_resources(skill_entrypoint, test_file, debug, no_cache):
     _init_tests(debug)
-    os.environ["TEST_SKILL_ENTRYPOINT"] = _get_skill_entrypoint(skill_entrypoint)
+    skill_entrypoint = _get_skill_entrypoint(skill_entrypoint)
+    os.environ["TEST_SKILL_ENTRYPOINT"] = skill_entrypoint
     test_file = _get_test_file(test_file)
     if not isfile(test_file):
         click.echo(f"Could not find test file: {test_file}")
         exit(2)
     os.environ["RESOURCE_TEST_FILE"] = test_file
-    from neon_minerva.tests.test_skill_resources import TestSkillResources
-    TextTestRunner().run(makeSuite(TestSkillResources))
+    cache_key = None if no_cache else _get_result_cache_key(
+        "test-resources", skill_entrypoint, [test_file])
+
+    def _run_tests():
+        from neon_minerva.tests.test_skill_resources import TestSkillResources
+        return _run_test_suite(makeSuite(TestSkillResources))
+
+    _run_cached(cache_key, _run_tests)
 
 
 @neon_minerva_cli.command
@@ -117,19 +307,162 @@ def test_resources(skill_entrypoint, test_file, debug):
               help="Flag to enable debug logging")
 @click.option('--padacioso', is_flag=True, default=False,
               help="Flag to enable testing with Padacioso instead of Padatious")
+@click.option('--model-cache', is_flag=True, default=False,
+              help="Flag to reuse trained Padatious models between runs")
+@click.option('-j', '--jobs', type=int, default=1,
+              help="Number of worker processes to test languages in parallel")
+@click.option('--no-cache', is_flag=True, default=False,
+              help="Flag to run tests even if a cached result is available")
+@click.option('--record', default=None,
+              help="Path to save a replay file of skill intent registration")
 @click.argument("skill_entrypoint")
 @click.argument("test_file")
-def test_intents(skill_entrypoint, test_file, debug, padacioso):
+def test_intents(skill_entrypoint, test_file, debug, padacioso, model_cache,
+                 jobs, no_cache, record):
     _init_tests(debug)
     os.environ["TEST_PADACIOSO"] = "true" if padacioso else "false"
-    os.environ["TEST_SKILL_ENTRYPOINT"] = _get_skill_entrypoint(skill_entrypoint)
+    os.environ["MINERVA_MODEL_CACHE"] = "true" if model_cache else "false"
+    replay_file = _get_test_file(skill_entrypoint)
+    if isfile(replay_file):
+        # Register intents from a replay file instead of loading a skill
+        skill_entrypoint = replay_file
+        os.environ["INTENT_REPLAY_FILE"] = replay_file
+    else:
+        skill_entrypoint = _get_skill_entrypoint(skill_entrypoint)
+    os.environ["TEST_SKILL_ENTRYPOINT"] = skill_entrypoint
+    if record:
+        if jobs > 1:
+            click.echo("`--record` is not supported with `--jobs`")
+            exit(2)
+        os.environ["INTENT_RECORD_FILE"] = expanduser(record)
+        # Always run tests so the replay file is written
+        no_cache = True
     test_file = _get_test_file(test_file)
     if not isfile(test_file):
         click.echo(f"Could not find test file: {test_file}")
         exit(2)
     os.environ["INTENT_TEST_FILE"] = test_file
-    from neon_minerva.tests.test_skill_intents import TestSkillIntentMatching
-    TextTestRunner().run(makeSuite(TestSkillIntentMatching))
+    cache_key = None if no_cache else _get_result_cache_key(
+        "test-intents", skill_entrypoint, [test_file],
+        [f"padacioso={padacioso}"])
+
+    def _run_tests():
+        if jobs > 1:
+            return _run_intent_tests_parallel(test_file, jobs, debug)
+        from neon_minerva.tests.test_skill_intents import \
+            TestSkillIntentMatching
+        return _run_test_suite(makeSuite(TestSkillIntentMatching))
+
+    _run_cached(cache_key, _run_tests)
+
+
+@neon_minerva_cli.command
+@click.option('--debug', is_flag=True, default=False,
+              help="Flag to enable debug logging")
+@click.option('--padacioso', is_flag=True, default=False,
+              help="Flag to enable testing with Padacioso instead of Padatious")
+@click.option('--model-cache', is_flag=True, default=False,
+              help="Flag to reuse trained Padatious models between runs")
+@click.option('--no-cache', is_flag=True, default=False,
+              help="Flag to run tests even if a cached result is available")
+@click.argument("skill_entrypoint")
+@click.argument("resource_file")
+@click.argument("intent_file")
+def test_all(skill_entrypoint, resource_file, intent_file, debug, padacioso,
+             model_cache, no_cache):
+    _init_tests(debug)
+    os.environ["TEST_PADACIOSO"] = "true" if padacioso else "false"
+    os.environ["MINERVA_MODEL_CACHE"] = "true" if model_cache else "false"
+    skill_entrypoint = _get_skill_entrypoint(skill_entrypoint)
+    os.environ["TEST_SKILL_ENTRYPOINT"] = skill_entrypoint
+    resource_file = _get_test_file(resource_file)
+    intent_file = _get_test_file(intent_file)
+    for test_file in (resource_file, intent_file):
+        if not isfile(test_file):
+            click.echo(f"Could not find test file: {test_file}")
+            exit(2)
+    from neon_minerva.skill import load_resource_tests
+    resource_langs = load_resource_tests(resource_file)['languages']
+    intent_langs = _get_intent_test_langs(intent_file)
+    if set(resource_langs) != set(intent_langs):
+        click.echo(f"Resource tests ({resource_langs}) and intent tests "
+                   f"({intent_langs}) must specify the same languages; use "
+                   f"`test-resources` and `test-intents` instead")
+        exit(2)
+    os.environ["RESOURCE_TEST_FILE"] = resource_file
+    os.environ["INTENT_TEST_FILE"] = intent_file
+    cache_key = None if no_cache else _get_result_cache_key(
+        "test-all", skill_entrypoint, [resource_file, intent_file],
+        [f"padacioso={padacioso}"])
+
+    def _run_tests():
+        from neon_minerva.skill import get_recorded_skill_count
+        from neon_minerva.tests.test_skill_resources import TestSkillResources
+        from neon_minerva.tests.test_skill_intents import \
+            TestSkillIntentMatching
+        result = _run_test_suite(TestSuite([
+            makeSuite(TestSkillResources),
+            makeSuite(TestSkillIntentMatching)]))
+        # Both suites test the same languages, so they must share one skill
+        loads = get_recorded_skill_count(skill_entrypoint, "test_skill.test")
+        if loads > 1:
+            click.echo(f"Skill was loaded {loads} times", err=True)
+            result["success"] = False
+        return result
+
+    _run_cached(cache_key, _run_tests)
+
+
+@neon_minerva_cli.command
+@click.option('--debug', is_flag=True, default=False,
+              help="Flag to enable debug logging")
+@click.option('-e', '--engine', 'engines', multiple=True,
+              type=click.Choice(["adapt", "padatious", "padacioso"]),
+              help="Engine to benchmark (default all)")
+@click.option('-n', '--corpus-size', type=int, default=1000,
+              help="Number of utterances to match with each engine")
+@click.option('-o', '--output', default=None,
+              help="Path to write JSON results to")
+@click.argument("skill_entrypoint")
+@click.argument("test_file")
+def bench_intents(skill_entrypoint, test_file, debug, engines, corpus_size,
+                  output):
+    import json
+    from datetime import datetime
+    from os.path import join
+    from neon_minerva.skill import get_recorded_skill, load_intent_tests, \
+        load_replay
+    from neon_minerva.intent_services.benchmark import ENGINES, get_corpus, \
+        run_benchmarks
+
+    _init_tests(debug)
+    test_file = _get_test_file(test_file)
+    if not isfile(test_file):
+        click.echo(f"Could not find test file: {test_file}")
+        exit(2)
+    corpus = get_corpus(load_intent_tests(test_file), corpus_size)
+    langs = _get_intent_test_langs(test_file)
+
+    replay_file = _get_test_file(skill_entrypoint)
+    if isfile(replay_file):
+        from tempfile import mkdtemp
+        messages = load_replay(replay_file, mkdtemp())
+    else:
+        messages = get_recorded_skill(_get_skill_entrypoint(skill_entrypoint),
+                                      "test_skill.test",
+                                      {"secondary_langs": langs}).messages
+    results = {"minerva_version": __version__,
+               "skill": skill_entrypoint,
+               "test_file": test_file,
+               "corpus_size": len(corpus),
+               "timestamp": datetime.now().isoformat(),
+               "engines": run_benchmarks(list(engines or ENGINES), messages,
+                                         corpus, join(os.environ[
+                                             "XDG_CACHE_HOME"], "bench"))}
+    if output:
+        with open(expanduser(output), 'w') as f:
+            json.dump(results, f, indent=2)
+    click.echo(json.dumps(results, indent=2))
 
 
 @neon_minerva_cli.command
@@ -137,14 +470,296 @@ def test_intents(skill_entrypoint, test_file, debug, padacioso):
               help="Language of test_file inputs")
 @click.option('-a', '--audio', is_flag=True, default=False,
               help="Test input as audio")
+@click.option('--tts', default=None,
+              help="TTS plugin to synthesize audio with (default core TTS)")
+@click.option('--gender', default="female",
+              help="Voice gender to synthesize audio with")
+@click.option('--no-audio-cache', is_flag=True, default=False,
+              help="Synthesize audio for every prompt instead of using "
+                   "cached audio")
+@click.option('--async', 'use_async', is_flag=True, default=False,
+              help="Use the asyncio test driver (requires the `async` extra)")
+@click.option('-r', '--rate', type=float, default=None,
+              help="Target prompts per second; enables open-loop load mode")
+@click.option('-c', '--concurrency', type=int, default=1,
+              help="Maximum prompts in flight (and simulated users) in "
+                   "load mode")
+@click.option('--arrival', type=click.Choice(["poisson", "fixed"]),
+              default="poisson", help="Arrival process in load mode")
+@click.option('-n', '--count', type=int, default=None,
+              help="Number of prompts to send in load mode")
+@click.option('-d', '--duration', type=float, default=None,
+              help="Seconds to send prompts for in load mode")
+@click.option('--seed', type=int, default=None,
+              help="Random seed for load mode arrival times")
+@click.option('--histogram', default=None,
+              help="Comma-separated histogram bucket upper bounds in seconds")
+@click.option('-f', '--output-format', type=click.Choice(["yaml", "json"]),
+              default="yaml", help="Format of printed results")
+@click.option('--timeout-factor', type=float, default=None,
+              help="Adapt timeouts not specified per-prompt to this multiple "
+                   "of each prompt's observed p99")
+@click.option('--repeat', type=int, default=1,
+              help="Number of times to send each prompt")
+@click.option('--warmup', type=int, default=0,
+              help="Number of prompts to send before measuring results")
+@click.option('--warmup-duration', type=float, default=0,
+              help="Seconds to send prompts before measuring results")
+@click.option('--trace', default=None,
+              help="Path to write a Chrome trace of prompt timing to")
+@click.option('--samples', default=None,
+              help="Path to write JSONL results for each prompt to")
+@click.option('--mock-core', is_flag=True, default=False,
+              help="Test against an in-process mock core")
+@click.option('--mock-config', default=None,
+              help="Path to a YAML mock core configuration (implies "
+                   "--mock-core)")
+@click.option('--save-baseline', default=None,
+              help="Directory to save results to as a baseline")
+@click.option('--compare-to', default=None,
+              help="Baseline directory to compare results to")
+@click.option('--regression-threshold', type=float, default=0.1,
+              help="Relative increase in median stage latency to fail "
+                   "--compare-to on (default 0.1)")
+@click.option('--alpha', type=float, default=0.05,
+              help="Significance level for --compare-to (default 0.05)")
+@click.option('--soak', type=float, default=None,
+              help="Seconds to cycle through prompts for")
+@click.option('--timeseries', default=None,
+              help="Path to write windowed results to (`.csv` or `.jsonl`)")
+@click.option('--interval', type=float, default=60,
+              help="Seconds per --timeseries window (default 60)")
+@click.option('--core-pid', type=int, multiple=True,
+              help="Local core process ID to report memory and CPU usage of "
+                   "in --timeseries (may be repeated)")
 @click.argument("test_file")
-def test_utterances(lang, audio, test_file):
-    from neon_utils.file_utils import load_commented_file
-    from neon_minerva.integration.user_utterance import UtteranceTests
+def test_utterances(lang, audio, tts, gender, no_audio_cache, use_async, rate,
+                    concurrency, arrival, count, duration, seed, histogram,
+                    output_format, timeout_factor, repeat, warmup,
+                    warmup_duration, trace, samples, mock_core, mock_config,
+                    save_baseline, compare_to, regression_threshold, alpha,
+                    soak, timeseries, interval, core_pid, test_file):
+    import json
+    import shutil
+    from tempfile import mkdtemp
+    from neon_minerva.integration.prompts import load_prompts
+    from neon_minerva.integration.trace import TraceRecorder
+    from neon_minerva.integration.user_utterance import AudioCache, \
+        UtteranceTests
 
     test_file = _get_test_file(test_file)
-    prompts = load_commented_file(test_file).split('\n')
+    prompts = load_prompts(test_file)
     click.echo(f"Testing {len(prompts)} prompts")
-    runner = UtteranceTests(prompts, lang=lang, audio=audio)
-    results = runner.run_test()
-    click.echo(yaml.safe_dump(results))
+    histogram_bounds = [float(b) for b in histogram.split(',')] \
+        if histogram else None
+    audio_cache = AudioCache() if audio and not no_audio_cache else None
+    runner_class = UtteranceTests
+    runner_kwargs = dict()
+    if use_async:
+        from neon_minerva.integration.async_utterance import \
+            AsyncUtteranceTests
+        runner_class = AsyncUtteranceTests
+    core = None
+    if mock_core or mock_config:
+        from neon_minerva.integration.mock_core import MockCore
+        config = dict()
+        if mock_config:
+            with open(mock_config) as f:
+                config = yaml.safe_load(f) or dict()
+        core = MockCore.from_config(config)
+        core.start()
+        # Don't cache mock audio as if it were synthesized by core
+        audio_cache = None
+        runner_kwargs["bus"] = core.bus
+    samples_dir = None
+    if (save_baseline or compare_to) and not samples:
+        samples_dir = mkdtemp()
+        samples = os.path.join(samples_dir, "samples.jsonl")
+    recorders = list()
+    if trace or samples:
+        recorders.append(TraceRecorder(trace, samples))
+    if timeseries:
+        from neon_minerva.integration.soak import TimeSeriesRecorder
+        recorders.append(TimeSeriesRecorder(timeseries, interval,
+                                            pids=core_pid))
+    runner = runner_class(prompts, lang=lang, audio=audio,
+                          tts=_load_tts(tts, lang), gender=gender,
+                          audio_cache=audio_cache,
+                          histogram_bounds=histogram_bounds,
+                          timeout_factor=timeout_factor, repeat=repeat,
+                          warmup=warmup, warmup_duration=warmup_duration,
+                          recorders=recorders, **runner_kwargs)
+    try:
+        if rate:
+            results = runner.run_load_test(rate, concurrency, arrival, count,
+                                           duration or soak, seed)
+        elif soak:
+            results = runner.run_soak_test(soak)
+        else:
+            results = runner.run_test()
+    finally:
+        for recorder in recorders:
+            recorder.close()
+        if core:
+            core.stop()
+    try:
+        if compare_to:
+            from neon_minerva.integration.baseline import compare_to_baseline
+            results["comparison"] = compare_to_baseline(
+                compare_to, samples, threshold=regression_threshold,
+                alpha=alpha, seed=seed)
+        if save_baseline:
+            from neon_minerva.integration.baseline import save_baseline as \
+                _save_baseline
+            _save_baseline(save_baseline, results, samples)
+    finally:
+        if samples_dir:
+            shutil.rmtree(samples_dir, ignore_errors=True)
+    if output_format == "json":
+        click.echo(json.dumps(results, indent=2))
+    else:
+        click.echo(yaml.safe_dump(results))
+    for failure in runner.failures:
+        click.echo(f"FAILED: {failure['prompt']}: {failure['error']}",
+                   err=True)
+    regressions = results.get("comparison", dict()).get("regressions")
+    if regressions:
+        click.echo(f"REGRESSED: {', '.join(regressions)}", err=True)
+        exit(1)
+
+
+@neon_minerva_cli.command
+@click.option('-l', '--lang', default="en-us",
+              help="Language of test_file inputs")
+@click.option('--tts', default=None,
+              help="TTS plugin to synthesize audio with (default core TTS)")
+@click.option('--gender', default="female",
+              help="Voice gender to synthesize audio with")
+@click.argument("test_file")
+def prepare_audio(lang, tts, gender, test_file):
+    from neon_minerva.integration.prompts import load_prompts
+    from neon_minerva.integration.user_utterance import AudioCache, \
+        UtteranceTests
+
+    test_file = _get_test_file(test_file)
+    prompts = [p.text for p in load_prompts(test_file)]
+    click.echo(f"Preparing audio for {len(prompts)} prompts")
+    runner = UtteranceTests(prompts, lang=lang, audio=True,
+                            tts=_load_tts(tts, lang), gender=gender,
+                            audio_cache=AudioCache())
+    for prompt in prompts:
+        click.echo(f"{prompt}: {runner.prepare_audio(prompt)}")
+
+
+@neon_minerva_cli.command
+@click.option('--debug', is_flag=True, default=False,
+              help="Flag to enable debug logging")
+@click.option('-w', '--workload', 'workloads', multiple=True,
+              type=click.Choice(["publish_consume", "rpc"]),
+              help="Workload to run (default all)")
+@click.option('-n', '--count', type=int, default=10000,
+              help="Number of messages (or RPC requests) per workload")
+@click.option('-s', '--payload-size', type=int, default=1024,
+              help="Message size in bytes")
+@click.option('-p', '--publishers', type=int, default=1,
+              help="Number of publisher (RPC client) connections")
+@click.option('-c', '--consumers', type=int, default=1,
+              help="Number of consumer (RPC server) connections")
+@click.option('--prefetch', type=int, default=100,
+              help="Consumer prefetch count (0 for unlimited)")
+@click.option('--confirm', is_flag=True, default=False,
+              help="Publish with publisher confirms")
+@click.option('--host', default="127.0.0.1", help="Broker host")
+@click.option('--port', type=int, default=None,
+              help="Broker AMQP port (default start a broker for the run)")
+@click.option('--local', is_flag=True, default=False,
+              help="Start a LocalAMQPServer instead of RabbitMQ when no "
+                   "--port is given")
+@click.option('--timeout', type=float, default=60,
+              help="Seconds to wait for each workload to complete")
+@click.option('-o', '--output', default=None,
+              help="Path to write JSON results to")
+def bench_rmq(debug, workloads, count, payload_size, publishers, consumers,
+              prefetch, confirm, host, port, local, timeout, output):
+    import json
+    from datetime import datetime
+    from neon_minerva.integration.rmq_benchmark import RMQBenchmark, WORKLOADS
+
+    _init_tests(debug)
+    username = os.environ.get("TEST_RMQ_USERNAME", "test_user")
+    password = os.environ.get("TEST_RMQ_PASSWORD", "test_password")
+    vhost = os.environ.get("TEST_RMQ_VHOSTS", "/test").split(",")[0]
+    broker = None
+    if port is None:
+        from neon_minerva.integration.rabbit_mq import use_local_broker
+        if local or use_local_broker():
+            from neon_minerva.integration.amqp_server import LocalAMQPServer
+            broker = LocalAMQPServer(host)
+            broker.start()
+        else:
+            from tempfile import mkdtemp
+            from neon_minerva.integration.rabbit_mq import start_rmq_broker
+            broker = start_rmq_broker(mkdtemp(), host=host)
+        from neon_minerva.integration.rabbit_mq import \
+            get_rmq_definitions, import_rmq_definitions
+        import_rmq_definitions(broker, get_rmq_definitions(username, password,
+                                                           [vhost]))
+        port = broker.port
+    try:
+        benchmark = RMQBenchmark(host, port, vhost, username, password,
+                                 payload_size, publishers, consumers,
+                                 prefetch, confirm, timeout)
+        results = {"minerva_version": __version__,
+                   "broker": type(broker).__name__ if broker else
+                   f"{host}:{port}",
+                   "timestamp": datetime.now().isoformat(),
+                   "workloads": {workload: benchmark.run(workload, count)
+                                 for workload in workloads or WORKLOADS}}
+    finally:
+        if broker:
+            broker.stop()
+    if output:
+        with open(expanduser(output), 'w') as f:
+            json.dump(results, f, indent=2)
+    click.echo(json.dumps(results, indent=2))
+    incomplete = [name for name, result in results["workloads"].items()
+                  if result["errors"] or result["latency"]["count"] < count]
+    if incomplete:
+        click.echo(f"INCOMPLETE: {', '.join(incomplete)}", err=True)
+        exit(1)
+
+
+@neon_minerva_cli.group(help="Inspect and prune persistent Minerva caches")
+def cache():
+    pass
+
+
+@cache.command("info", help="Show the size of each persistent cache")
+def cache_info():
+    from neon_minerva.cache import get_cache_root, get_caches
+    click.echo(f"Cache root: {get_cache_root()}")
+    for disk_cache in get_caches():
+        entries = disk_cache.entries()
+        size = sum(e.size for e in entries)
+        click.echo(f"{disk_cache.name}: {len(entries)} entries, "
+                   f"{size / 1024 / 1024:.1f} MiB")
+
+
+@cache.command("prune", help="Remove least-recently used entries from caches")
+@click.option('--max-size', type=int, default=None,
+              help="Maximum size in MiB to keep per cache")
+@click.option('--all', 'clear', is_flag=True, default=False,
+              help="Remove all entries")
+@click.argument("names", nargs=-1)
+def cache_prune(names, max_size, clear):
+    from neon_minerva.cache import get_caches
+    for disk_cache in get_caches():
+        if names and disk_cache.name not in names:
+            continue
+        if clear:
+            disk_cache.clear()
+            click.echo(f"Cleared {disk_cache.name}")
+            continue
+        removed = disk_cache.prune(max_size * 1024 * 1024
+                                   if max_size is not None else None)
+        click.echo(f"Removed {len(removed)} entries from {disk_cache.name}")
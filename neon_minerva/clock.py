@@ -0,0 +1,153 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import time
+
+from threading import Event, Lock
+from typing import List, Optional
+
+
+class Clock:
+    """
+    Clock used by test services for timestamps and timeouts.
+    """
+    def time(self) -> float:
+        """
+        Get the current time in epoch seconds.
+        """
+        return time.time()
+
+    def wait(self, event: Event, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for an event to be set.
+        @param event: Event to wait for
+        @param timeout: maximum seconds to wait (None to wait indefinitely)
+        @returns: True if the event was set, False if the wait timed out
+        """
+        return event.wait(timeout)
+
+    def sleep(self, seconds: float):
+        """
+        Block for the specified number of seconds.
+        """
+        time.sleep(seconds)
+
+    async def wait_for(self, future: asyncio.Future,
+                       timeout: Optional[float] = None):
+        """
+        Wait for a future to complete, as `asyncio.wait_for`.
+        @param future: Future to wait for; cancelled if the wait times out
+        @param timeout: maximum seconds to wait (None to wait indefinitely)
+        @returns: result of the future
+        @raises asyncio.TimeoutError: if the wait timed out
+        """
+        return await asyncio.wait_for(future, timeout)
+
+
+class SimulatedClock(Clock):
+    def __init__(self, start: float = 0.0, poll_interval: float = 0.001):
+        """
+        Clock where time only passes when advanced, so timeouts can be tested
+        deterministically without waiting in real time. Time never advances
+        on its own; a test advances it once every thread it expects to wait
+        is waiting (see `waiters` and `advance_to_next_deadline`).
+        @param start: initial time in seconds
+        @param poll_interval: real seconds between checks of waited events
+        """
+        self._now = start
+        self._lock = Lock()
+        self._deadlines: List[float] = list()
+        self.poll_interval = poll_interval
+
+    def time(self) -> float:
+        with self._lock:
+            return self._now
+
+    @property
+    def waiters(self) -> int:
+        """
+        Number of threads currently waiting with a timeout.
+        """
+        with self._lock:
+            return len(self._deadlines)
+
+    def advance(self, seconds: float):
+        """
+        Move the clock forward.
+        @param seconds: number of seconds to advance
+        """
+        with self._lock:
+            self._now += seconds
+
+    def advance_to_next_deadline(self) -> bool:
+        """
+        Move the clock forward to the earliest pending timeout.
+        @returns: True if there was a pending timeout to advance to
+        """
+        with self._lock:
+            if not self._deadlines:
+                return False
+            self._now = max(self._now, min(self._deadlines))
+            return True
+
+    def wait(self, event: Event, timeout: Optional[float] = None) -> bool:
+        if timeout is None:
+            return event.wait()
+        with self._lock:
+            deadline = self._now + timeout
+            self._deadlines.append(deadline)
+        try:
+            while not event.wait(self.poll_interval):
+                with self._lock:
+                    if self._now >= deadline:
+                        return event.is_set()
+            return True
+        finally:
+            with self._lock:
+                self._deadlines.remove(deadline)
+
+    def sleep(self, seconds: float):
+        self.wait(Event(), seconds)
+
+    async def wait_for(self, future: asyncio.Future,
+                       timeout: Optional[float] = None):
+        if timeout is None:
+            return await future
+        with self._lock:
+            deadline = self._now + timeout
+            self._deadlines.append(deadline)
+        try:
+            while not future.done():
+                await asyncio.wait({future}, timeout=self.poll_interval)
+                with self._lock:
+                    if not future.done() and self._now >= deadline:
+                        future.cancel()
+                        raise asyncio.TimeoutError()
+            return future.result()
+        finally:
+            with self._lock:
+                self._deadlines.remove(deadline)
@@ -0,0 +1,1411 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import json
+import struct
+
+from base64 import b64decode, b64encode, urlsafe_b64encode
+from collections import deque
+from functools import lru_cache
+from hashlib import sha256
+from itertools import count
+from os import urandom
+from threading import Thread
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from ovos_utils.log import LOG
+
+PROTOCOL_HEADER = b"AMQP\x00\x00\x09\x01"
+FRAME_METHOD = 1
+FRAME_HEADER = 2
+FRAME_BODY = 3
+FRAME_HEARTBEAT = 8
+FRAME_END = 0xCE
+FRAME_MAX = 131072
+CHANNEL_MAX = 2047
+DIRECT_REPLY_TO = "amq.rabbitmq.reply-to"
+EXCHANGE_TYPES = ("direct", "fanout", "topic")
+
+NO_ROUTE = 312
+CONNECTION_FORCED = 320
+ACCESS_REFUSED = 403
+NOT_FOUND = 404
+RESOURCE_LOCKED = 405
+PRECONDITION_FAILED = 406
+FRAME_ERROR = 501
+SYNTAX_ERROR = 502
+COMMAND_INVALID = 503
+CHANNEL_ERROR = 504
+UNEXPECTED_FRAME = 505
+NOT_ALLOWED = 530
+NOT_IMPLEMENTED = 540
+
+SERVER_PROPERTIES = {
+    "product": "neon-minerva",
+    "platform": "Python",
+    "information": "Local AMQP 0-9-1 server for testing",
+    "capabilities": {"publisher_confirms": True,
+                     "basic.nack": True,
+                     "consumer_cancel_notify": True,
+                     "exchange_exchange_bindings": False,
+                     "direct_reply_to": True}}
+
+# Basic content properties, in property flag order starting from bit 15
+_PROPERTY_TYPES = ("shortstr", "shortstr", "table", "octet", "octet",
+                   "shortstr", "shortstr", "shortstr", "shortstr", "longlong",
+                   "shortstr", "shortstr", "shortstr", "shortstr")
+_REPLY_TO_INDEX = 6
+
+
+class AMQPError(Exception):
+    def __init__(self, code: int, text: str, connection: bool = False):
+        """
+        Error that closes the channel (or connection) it occurred on.
+        @param code: AMQP reply code
+        @param text: reply text sent to the client
+        @param connection: if True, close the connection instead of the channel
+        """
+        Exception.__init__(self, text)
+        self.code = code
+        self.text = text
+        self.connection = connection
+        self.class_id = 0
+        self.method_id = 0
+
+
+def hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    """
+    Hash a password as RabbitMQ does (`rabbit_password_hashing_sha256`).
+    @param password: password to hash
+    @param salt: 4-byte salt (default random)
+    @returns: base64-encoded salted hash
+    """
+    salt = salt or urandom(4)
+    return b64encode(salt + sha256(salt + password.encode("utf-8")).digest()
+                     ).decode("ascii")
+
+
+def check_password(password_hash: str, password: str) -> bool:
+    """
+    Check a password against a hash from `hash_password`.
+    @param password_hash: base64-encoded salted hash
+    @param password: password to check
+    @returns: True if the password matches
+    """
+    try:
+        salt = b64decode(password_hash)[:4]
+    except ValueError:
+        return False
+    return hash_password(password, salt) == password_hash
+
+
+class _Decoder:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def raw(self, size: int) -> bytes:
+        if self.offset + size > len(self.data):
+            raise AMQPError(FRAME_ERROR, "FRAME_ERROR - truncated frame",
+                            connection=True)
+        value = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return value
+
+    def _unpack(self, fmt: str):
+        return struct.unpack(fmt, self.raw(struct.calcsize(fmt)))[0]
+
+    def octet(self) -> int:
+        return self._unpack(">B")
+
+    def short(self) -> int:
+        return self._unpack(">H")
+
+    def long(self) -> int:
+        return self._unpack(">I")
+
+    def longlong(self) -> int:
+        return self._unpack(">Q")
+
+    def shortstr(self) -> str:
+        return self.raw(self.octet()).decode("utf-8", errors="replace")
+
+    def longstr(self) -> bytes:
+        return self.raw(self.long())
+
+    def bits(self, num: int) -> List[bool]:
+        value = self.octet()
+        return [bool(value & (1 << idx)) for idx in range(num)]
+
+    def table(self) -> dict:
+        return _decode_fields(self.longstr())
+
+    def field_value(self):
+        kind = chr(self.octet())
+        if kind in _FIELD_FORMATS:
+            value = self._unpack(_FIELD_FORMATS[kind])
+            return bool(value) if kind == "t" else value
+        if kind == "D":
+            scale = self.octet()
+            return self._unpack(">i") / 10 ** scale
+        if kind in "Sx":
+            return self.longstr()
+        if kind == "A":
+            array = _Decoder(self.longstr())
+            values = list()
+            while array.offset < len(array.data):
+                values.append(array.field_value())
+            return values
+        if kind == "F":
+            return self.table()
+        if kind == "V":
+            return None
+        raise AMQPError(SYNTAX_ERROR, f"SYNTAX_ERROR - invalid field type "
+                                      f"'{kind}'", connection=True)
+
+
+_FIELD_FORMATS = {"t": ">B", "b": ">b", "B": ">B", "s": ">h", "U": ">h",
+                  "u": ">H", "I": ">i", "i": ">I", "l": ">q", "L": ">Q",
+                  "f": ">f", "d": ">d", "T": ">Q"}
+
+
+def _decode_fields(data: bytes) -> dict:
+    decoder = _Decoder(data)
+    fields = dict()
+    while decoder.offset < len(data):
+        key = decoder.shortstr()
+        fields[key] = decoder.field_value()
+    return fields
+
+
+def _octet(value: int) -> bytes:
+    return struct.pack(">B", value)
+
+
+def _short(value: int) -> bytes:
+    return struct.pack(">H", value)
+
+
+def _long(value: int) -> bytes:
+    return struct.pack(">I", value)
+
+
+def _longlong(value: int) -> bytes:
+    return struct.pack(">Q", value)
+
+
+def _shortstr(value: str) -> bytes:
+    value = value.encode("utf-8")[:255]
+    return _octet(len(value)) + value
+
+
+def _longstr(value: bytes) -> bytes:
+    return _long(len(value)) + value
+
+
+def _bits(*flags: bool) -> bytes:
+    return _octet(sum(1 << idx for idx, flag in enumerate(flags) if flag))
+
+
+def _field_value(value) -> bytes:
+    if isinstance(value, bool):
+        return b"t" + _octet(value)
+    if isinstance(value, int):
+        return b"l" + struct.pack(">q", value)
+    if isinstance(value, float):
+        return b"d" + struct.pack(">d", value)
+    if isinstance(value, str):
+        return b"S" + _longstr(value.encode("utf-8"))
+    if isinstance(value, bytes):
+        return b"x" + _longstr(value)
+    if isinstance(value, dict):
+        return b"F" + _table(value)
+    if value is None:
+        return b"V"
+    raise TypeError(f"Unsupported field value: {value}")
+
+
+def _table(value: dict) -> bytes:
+    return _longstr(b"".join(_shortstr(key) + _field_value(val)
+                             for key, val in value.items()))
+
+
+def _frame(frame_type: int, channel: int, payload: bytes) -> bytes:
+    return struct.pack(">BHI", frame_type, channel, len(payload)) + \
+        payload + _octet(FRAME_END)
+
+
+def _method_frame(channel: int, class_id: int, method_id: int,
+                  args: bytes = b"") -> bytes:
+    return _frame(FRAME_METHOD, channel,
+                  struct.pack(">HH", class_id, method_id) + args)
+
+
+def _find_reply_to(properties: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Find the `reply_to` property in encoded content properties.
+    @param properties: property flags and values from a content header
+    @returns: (start, end) offsets of the encoded `reply_to` shortstr, or None
+    """
+    decoder = _Decoder(properties)
+    flags = decoder.short()
+    for idx, kind in enumerate(_PROPERTY_TYPES[:_REPLY_TO_INDEX + 1]):
+        if not flags & (1 << (15 - idx)):
+            continue
+        start = decoder.offset
+        if kind == "shortstr":
+            decoder.raw(decoder.octet())
+        elif kind == "table":
+            decoder.raw(decoder.long())
+        elif kind == "octet":
+            decoder.octet()
+        else:
+            decoder.longlong()
+        if idx == _REPLY_TO_INDEX:
+            return start, decoder.offset
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _topic_matches(pattern: str, routing_key: str) -> bool:
+    """
+    Check if a topic binding key matches a routing key. `*` matches exactly
+    one word and `#` matches zero or more words.
+    """
+    pattern = tuple(pattern.split("."))
+    words = tuple(routing_key.split("."))
+
+    @lru_cache(maxsize=None)
+    def _match(pidx: int, widx: int) -> bool:
+        if pidx == len(pattern):
+            return widx == len(words)
+        if pattern[pidx] == "#":
+            return _match(pidx + 1, widx) or \
+                (widx < len(words) and _match(pidx, widx + 1))
+        if widx == len(words):
+            return False
+        return pattern[pidx] in ("*", words[widx]) and \
+            _match(pidx + 1, widx + 1)
+    return _match(0, 0)
+
+
+def _random_name(prefix: str) -> str:
+    return prefix + urlsafe_b64encode(urandom(16)).decode("ascii").rstrip("=")
+
+
+class _Message:
+    __slots__ = ("exchange", "routing_key", "properties", "body",
+                 "redelivered")
+
+    def __init__(self, exchange: str, routing_key: str, properties: bytes,
+                 body: bytes):
+        self.exchange = exchange
+        self.routing_key = routing_key
+        self.properties = properties
+        self.body = body
+        self.redelivered = False
+
+
+class _Queue:
+    def __init__(self, name: str, vhost: '_VHost', durable: bool = False,
+                 exclusive_owner: Optional['_Connection'] = None,
+                 auto_delete: bool = False):
+        self.name = name
+        self.vhost = vhost
+        self.durable = durable
+        self.exclusive_owner = exclusive_owner
+        self.auto_delete = auto_delete
+        self.messages: Deque[_Message] = deque()
+        self.consumers: Deque[_Consumer] = deque()
+        self.had_consumers = False
+        self.deleted = False
+
+
+class _Exchange:
+    def __init__(self, name: str, kind: str, durable: bool = False,
+                 auto_delete: bool = False, internal: bool = False):
+        self.name = name
+        self.kind = kind
+        self.durable = durable
+        self.auto_delete = auto_delete
+        self.internal = internal
+        # routing key -> queue name -> queue
+        self.bindings: Dict[str, Dict[str, _Queue]] = dict()
+
+    def bind(self, routing_key: str, queue: _Queue):
+        self.bindings.setdefault(routing_key, dict())[queue.name] = queue
+
+    def unbind(self, routing_key: str, queue: _Queue):
+        queues = self.bindings.get(routing_key, dict())
+        queues.pop(queue.name, None)
+        if not queues:
+            self.bindings.pop(routing_key, None)
+
+    def unbind_queue(self, queue: _Queue):
+        for routing_key in list(self.bindings):
+            self.unbind(routing_key, queue)
+
+    def route(self, routing_key: str) -> List[_Queue]:
+        if self.kind == "direct":
+            return list(self.bindings.get(routing_key, dict()).values())
+        queues = dict()
+        for key, bound in self.bindings.items():
+            if self.kind == "fanout" or _topic_matches(key, routing_key):
+                queues.update(bound)
+        return list(queues.values())
+
+
+class _VHost:
+    def __init__(self, name: str):
+        self.name = name
+        self.exchanges: Dict[str, _Exchange] = {
+            "": _Exchange("", "direct", durable=True),
+            "amq.direct": _Exchange("amq.direct", "direct", durable=True),
+            "amq.fanout": _Exchange("amq.fanout", "fanout", durable=True),
+            "amq.topic": _Exchange("amq.topic", "topic", durable=True)}
+        self.queues: Dict[str, _Queue] = dict()
+
+
+class _Consumer:
+    __slots__ = ("tag", "channel", "queue", "no_ack", "exclusive", "unacked")
+
+    def __init__(self, tag: str, channel: '_Channel', queue: _Queue,
+                 no_ack: bool, exclusive: bool):
+        self.tag = tag
+        self.channel = channel
+        self.queue = queue
+        self.no_ack = no_ack
+        self.exclusive = exclusive
+        self.unacked = 0
+
+
+class _Channel:
+    def __init__(self, connection: '_Connection', number: int):
+        self.connection = connection
+        self.number = number
+        self.consumers: Dict[str, _Consumer] = dict()
+        # delivery tag -> (queue, message, consumer); ordered by tag
+        self.unacked: Dict[int, Tuple[_Queue, _Message,
+                                      Optional[_Consumer]]] = dict()
+        self.delivery_tags = count(1)
+        self.publish_tags = count(1)
+        self.prefetch_count = 0
+        self.global_prefetch_count = 0
+        self.confirm = False
+        self.active = True
+        self.closing = False
+        self.last_queue = ""
+        self.reply_queue: Optional[_Queue] = None
+        # [exchange, routing key, mandatory, properties, body size, chunks]
+        self.publish: Optional[list] = None
+
+    def can_deliver(self, consumer: _Consumer) -> bool:
+        if not self.active:
+            return False
+        if consumer.no_ack:
+            return True
+        if self.prefetch_count and consumer.unacked >= self.prefetch_count:
+            return False
+        return not self.global_prefetch_count or \
+            len(self.unacked) < self.global_prefetch_count
+
+
+class _Connection:
+    def __init__(self, server: 'LocalAMQPServer',
+                 reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.channels: Dict[int, _Channel] = dict()
+        self.exclusive_queues: Set[_Queue] = set()
+        self.user: Optional[str] = None
+        self.vhost: Optional[_VHost] = None
+        self.channel_max = CHANNEL_MAX
+        self.frame_max = FRAME_MAX
+        self.closing = False
+        self.closed = False
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def send(self, data: bytes):
+        if not self.closed:
+            self.writer.write(data)
+
+    def send_method(self, channel: int, class_id: int, method_id: int,
+                    args: bytes = b""):
+        self.send(_method_frame(channel, class_id, method_id, args))
+
+    def content_frames(self, channel: int, message: _Message) -> bytes:
+        body = message.body
+        chunk = self.frame_max - 8
+        return _frame(FRAME_HEADER, channel,
+                      _short(60) + _short(0) + _longlong(len(body)) +
+                      message.properties) + \
+            b"".join(_frame(FRAME_BODY, channel, body[idx:idx + chunk])
+                     for idx in range(0, len(body), chunk))
+
+    def deliver(self, consumer: _Consumer, queue: _Queue, message: _Message):
+        channel = consumer.channel
+        tag = next(channel.delivery_tags)
+        if not consumer.no_ack:
+            channel.unacked[tag] = (queue, message, consumer)
+            consumer.unacked += 1
+        self.send(_method_frame(channel.number, 60, 60,
+                                _shortstr(consumer.tag) + _longlong(tag) +
+                                _bits(message.redelivered) +
+                                _shortstr(message.exchange) +
+                                _shortstr(message.routing_key)) +
+                  self.content_frames(channel.number, message))
+
+    def close(self, code: int, text: str, class_id: int = 0,
+              method_id: int = 0):
+        """
+        Start closing this connection from the server side.
+        """
+        if self.closing or self.closed:
+            return
+        self.send_method(0, 10, 50, _short(code) + _shortstr(text) +
+                         _short(class_id) + _short(method_id))
+        self.closing = True
+        self._release()
+
+    async def run(self):
+        try:
+            header = await self.reader.readexactly(8)
+            if header != PROTOCOL_HEADER:
+                self.send(PROTOCOL_HEADER)
+                return
+            self.send_method(0, 10, 10, _octet(0) + _octet(9) +
+                             _table(SERVER_PROPERTIES) +
+                             _longstr(b"PLAIN AMQPLAIN") +
+                             _longstr(b"en_US"))
+            while not self.closed:
+                frame_type, channel, size = struct.unpack(
+                    ">BHI", await self.reader.readexactly(7))
+                payload = await self.reader.readexactly(size)
+                if (await self.reader.readexactly(1))[0] != FRAME_END:
+                    self.close(FRAME_ERROR, "FRAME_ERROR - invalid frame end")
+                    break
+                try:
+                    self._handle_frame(frame_type, channel, payload)
+                except AMQPError as e:
+                    if e.connection or channel == 0:
+                        self.close(e.code, e.text, e.class_id, e.method_id)
+                    else:
+                        self._close_channel(channel, e)
+                await self.writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            LOG.exception(f"Error handling AMQP connection: {e}")
+        finally:
+            self.closed = True
+            self._release()
+            if self._heartbeat_task:
+                self._heartbeat_task.cancel()
+            self.server._connections.discard(self)
+            self.writer.close()
+
+    def _release(self):
+        """
+        Close all channels and delete exclusive queues of this connection.
+        """
+        for channel in list(self.channels.values()):
+            self._release_channel(channel)
+        self.channels.clear()
+        for queue in list(self.exclusive_queues):
+            self.server._delete_queue(queue)
+        self.exclusive_queues.clear()
+
+    def _release_channel(self, channel: _Channel):
+        for consumer in list(channel.consumers.values()):
+            self.server._remove_consumer(consumer)
+        channel.consumers.clear()
+        self._requeue(channel, list(channel.unacked))
+        channel.publish = None
+
+    def _requeue(self, channel: _Channel, tags: List[int],
+                 requeue: bool = True):
+        queues = {consumer.queue for consumer in channel.consumers.values()}
+        requeued = list()
+        for tag in tags:
+            queue, message, consumer = channel.unacked.pop(tag)
+            if consumer:
+                consumer.unacked -= 1
+            if requeue and not queue.deleted:
+                message.redelivered = True
+                requeued.append((queue, message))
+            queues.add(queue)
+        for queue, message in reversed(requeued):
+            queue.messages.appendleft(message)
+        for queue in queues:
+            self.server._dispatch(queue)
+
+    def _close_channel(self, number: int, error: AMQPError):
+        channel = self.channels.get(number)
+        if not channel or channel.closing:
+            return
+        self.send_method(number, 20, 40, _short(error.code) +
+                         _shortstr(error.text) + _short(error.class_id) +
+                         _short(error.method_id))
+        channel.closing = True
+        self._release_channel(channel)
+
+    def _handle_frame(self, frame_type: int, number: int, payload: bytes):
+        if frame_type == FRAME_HEARTBEAT:
+            return
+        if frame_type == FRAME_METHOD:
+            class_id, method_id = struct.unpack_from(">HH", payload)
+        else:
+            class_id = method_id = 0
+        if self.closing:
+            if (class_id, method_id) in ((10, 50), (10, 51)):
+                if method_id == 50:
+                    self.send_method(0, 10, 51)
+                self.closed = True
+            return
+        if number == 0:
+            if frame_type != FRAME_METHOD or class_id != 10:
+                raise AMQPError(COMMAND_INVALID, "COMMAND_INVALID - "
+                                "expected a connection method",
+                                connection=True)
+            self._handle_method(None, class_id, method_id, payload)
+            return
+        if not self.vhost:
+            raise AMQPError(CHANNEL_ERROR, "CHANNEL_ERROR - connection is "
+                            "not open", connection=True)
+        channel = self.channels.get(number)
+        if channel and channel.closing:
+            if (class_id, method_id) in ((20, 40), (20, 41)):
+                if method_id == 40:
+                    self.send_method(number, 20, 41)
+                self.channels.pop(number)
+            return
+        if frame_type == FRAME_METHOD:
+            if channel is None and (class_id, method_id) != (20, 10):
+                raise AMQPError(CHANNEL_ERROR, f"CHANNEL_ERROR - expected "
+                                f"'channel.open' on channel {number}",
+                                connection=True)
+            if channel and channel.publish is not None:
+                raise AMQPError(UNEXPECTED_FRAME, "UNEXPECTED_FRAME - "
+                                "expected content", connection=True)
+            self._handle_method(channel or number, class_id, method_id,
+                                payload)
+        elif frame_type in (FRAME_HEADER, FRAME_BODY):
+            if channel is None or channel.publish is None:
+                raise AMQPError(UNEXPECTED_FRAME, "UNEXPECTED_FRAME - "
+                                "unexpected content", connection=True)
+            self._handle_content(channel, frame_type, payload)
+        else:
+            raise AMQPError(FRAME_ERROR, f"FRAME_ERROR - invalid frame type "
+                            f"{frame_type}", connection=True)
+
+    def _handle_method(self, channel, class_id: int, method_id: int,
+                       payload: bytes):
+        handler = _METHODS.get((class_id, method_id))
+        if not handler:
+            raise AMQPError(NOT_IMPLEMENTED, f"NOT_IMPLEMENTED - method "
+                            f"{class_id}.{method_id} is not supported",
+                            connection=True)
+        try:
+            handler(self, channel, _Decoder(payload[4:]))
+        except AMQPError as e:
+            e.class_id, e.method_id = class_id, method_id
+            raise
+
+    def _handle_content(self, channel: _Channel, frame_type: int,
+                        payload: bytes):
+        publish = channel.publish
+        if frame_type == FRAME_HEADER:
+            if publish[3] is not None:
+                raise AMQPError(UNEXPECTED_FRAME, "UNEXPECTED_FRAME - "
+                                "expected content body", connection=True)
+            decoder = _Decoder(payload)
+            decoder.short()
+            decoder.short()
+            publish[4] = decoder.longlong()
+            publish[3] = payload[decoder.offset:]
+        else:
+            if publish[3] is None:
+                raise AMQPError(UNEXPECTED_FRAME, "UNEXPECTED_FRAME - "
+                                "expected content header", connection=True)
+            publish[5].append(payload)
+        if publish[3] is not None and \
+                sum(len(chunk) for chunk in publish[5]) >= publish[4]:
+            channel.publish = None
+            try:
+                self._publish(channel, *publish[:4], b"".join(publish[5]))
+            except AMQPError as e:
+                e.class_id, e.method_id = 60, 40
+                raise
+
+    def _publish(self, channel: _Channel, exchange_name: str,
+                 routing_key: str, mandatory: bool, properties: bytes,
+                 body: bytes):
+        exchange = self._get_exchange(exchange_name)
+        reply_to = _find_reply_to(properties)
+        if reply_to and properties[reply_to[0] + 1:reply_to[1]] == \
+                DIRECT_REPLY_TO.encode("utf-8"):
+            if not channel.reply_queue:
+                raise AMQPError(PRECONDITION_FAILED, "PRECONDITION_FAILED - "
+                                "fast reply consumer does not exist")
+            properties = properties[:reply_to[0]] + \
+                _shortstr(channel.reply_queue.name) + \
+                properties[reply_to[1]:]
+        if exchange.name:
+            queues = exchange.route(routing_key)
+        else:
+            queue = self.vhost.queues.get(routing_key) or \
+                self.server._reply_queues.get(routing_key)
+            queues = [queue] if queue else list()
+        if not queues and mandatory:
+            self.send(_method_frame(channel.number, 60, 50,
+                                    _short(NO_ROUTE) +
+                                    _shortstr("NO_ROUTE") +
+                                    _shortstr(exchange_name) +
+                                    _shortstr(routing_key)) +
+                      self.content_frames(channel.number, _Message(
+                          exchange_name, routing_key, properties, body)))
+        for queue in queues:
+            queue.messages.append(_Message(exchange_name, routing_key,
+                                           properties, body))
+            self.server._dispatch(queue)
+        if channel.confirm:
+            self.send_method(channel.number, 60, 80,
+                             _longlong(next(channel.publish_tags)) +
+                             _bits(False))
+
+    def _get_exchange(self, name: str) -> _Exchange:
+        exchange = self.vhost.exchanges.get(name)
+        if not exchange:
+            raise AMQPError(NOT_FOUND, f"NOT_FOUND - no exchange '{name}' in "
+                                       f"vhost '{self.vhost.name}'")
+        return exchange
+
+    def _get_queue(self, channel: _Channel, name: str) -> _Queue:
+        name = name or channel.last_queue
+        queue = self.vhost.queues.get(name)
+        if not queue:
+            raise AMQPError(NOT_FOUND, f"NOT_FOUND - no queue '{name}' in "
+                                       f"vhost '{self.vhost.name}'")
+        self._check_exclusive(queue)
+        return queue
+
+    def _check_exclusive(self, queue: _Queue):
+        if queue.exclusive_owner not in (None, self):
+            raise AMQPError(RESOURCE_LOCKED, f"RESOURCE_LOCKED - cannot "
+                            f"obtain exclusive access to locked queue "
+                            f"'{queue.name}' in vhost '{self.vhost.name}'")
+
+    async def _send_heartbeats(self, interval: int):
+        while not self.closed:
+            await asyncio.sleep(interval / 2)
+            self.send(_frame(FRAME_HEARTBEAT, 0, b""))
+
+    # Connection methods
+    def _connection_start_ok(self, _, args: _Decoder):
+        args.table()
+        mechanism = args.shortstr()
+        response = args.longstr()
+        username = password = None
+        if mechanism == "PLAIN":
+            parts = response.split(b"\x00")
+            if len(parts) == 3:
+                username, password = (part.decode("utf-8", errors="replace")
+                                      for part in parts[1:])
+        elif mechanism == "AMQPLAIN":
+            credentials = _decode_fields(response)
+            username = credentials.get("LOGIN", b"").decode("utf-8")
+            password = credentials.get("PASSWORD", b"").decode("utf-8")
+        else:
+            raise AMQPError(ACCESS_REFUSED, f"ACCESS_REFUSED - unsupported "
+                            f"mechanism {mechanism}", connection=True)
+        password_hash = self.server._users.get(username)
+        if password_hash is None or \
+                not check_password(password_hash, password):
+            raise AMQPError(ACCESS_REFUSED, f"ACCESS_REFUSED - Login was "
+                            f"refused using authentication mechanism "
+                            f"{mechanism}", connection=True)
+        self.user = username
+        self.send_method(0, 10, 30, _short(CHANNEL_MAX) + _long(FRAME_MAX) +
+                         _short(0))
+
+    def _connection_tune_ok(self, _, args: _Decoder):
+        self.channel_max = args.short() or CHANNEL_MAX
+        self.frame_max = min(args.long() or FRAME_MAX, FRAME_MAX)
+        heartbeat = args.short()
+        if heartbeat:
+            self._heartbeat_task = asyncio.ensure_future(
+                self._send_heartbeats(heartbeat))
+
+    def _connection_open(self, _, args: _Decoder):
+        name = args.shortstr()
+        if not self.user:
+            raise AMQPError(COMMAND_INVALID, "COMMAND_INVALID - connection "
+                            "is not authenticated", connection=True)
+        vhost = self.server._vhosts.get(name)
+        if not vhost or name not in self.server._permissions.get(self.user,
+                                                                  set()):
+            raise AMQPError(NOT_ALLOWED, f"NOT_ALLOWED - access to vhost "
+                            f"'{name}' refused for user '{self.user}'",
+                            connection=True)
+        self.vhost = vhost
+        self.send_method(0, 10, 41, _shortstr(""))
+
+    def _connection_close(self, *_):
+        self.send_method(0, 10, 51)
+        self.closed = True
+
+    # Channel methods
+    def _channel_open(self, number: int, _):
+        if not isinstance(number, int) or number > self.channel_max:
+            raise AMQPError(CHANNEL_ERROR, "CHANNEL_ERROR - channel is "
+                            "already open or out of range", connection=True)
+        self.channels[number] = _Channel(self, number)
+        self.send_method(number, 20, 11, _longstr(b""))
+
+    def _channel_flow(self, channel: _Channel, args: _Decoder):
+        channel.active = args.bits(1)[0]
+        self.send_method(channel.number, 20, 21, _bits(channel.active))
+        for consumer in list(channel.consumers.values()):
+            self.server._dispatch(consumer.queue)
+
+    def _channel_close(self, channel: _Channel, _):
+        self._release_channel(channel)
+        self.channels.pop(channel.number)
+        self.send_method(channel.number, 20, 41)
+
+    # Exchange methods
+    def _exchange_declare(self, channel: _Channel, args: _Decoder):
+        args.short()
+        name = args.shortstr()
+        kind = args.shortstr()
+        passive, durable, auto_delete, internal, no_wait = args.bits(5)
+        args.table()
+        exchange = self.vhost.exchanges.get(name)
+        if passive:
+            self._get_exchange(name)
+        elif exchange is None:
+            if name.startswith("amq."):
+                raise AMQPError(ACCESS_REFUSED, f"ACCESS_REFUSED - exchange "
+                                f"name '{name}' contains reserved prefix "
+                                f"'amq.*'")
+            if kind not in EXCHANGE_TYPES:
+                raise AMQPError(COMMAND_INVALID, f"COMMAND_INVALID - "
+                                f"unsupported exchange type '{kind}'",
+                                connection=True)
+            self.vhost.exchanges[name] = _Exchange(name, kind, durable,
+                                                   auto_delete, internal)
+        elif exchange.kind != kind:
+            raise AMQPError(PRECONDITION_FAILED, f"PRECONDITION_FAILED - "
+                            f"inequivalent arg 'type' for exchange '{name}' "
+                            f"in vhost '{self.vhost.name}': received "
+                            f"'{kind}' but current is '{exchange.kind}'")
+        if not no_wait:
+            self.send_method(channel.number, 40, 11)
+
+    def _exchange_delete(self, channel: _Channel, args: _Decoder):
+        args.short()
+        name = args.shortstr()
+        if_unused, no_wait = args.bits(2)
+        exchange = self.vhost.exchanges.get(name)
+        if not name or name.startswith("amq."):
+            raise AMQPError(ACCESS_REFUSED, f"ACCESS_REFUSED - operation "
+                            f"not permitted on exchange '{name}'")
+        if exchange:
+            if if_unused and exchange.bindings:
+                raise AMQPError(PRECONDITION_FAILED, f"PRECONDITION_FAILED - "
+                                f"exchange '{name}' in use")
+            self.vhost.exchanges.pop(name)
+        if not no_wait:
+            self.send_method(channel.number, 40, 21)
+
+    # Queue methods
+    def _queue_declare(self, channel: _Channel, args: _Decoder):
+        args.short()
+        name = args.shortstr()
+        passive, durable, exclusive, auto_delete, no_wait = args.bits(5)
+        args.table()
+        if passive:
+            queue = self._get_queue(channel, name)
+        else:
+            if not name:
+                name = _random_name("amq.gen-")
+            elif name.startswith("amq.") and name not in self.vhost.queues:
+                raise AMQPError(ACCESS_REFUSED, f"ACCESS_REFUSED - queue name "
+                                f"'{name}' contains reserved prefix 'amq.*'")
+            queue = self.vhost.queues.get(name)
+            if queue:
+                self._check_exclusive(queue)
+                if queue.durable != durable:
+                    raise AMQPError(PRECONDITION_FAILED, f"PRECONDITION_FAILED "
+                                    f"- inequivalent arg 'durable' for queue "
+                                    f"'{name}' in vhost '{self.vhost.name}'")
+            else:
+                queue = _Queue(name, self.vhost, durable,
+                               self if exclusive else None, auto_delete)
+                self.vhost.queues[name] = queue
+                if exclusive:
+                    self.exclusive_queues.add(queue)
+        channel.last_queue = queue.name
+        if not no_wait:
+            self.send_method(channel.number, 50, 11,
+                             _shortstr(queue.name) +
+                             _long(len(queue.messages)) +
+                             _long(len(queue.consumers)))
+
+    def _get_binding(self, channel: _Channel, args: _Decoder) -> \
+            Tuple[_Queue, _Exchange, str]:
+        args.short()
+        queue = self._get_queue(channel, args.shortstr())
+        exchange = self._get_exchange(args.shortstr())
+        if not exchange.name:
+            raise AMQPError(ACCESS_REFUSED, "ACCESS_REFUSED - operation not "
+                                            "permitted on the default "
+                                            "exchange")
+        return queue, exchange, args.shortstr()
+
+    def _queue_bind(self, channel: _Channel, args: _Decoder):
+        queue, exchange, routing_key = self._get_binding(channel, args)
+        no_wait = args.bits(1)[0]
+        args.table()
+        exchange.bind(routing_key, queue)
+        if not no_wait:
+            self.send_method(channel.number, 50, 21)
+
+    def _queue_unbind(self, channel: _Channel, args: _Decoder):
+        queue, exchange, routing_key = self._get_binding(channel, args)
+        args.table()
+        exchange.unbind(routing_key, queue)
+        self.server._check_auto_delete_exchange(self.vhost, exchange)
+        self.send_method(channel.number, 50, 51)
+
+    def _queue_purge(self, channel: _Channel, args: _Decoder):
+        args.short()
+        queue = self._get_queue(channel, args.shortstr())
+        no_wait = args.bits(1)[0]
+        purged = len(queue.messages)
+        queue.messages.clear()
+        if not no_wait:
+            self.send_method(channel.number, 50, 31, _long(purged))
+
+    def _queue_delete(self, channel: _Channel, args: _Decoder):
+        args.short()
+        name = args.shortstr() or channel.last_queue
+        if_unused, if_empty, no_wait = args.bits(3)
+        queue = self.vhost.queues.get(name)
+        purged = 0
+        if queue:
+            self._check_exclusive(queue)
+            if if_unused and queue.consumers:
+                raise AMQPError(PRECONDITION_FAILED, f"PRECONDITION_FAILED - "
+                                f"queue '{name}' in vhost "
+                                f"'{self.vhost.name}' in use")
+            if if_empty and queue.messages:
+                raise AMQPError(PRECONDITION_FAILED, f"PRECONDITION_FAILED - "
+                                f"queue '{name}' in vhost "
+                                f"'{self.vhost.name}' is not empty")
+            purged = len(queue.messages)
+            self.server._delete_queue(queue)
+        if not no_wait:
+            self.send_method(channel.number, 50, 41, _long(purged))
+
+    # Basic methods
+    def _basic_qos(self, channel: _Channel, args: _Decoder):
+        args.long()
+        prefetch_count = args.short()
+        if args.bits(1)[0]:
+            channel.global_prefetch_count = prefetch_count
+        else:
+            channel.prefetch_count = prefetch_count
+        self.send_method(channel.number, 60, 11)
+        for consumer in list(channel.consumers.values()):
+            self.server._dispatch(consumer.queue)
+
+    def _basic_consume(self, channel: _Channel, args: _Decoder):
+        args.short()
+        name = args.shortstr()
+        tag = args.shortstr() or _random_name("amq.ctag-")
+        _, no_ack, exclusive, no_wait = args.bits(4)
+        args.table()
+        if tag in channel.consumers:
+            raise AMQPError(NOT_ALLOWED, f"NOT_ALLOWED - attempt to reuse "
+                            f"consumer tag '{tag}'", connection=True)
+        if name == DIRECT_REPLY_TO:
+            if not no_ack:
+                raise AMQPError(PRECONDITION_FAILED, "PRECONDITION_FAILED - "
+                                "reply consumer cannot acknowledge")
+            if channel.reply_queue:
+                raise AMQPError(PRECONDITION_FAILED, "PRECONDITION_FAILED - "
+                                "reply consumer already set")
+            queue = _Queue(_random_name(f"{DIRECT_REPLY_TO}."), self.vhost,
+                           exclusive_owner=self)
+            self.server._reply_queues[queue.name] = queue
+            channel.reply_queue = queue
+        else:
+            queue = self._get_queue(channel, name)
+        if queue.consumers and (exclusive or any(
+                consumer.exclusive for consumer in queue.consumers)):
+            raise AMQPError(ACCESS_REFUSED, f"ACCESS_REFUSED - queue "
+                            f"'{queue.name}' in vhost '{self.vhost.name}' in "
+                            f"exclusive use")
+        consumer = _Consumer(tag, channel, queue, no_ack, exclusive)
+        queue.consumers.append(consumer)
+        queue.had_consumers = True
+        channel.consumers[tag] = consumer
+        if not no_wait:
+            self.send_method(channel.number, 60, 21, _shortstr(tag))
+        self.server._dispatch(queue)
+
+    def _basic_cancel(self, channel: _Channel, args: _Decoder):
+        tag = args.shortstr()
+        no_wait = args.bits(1)[0]
+        consumer = channel.consumers.pop(tag, None)
+        if consumer:
+            self.server._remove_consumer(consumer)
+        if not no_wait:
+            self.send_method(channel.number, 60, 31, _shortstr(tag))
+
+    def _basic_publish(self, channel: _Channel, args: _Decoder):
+        args.short()
+        exchange = args.shortstr()
+        routing_key = args.shortstr()
+        mandatory, immediate = args.bits(2)
+        if immediate:
+            raise AMQPError(NOT_IMPLEMENTED, "NOT_IMPLEMENTED - immediate=true",
+                            connection=True)
+        channel.publish = [exchange, routing_key, mandatory, None, 0, list()]
+
+    def _basic_get(self, channel: _Channel, args: _Decoder):
+        args.short()
+        queue = self._get_queue(channel, args.shortstr())
+        no_ack = args.bits(1)[0]
+        if not queue.messages:
+            self.send_method(channel.number, 60, 72, _shortstr(""))
+            return
+        message = queue.messages.popleft()
+        tag = next(channel.delivery_tags)
+        if not no_ack:
+            channel.unacked[tag] = (queue, message, None)
+        self.send(_method_frame(channel.number, 60, 71,
+                                _longlong(tag) + _bits(message.redelivered) +
+                                _shortstr(message.exchange) +
+                                _shortstr(message.routing_key) +
+                                _long(len(queue.messages))) +
+                  self.content_frames(channel.number, message))
+
+    def _settle(self, channel: _Channel, tag: int, multiple: bool,
+                requeue: bool):
+        if multiple:
+            tags = [unacked for unacked in channel.unacked
+                    if tag == 0 or unacked <= tag]
+        elif tag in channel.unacked:
+            tags = [tag]
+        else:
+            raise AMQPError(PRECONDITION_FAILED, f"PRECONDITION_FAILED - "
+                            f"unknown delivery tag {tag}")
+        self._requeue(channel, tags, requeue)
+
+    def _basic_ack(self, channel: _Channel, args: _Decoder):
+        tag = args.longlong()
+        self._settle(channel, tag, args.bits(1)[0], False)
+
+    def _basic_reject(self, channel: _Channel, args: _Decoder):
+        tag = args.longlong()
+        self._settle(channel, tag, False, args.bits(1)[0])
+
+    def _basic_nack(self, channel: _Channel, args: _Decoder):
+        tag = args.longlong()
+        self._settle(channel, tag, *args.bits(2))
+
+    def _basic_recover(self, channel: _Channel, args: _Decoder):
+        self._requeue(channel, list(channel.unacked))
+        self.send_method(channel.number, 60, 111)
+
+    def _confirm_select(self, channel: _Channel, args: _Decoder):
+        channel.confirm = True
+        if not args.bits(1)[0]:
+            self.send_method(channel.number, 85, 11)
+
+
+_METHODS: Dict[Tuple[int, int], Callable] = {
+    (10, 11): _Connection._connection_start_ok,
+    (10, 31): _Connection._connection_tune_ok,
+    (10, 40): _Connection._connection_open,
+    (10, 50): _Connection._connection_close,
+    (20, 10): _Connection._channel_open,
+    (20, 20): _Connection._channel_flow,
+    (20, 40): _Connection._channel_close,
+    (40, 10): _Connection._exchange_declare,
+    (40, 20): _Connection._exchange_delete,
+    (50, 10): _Connection._queue_declare,
+    (50, 20): _Connection._queue_bind,
+    (50, 30): _Connection._queue_purge,
+    (50, 40): _Connection._queue_delete,
+    (50, 50): _Connection._queue_unbind,
+    (60, 10): _Connection._basic_qos,
+    (60, 20): _Connection._basic_consume,
+    (60, 30): _Connection._basic_cancel,
+    (60, 40): _Connection._basic_publish,
+    (60, 70): _Connection._basic_get,
+    (60, 80): _Connection._basic_ack,
+    (60, 90): _Connection._basic_reject,
+    (60, 110): _Connection._basic_recover,
+    (60, 120): _Connection._basic_nack,
+    (85, 10): _Connection._confirm_select,
+}
+
+
+class LocalAMQPServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Minimal in-memory AMQP 0-9-1 server for testing clients without a
+        RabbitMQ broker. Supports users (PLAIN/AMQPLAIN auth), vhosts,
+        direct/fanout/topic exchanges, queues (exclusive/auto-delete),
+        consumers with prefetch, ack/nack/reject, basic.get, publisher
+        confirms, mandatory returns, and direct reply-to.
+
+        Messages are not persisted, and exchange-to-exchange bindings,
+        headers exchanges, transactions, and queue arguments (TTL, length
+        limits, dead-lettering) are not supported. Permissions are granted per
+        vhost; configure/write/read patterns are not enforced.
+        @param host: host to accept connections on
+        @param port: port to accept connections on (default any available)
+        """
+        self.host = host
+        self.port = port
+        self._users: Dict[str, str] = dict()
+        self._permissions: Dict[str, Set[str]] = dict()
+        self._vhosts: Dict[str, _VHost] = {"/": _VHost("/")}
+        self._reply_queues: Dict[str, _Queue] = dict()
+        self._connections: Set[_Connection] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def running(self) -> bool:
+        return self._server is not None
+
+    def start(self):
+        """
+        Start accepting connections in a background thread.
+        """
+        if self.running():
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._on_connect, self.host, self.port),
+            self._loop).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        LOG.debug(f"Started local AMQP server on {self.host}:{self.port}")
+
+    def stop(self):
+        """
+        Close all connections and stop the server.
+        """
+        if not self.running():
+            return
+
+        async def _stop():
+            self._server.close()
+            for connection in list(self._connections):
+                connection.close(CONNECTION_FORCED,
+                                 "CONNECTION_FORCED - broker shutdown")
+                connection.writer.close()
+            if self._tasks:
+                await asyncio.wait(self._tasks, timeout=5)
+            await self._server.wait_closed()
+        asyncio.run_coroutine_threadsafe(_stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._server = None
+        self._loop = None
+
+    async def _on_connect(self, reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter):
+        connection = _Connection(self, reader, writer)
+        self._connections.add(connection)
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            await connection.run()
+        finally:
+            self._tasks.discard(task)
+
+    def _call(self, func: Callable, *args):
+        """
+        Call `func` on the server thread so that it does not race with
+        connections.
+        """
+        if not self.running():
+            return func(*args)
+
+        async def _run():
+            return func(*args)
+        return asyncio.run_coroutine_threadsafe(_run(), self._loop).result()
+
+    def add_user(self, username: str, password: Optional[str] = None,
+                 password_hash: Optional[str] = None):
+        """
+        Add or update a user.
+        @param username: user to add
+        @param password: password for the user
+        @param password_hash: RabbitMQ sha256 hash of the password, used
+            instead of `password`
+        """
+        if password_hash is None:
+            if password is None:
+                raise ValueError("Either `password` or `password_hash` is "
+                                 "required")
+            password_hash = hash_password(password)
+        self._call(self._users.__setitem__, username, password_hash)
+
+    def delete_user(self, username: str):
+        """
+        Delete a user and close its connections.
+        @param username: user to delete
+        """
+        def _delete():
+            if self._users.pop(username, None) is None:
+                raise ValueError(f"No such user: {username}")
+            self._permissions.pop(username, None)
+            for connection in list(self._connections):
+                if connection.user == username:
+                    connection.close(CONNECTION_FORCED, "CONNECTION_FORCED - "
+                                     "user deleted")
+        self._call(_delete)
+
+    def add_vhost(self, vhost: str):
+        """
+        Add a vhost if it does not exist.
+        @param vhost: vhost to add
+        """
+        self._call(self._vhosts.setdefault, vhost, _VHost(vhost))
+
+    def delete_vhost(self, vhost: str):
+        """
+        Delete a vhost, including its exchanges and queues, and close its
+        connections.
+        @param vhost: vhost to delete
+        """
+        def _delete():
+            if self._vhosts.pop(vhost, None) is None:
+                raise ValueError(f"No such vhost: {vhost}")
+            for connection in list(self._connections):
+                if connection.vhost and connection.vhost.name == vhost:
+                    connection.close(CONNECTION_FORCED, "CONNECTION_FORCED - "
+                                     "vhost deleted")
+            for permissions in self._permissions.values():
+                permissions.discard(vhost)
+        self._call(_delete)
+
+    def set_permissions(self, username: str, vhost: str):
+        """
+        Grant a user full access to a vhost.
+        @param username: user to grant access to
+        @param vhost: vhost to grant access to
+        """
+        def _set():
+            if username not in self._users or vhost not in self._vhosts:
+                raise ValueError(f"No such user or vhost: {username} {vhost}")
+            self._permissions.setdefault(username, set()).add(vhost)
+        self._call(_set)
+
+    def import_definitions(self, definitions: dict):
+        """
+        Create objects from RabbitMQ definitions (as exported by RabbitMQ).
+        Users, vhosts, permissions, exchanges, queues, and bindings to queues
+        are supported.
+        @param definitions: dict definitions to import
+        """
+        for vhost in definitions.get("vhosts", list()):
+            self.add_vhost(vhost["name"])
+        for user in definitions.get("users", list()):
+            algorithm = user.get("hashing_algorithm",
+                                 "rabbit_password_hashing_sha256")
+            if "password_hash" in user and \
+                    algorithm != "rabbit_password_hashing_sha256":
+                raise ValueError(f"Unsupported hashing algorithm: "
+                                 f"{algorithm}")
+            self.add_user(user["name"], user.get("password"),
+                          user.get("password_hash"))
+        for permission in definitions.get("permissions", list()):
+            self.set_permissions(permission["user"], permission["vhost"])
+        self._call(self._import_objects, definitions)
+
+    def delete_definitions(self, definitions: dict):
+        """
+        Delete vhosts (including their exchanges and queues) and users in
+        definitions. Objects that do not exist are ignored.
+        @param definitions: dict definitions (as imported)
+        """
+        for vhost in definitions.get("vhosts", list()):
+            if vhost["name"] in self._vhosts:
+                self.delete_vhost(vhost["name"])
+        for user in definitions.get("users", list()):
+            if user["name"] in self._users:
+                self.delete_user(user["name"])
+
+    def _import_objects(self, definitions: dict):
+        for exchange in definitions.get("exchanges", list()):
+            if exchange.get("type", "direct") not in EXCHANGE_TYPES:
+                raise ValueError(f"Unsupported exchange type: "
+                                 f"{exchange['type']}")
+            self._vhosts[exchange.get("vhost", "/")].exchanges.setdefault(
+                exchange["name"], _Exchange(
+                    exchange["name"], exchange.get("type", "direct"),
+                    exchange.get("durable", True),
+                    exchange.get("auto_delete", False),
+                    exchange.get("internal", False)))
+        for queue in definitions.get("queues", list()):
+            vhost = self._vhosts[queue.get("vhost", "/")]
+            vhost.queues.setdefault(queue["name"], _Queue(
+                queue["name"], vhost, queue.get("durable", True),
+                auto_delete=queue.get("auto_delete", False)))
+        for binding in definitions.get("bindings", list()):
+            if binding.get("destination_type", "queue") != "queue":
+                raise ValueError("Exchange to exchange bindings are not "
+                                 "supported")
+            vhost = self._vhosts[binding.get("vhost", "/")]
+            vhost.exchanges[binding["source"]].bind(
+                binding.get("routing_key", ""),
+                vhost.queues[binding["destination"]])
+
+    def rabbitctl_output(self, *args: str) -> str:
+        """
+        Run a subset of `rabbitmqctl` commands against this server, so that
+        it can be used in place of a `RabbitMqExecutor`. Supported commands are
+        `add_user`, `delete_user`, `add_vhost`, `delete_vhost`,
+        `set_permissions` (`-p` vhost), and `import_definitions`.
+        @returns: empty string output
+        """
+        command, args = args[0], list(args[1:])
+        if command == "add_user":
+            self.add_user(*args[:2])
+        elif command == "delete_user":
+            self.delete_user(args[0])
+        elif command == "add_vhost":
+            self.add_vhost(args[0])
+        elif command == "delete_vhost":
+            self.delete_vhost(args[0])
+        elif command == "set_permissions":
+            vhost = "/"
+            if "-p" in args:
+                vhost = args.pop(args.index("-p") + 1)
+                args.remove("-p")
+            self.set_permissions(args[0], vhost)
+        elif command == "import_definitions":
+            with open(args[0]) as f:
+                self.import_definitions(json.load(f))
+        else:
+            raise NotImplementedError(f"Unsupported command: {command}")
+        return ""
+
+    def list_queues(self, vhost: str = "/") -> Dict[str, int]:
+        """
+        Get the number of ready messages in each queue in a vhost.
+        @param vhost: vhost to list queues in
+        @returns: dict of queue name to message count
+        """
+        return self._call(lambda: {name: len(queue.messages) for name, queue
+                                   in self._vhosts[vhost].queues.items()})
+
+    def list_exchanges(self, vhost: str = "/") -> List[str]:
+        """
+        Get the names of exchanges in a vhost.
+        @param vhost: vhost to list exchanges in
+        @returns: list of exchange names
+        """
+        return self._call(lambda: list(self._vhosts[vhost].exchanges))
+
+    # Broker operations; only called on the server thread
+    def _dispatch(self, queue: _Queue):
+        """
+        Deliver ready messages in a queue to consumers, round-robin, within
+        their prefetch limits.
+        """
+        while queue.messages and queue.consumers:
+            for _ in range(len(queue.consumers)):
+                consumer = queue.consumers[0]
+                queue.consumers.rotate(-1)
+                if consumer.channel.can_deliver(consumer):
+                    break
+            else:
+                return
+            consumer.channel.connection.deliver(consumer, queue,
+                                                queue.messages.popleft())
+
+    def _remove_consumer(self, consumer: _Consumer):
+        queue = consumer.queue
+        if consumer in queue.consumers:
+            queue.consumers.remove(consumer)
+        if consumer.channel.reply_queue is queue:
+            consumer.channel.reply_queue = None
+            self._reply_queues.pop(queue.name, None)
+            queue.deleted = True
+        elif queue.auto_delete and queue.had_consumers and \
+                not queue.consumers:
+            self._delete_queue(queue)
+
+    def _delete_queue(self, queue: _Queue):
+        if queue.deleted:
+            return
+        queue.deleted = True
+        vhost = queue.vhost
+        if vhost.queues.get(queue.name) is queue:
+            vhost.queues.pop(queue.name)
+        if queue.exclusive_owner:
+            queue.exclusive_owner.exclusive_queues.discard(queue)
+        for exchange in list(vhost.exchanges.values()):
+            if any(queue.name in queues
+                   for queues in exchange.bindings.values()):
+                exchange.unbind_queue(queue)
+                self._check_auto_delete_exchange(vhost, exchange)
+        while queue.consumers:
+            consumer = queue.consumers.popleft()
+            channel = consumer.channel
+            channel.consumers.pop(consumer.tag, None)
+            if not channel.closing:
+                channel.connection.send_method(channel.number, 60, 30,
+                                               _shortstr(consumer.tag) +
+                                               _bits(True))
+        queue.messages.clear()
+
+    @staticmethod
+    def _check_auto_delete_exchange(vhost: _VHost, exchange: _Exchange):
+        if exchange.auto_delete and not exchange.bindings:
+            vhost.exchanges.pop(exchange.name, None)
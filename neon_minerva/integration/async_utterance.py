@@ -0,0 +1,514 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import shutil
+
+from dataclasses import dataclass, field
+from os.path import join
+from tempfile import mkdtemp
+from time import time
+from typing import Callable, Dict, List, Optional, Sequence, Union
+from uuid import uuid4
+
+from neon_utils.file_utils import encode_file_to_base64_string
+from ovos_utils.log import LOG
+from ovos_bus_client.client import MessageBusClient
+from ovos_bus_client.conf import load_message_bus_config
+from ovos_bus_client.message import Message
+from ovos_plugin_manager.tts import TTS
+
+from neon_minerva.clock import Clock
+from neon_minerva.integration.prompts import Prompt
+from neon_minerva.integration.trace import ResultRecorder
+from neon_minerva.integration.user_utterance import HANDLED_EVENTS, \
+    AudioCache, UtteranceTestBase, get_failure_reason, get_load_summary, \
+    get_prompt_failure, get_test_summary
+from neon_minerva.stats import DEFAULT_PERCENTILES
+
+
+class AsyncBusClient:
+    def __init__(self, host: str = None, port: int = None,
+                 route: str = None, ssl: bool = None):
+        """
+        Minimal asyncio MessageBus client. Handlers are called in the event
+        loop as messages are received. Unspecified connection parameters are
+        read from configuration as in `MessageBusClient`.
+        @param host: MessageBus host
+        @param port: MessageBus port
+        @param route: MessageBus route
+        @param ssl: if True, connect with `wss`
+        """
+        config = load_message_bus_config(host=host, port=port, route=route,
+                                         ssl=ssl)
+        self.url = MessageBusClient.build_url(config.host, config.port,
+                                              config.route, config.ssl)
+        self._handlers: Dict[str, List[Callable[[Message], None]]] = dict()
+        self._ws = None
+        self._reader = None
+
+    def on(self, msg_type: str, handler: Callable[[Message], None]):
+        """
+        Register a handler for a message type.
+        @param msg_type: message type to handle
+        @param handler: function called with each received Message
+        """
+        self._handlers.setdefault(msg_type, list()).append(handler)
+
+    async def connect(self):
+        import websockets
+        self._ws = await websockets.connect(self.url, max_size=None)
+        self._reader = asyncio.create_task(self._read_messages())
+
+    async def close(self):
+        if self._reader:
+            self._reader.cancel()
+        if self._ws:
+            await self._ws.close()
+        self._ws = None
+        self._reader = None
+
+    async def emit(self, message: Message):
+        """
+        Send a message to the MessageBus.
+        @param message: Message to send
+        """
+        await self._ws.send(message.serialize())
+
+    async def _read_messages(self):
+        async for raw in self._ws:
+            try:
+                message = Message.deserialize(raw)
+            except Exception as e:
+                LOG.error(f"Invalid message: {e}")
+                continue
+            for handler in self._handlers.get(message.msg_type, []):
+                try:
+                    handler(message)
+                except Exception as e:
+                    LOG.exception(e)
+
+
+@dataclass
+class AsyncPendingPrompt:
+    prompt: Prompt
+    prompt_id: str
+    scheduled: float
+    handled: asyncio.Future
+    audio_done: asyncio.Future
+    error: Optional[str] = field(default=None)
+
+
+class SyncBusAdapter:
+    def __init__(self, bus):
+        """
+        Adapt a synchronous bus (i.e. a `MockBus` or connected
+        `MessageBusClient`) to the `AsyncBusClient` interface. Handlers are
+        called in the event loop, regardless of the thread the bus received
+        a message on.
+        @param bus: bus with `on` and `emit` methods
+        """
+        self.bus = bus
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def on(self, msg_type: str, handler: Callable[[Message], None]):
+        """
+        Register a handler for a message type.
+        @param msg_type: message type to handle
+        @param handler: function called in the event loop with each Message
+        """
+        def _call(message: Message):
+            try:
+                handler(message)
+            except Exception as e:
+                LOG.exception(e)
+
+        def _dispatch(message: Message):
+            loop = self._loop
+            if not loop:
+                return
+            try:
+                loop.call_soon_threadsafe(_call, message)
+            except RuntimeError:
+                # Loop closed after the test finished
+                pass
+        self.bus.on(msg_type, _dispatch)
+
+    async def connect(self):
+        self._loop = asyncio.get_running_loop()
+
+    async def close(self):
+        self._loop = None
+
+    async def emit(self, message: Message):
+        """
+        Send a message to the bus.
+        @param message: Message to send
+        """
+        self.bus.emit(message)
+
+
+class AsyncUtteranceTests(UtteranceTestBase):
+    def __init__(self, prompts: List[Union[str, Prompt]], lang: str = "en-us",
+                 bus_config: dict = None, user_config: dict = None,
+                 audio: bool = False, tts: TTS = None,
+                 gender: str = "female", audio_cache: AudioCache = None,
+                 stt_timeout: float = 60, intent_timeout: float = 60,
+                 speak_timeout: float = 60,
+                 percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                 histogram_bounds: Optional[Sequence[float]] = None,
+                 timeout_factor: Optional[float] = None, repeat: int = 1,
+                 warmup: int = 0, warmup_duration: float = 0,
+                 recorders: Optional[Sequence[ResultRecorder]] = None,
+                 bus=None, clock: Clock = None):
+        """
+        Asyncio implementation of `UtteranceTests`. Each prompt is correlated
+        with its responses by a `minerva_prompt_id` context value, so many
+        prompts may be in flight on a single bus connection. See
+        `UtteranceTests` for arguments.
+        @param bus_config: MessageBus `host`, `port`, `route`, and `ssl`
+        @param bus: optional synchronous bus to use instead of connecting to
+            `bus_config` (i.e. a `MockBus` with a `MockCore`)
+        @param clock: Clock to use for timeouts (default wall clock)
+        """
+        UtteranceTestBase.__init__(self, prompts, lang, user_config, audio,
+                                   tts, gender, audio_cache, stt_timeout,
+                                   intent_timeout, speak_timeout, percentiles,
+                                   histogram_bounds, timeout_factor, repeat,
+                                   warmup, warmup_duration, recorders, clock)
+        self.core_bus = SyncBusAdapter(bus) if bus else \
+            AsyncBusClient(**(bus_config or dict()))
+        self._pending: Dict[str, AsyncPendingPrompt] = dict()
+        self._responses: Dict[str, asyncio.Future] = dict()
+        self.register_bus_events()
+
+    def run_test(self) -> dict:
+        """
+        Run tests and return dict timing results
+        """
+        return asyncio.run(self._connected(self.run_test_async()))
+
+    def run_soak_test(self, duration: float) -> dict:
+        """
+        Run a soak test and return dict timing results.
+        See `run_soak_test_async` for arguments.
+        """
+        return asyncio.run(self._connected(self.run_soak_test_async(duration)))
+
+    def run_load_test(self, *args, **kwargs) -> dict:
+        """
+        Run a load test and return dict results.
+        See `run_load_test_async` for arguments.
+        """
+        return asyncio.run(self._connected(
+            self.run_load_test_async(*args, **kwargs)))
+
+    async def _connected(self, coro):
+        await self.core_bus.connect()
+        try:
+            return await coro
+        finally:
+            await self.core_bus.close()
+
+    async def run_test_async(self) -> dict:
+        """
+        Send each prompt in sequence and return dict timing results.
+        Requires a connected `core_bus`.
+        """
+        await self._run_warmup("minerva")
+        self._results = self._start_measurement()
+        for prompt in self.test_prompts:
+            self._results.add(await self.handle_prompt(
+                prompt, "minerva", time()))
+        return get_test_summary(self._results, self._cold_results)
+
+    async def run_soak_test_async(self, duration: float) -> dict:
+        """
+        Send prompts in sequence, cycling through test prompts, for a
+        duration and return dict timing results. Requires a connected
+        `core_bus`.
+        @param duration: seconds to send prompts for (after warmup)
+        """
+        if duration <= 0:
+            raise ValueError(f"Invalid duration: {duration}")
+        await self._run_warmup("minerva")
+        self._results = self._start_measurement()
+        for prompt in self._get_soak_prompts(duration):
+            self._results.add(await self.handle_prompt(
+                prompt, "minerva", time()))
+        return get_test_summary(self._results, self._cold_results)
+
+    async def _run_warmup(self, username: str):
+        """
+        Send warmup prompts and record results as cold samples.
+        @param username: username to send warmup prompts as
+        """
+        self._cold_results = self._get_aggregator("cold")
+        for prompt in self._get_warmup_prompts():
+            self._cold_results.add(await self.handle_prompt(
+                prompt, username, time()))
+
+    async def run_load_test_async(self, rate: float, concurrency: int = 1,
+                                  arrival: str = "poisson",
+                                  count: Optional[int] = None,
+                                  duration: Optional[float] = None,
+                                  seed: Optional[int] = None) -> dict:
+        """
+        Send prompts open-loop at a target arrival rate and return dict load
+        test results. Requires a connected `core_bus`.
+        See `UtteranceTests.run_load_test` for arguments.
+        """
+        self._check_load_args(rate, arrival)
+        await self._run_warmup("minerva-0")
+        aggregator = self._results = self._start_measurement()
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        async def _run_prompt(prompt: Prompt, username: str,
+                              scheduled: float):
+            async with semaphore:
+                aggregator.add(await self.handle_prompt(prompt, username,
+                                                        scheduled))
+
+        start = time()
+        for prompt, username, scheduled in self._get_load_schedule(
+                rate, concurrency, arrival, count, duration, seed, start):
+            delay = scheduled - time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(_run_prompt(prompt, username,
+                                                   scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        return get_load_summary(aggregator, rate, concurrency,
+                                time() - start,
+                                self._cold_results)
+
+    def register_bus_events(self):
+        """
+        Register listeners to track prompt handling and responses
+        """
+        self.core_bus.on("recognizer_loop:audio_output_end",
+                         self._audio_stopped)
+        for msg_type in HANDLED_EVENTS:
+            self.core_bus.on(msg_type, self._prompt_handled)
+        self.core_bus.on("neon.get_tts.response", self._handle_response)
+        self.core_bus.on("neon.audio_input.response", self._handle_response)
+
+    @staticmethod
+    def _resolve(future: Optional[asyncio.Future], result):
+        if future and not future.done():
+            future.set_result(result)
+
+    def _prompt_handled(self, message: Message):
+        pending = self._pending.get(message.context.get("minerva_prompt_id"))
+        if not pending:
+            return
+        reason = get_prompt_failure(message, pending.prompt)
+        if reason:
+            self._fail_prompt(pending, reason)
+        else:
+            self._resolve(pending.handled, message)
+
+    def _fail_prompt(self, pending: AsyncPendingPrompt, reason: str):
+        """
+        Mark a prompt as failed so waits for handling and audio output end
+        immediately.
+        @param pending: prompt that failed
+        @param reason: reason the prompt failed
+        """
+        LOG.warning(f"Prompt failed: {reason}")
+        pending.error = pending.error or reason
+        self._resolve(pending.handled, None)
+        self._resolve(pending.audio_done, None)
+
+    def _audio_stopped(self, message: Message):
+        pending = self._pending.get(message.context.get("minerva_prompt_id"))
+        if pending:
+            self._resolve(pending.audio_done, message)
+
+    def _handle_response(self, message: Message):
+        self._resolve(self._responses.get(
+            message.context.get("minerva_request_id")), message)
+
+    async def _request(self, message: Message, timeout: float) -> Message:
+        """
+        Emit a message and wait for its response.
+        @param message: Message to emit
+        @param timeout: seconds to wait for a response
+        @returns: response Message
+        """
+        request_id = str(uuid4())
+        message.context["minerva_request_id"] = request_id
+        future = asyncio.get_running_loop().create_future()
+        self._responses[request_id] = future
+        try:
+            await self.core_bus.emit(message)
+            return await self._clock.wait_for(future, timeout)
+        finally:
+            self._responses.pop(request_id, None)
+
+    async def _synthesize(self, prompt: str, directory: str) -> str:
+        """
+        Synthesize a prompt with the configured TTS plugin or core.
+        @param prompt: string prompt to synthesize
+        @param directory: directory to write local TTS audio to
+        @returns: path to synthesized audio
+        """
+        if self._tts:
+            file_path = join(directory, f"prompt.{self._tts.audio_ext}")
+            file_path, _ = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self._tts.get_tts(prompt, file_path,
+                                                lang=self.lang))
+            return file_path
+        resp = await self._request(
+            Message("neon.get_tts", {'text': prompt,
+                                     'speaker': {'language': self.lang,
+                                                 'gender': self.gender}}),
+            self._stt_timeout.default)
+        return resp.data[self.lang][self.gender]
+
+    async def get_audio_data(self, prompt: str) -> str:
+        """
+        Get base64-encoded audio for a prompt, using the audio cache if
+        configured.
+        @param prompt: string prompt to get audio for
+        @returns: base64-encoded prompt audio
+        """
+        key = self._get_audio_key(prompt)
+        cached = self._audio_cache.get_audio(key) \
+            if self._audio_cache else None
+        if cached:
+            return encode_file_to_base64_string(cached)
+        tmp_dir = mkdtemp()
+        try:
+            file_path = await self._synthesize(prompt, tmp_dir)
+            if self._audio_cache:
+                file_path = self._audio_cache.put_audio(key, file_path)
+            return encode_file_to_base64_string(file_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    async def send_prompt(self, prompt: Union[str, Prompt],
+                          context: dict = None):
+        """
+        Send a prompt to core for intent handling
+        @param prompt: string prompt or Prompt to send
+        @param context: optional context to add to the prompt message
+        """
+        prompt = Prompt.from_value(prompt)
+        audio_data = await self.get_audio_data(prompt.text) \
+            if self.test_audio else None
+        context = self._get_prompt_context(context)
+        if self.test_audio:
+            sent = self._clock.time()
+            resp = await self._request(
+                Message("neon.audio_input", {"audio_data": audio_data,
+                                             "lang": self.lang}, context),
+                self._stt_timeout.get(prompt.stt_timeout, prompt.text))
+            LOG.info(resp.data)
+            reason = get_failure_reason(resp)
+            if reason:
+                pending = self._pending.get(context.get("minerva_prompt_id"))
+                if pending:
+                    self._fail_prompt(pending, reason)
+                else:
+                    LOG.error(f"{prompt.text}: {reason}")
+                return
+            self._stt_timeout.add(self._clock.time() - sent, prompt.text)
+            if prompt.text.lower() not in (t.lower() for t
+                                           in resp.data['transcripts']):
+                LOG.warning(f"Invalid transcription for '{prompt.text}': "
+                            f"{resp.data['transcripts']}")
+        else:
+            await self.core_bus.emit(Message("recognizer_loop:utterance",
+                                             {"utterances": [prompt.text],
+                                              "lang": self.lang}, context))
+
+    async def handle_prompt(self, prompt: Union[str, Prompt], username: str,
+                            scheduled: float) -> dict:
+        """
+        Send a prompt in a new session and wait for it to be handled.
+        @param prompt: string prompt or Prompt to send
+        @param username: username to send the prompt as
+        @param scheduled: time the prompt was scheduled to be sent
+        @returns: dict prompt result with `latency` and optional `error`
+        """
+        prompt = Prompt.from_value(prompt)
+        loop = asyncio.get_running_loop()
+        pending = AsyncPendingPrompt(prompt, str(uuid4()), scheduled,
+                                     loop.create_future(),
+                                     loop.create_future())
+        self._pending[pending.prompt_id] = pending
+        result = {"prompt": prompt.text, "username": username,
+                  "scheduled": scheduled, "sent": time()}
+        try:
+            await self.send_prompt(prompt, {
+                "minerva_prompt_id": pending.prompt_id,
+                **self._get_session_context(pending.prompt_id, username)})
+            # In audio mode, `send_prompt` returns after STT
+            transcribed = self._clock.time()
+            # `wait_for` cancels the future on timeout, so each wait needs
+            # its own handler to tell which stage timed out
+            try:
+                await self._clock.wait_for(pending.handled,
+                                       self._intent_timeout.get(
+                                           prompt.intent_timeout,
+                                           prompt.text))
+            except asyncio.TimeoutError:
+                result["error"] = "intent timeout"
+            else:
+                handled = self._clock.time()
+                try:
+                    message = await self._clock.wait_for(
+                        pending.audio_done,
+                        self._speak_timeout.get(prompt.speak_timeout,
+                                                prompt.text))
+                except asyncio.TimeoutError:
+                    result["error"] = "speak timeout"
+                else:
+                    if pending.error:
+                        result["error"] = pending.error
+                    else:
+                        self._intent_timeout.add(handled - transcribed,
+                                                 prompt.text)
+                        self._speak_timeout.add(self._clock.time() - handled,
+                                                prompt.text)
+                        result["timing"] = \
+                            dict(message.context.get("timing", {}))
+        except asyncio.TimeoutError:
+            result["error"] = "stt timeout"
+        except Exception as e:
+            LOG.error(f"{prompt.text}: {e}")
+            result["error"] = type(e).__name__
+        finally:
+            self._pending.pop(pending.prompt_id, None)
+        result["finished"] = time()
+        result["latency"] = result["finished"] - scheduled
+        self._check_timing(result)
+        return result
@@ -0,0 +1,194 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import shutil
+
+from os import makedirs
+from os.path import abspath, join
+from typing import Dict, List, Optional
+
+from neon_minerva.integration.user_utterance import get_stage_timings
+from neon_minerva.stats import bootstrap_change, mann_whitney_u, percentile
+
+SUMMARY_FILE = "summary.json"
+SAMPLES_FILE = "samples.jsonl"
+
+
+def load_stage_samples(samples_file: str) -> Dict[str, List[float]]:
+    """
+    Load timing samples for each stage from a JSONL file of prompt results
+    written by `TraceRecorder`. Warmup prompts and failed prompts are skipped.
+    @param samples_file: path to JSONL prompt results
+    @returns: dict of stage name to list of durations in seconds
+    """
+    samples = dict()
+    with open(samples_file) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            if result.get("phase", "warm") != "warm" or "error" in result:
+                continue
+            timings = get_stage_timings(result)
+            if result.get("latency") is not None:
+                timings["latency"] = result["latency"]
+            for stage, duration in timings.items():
+                if duration is not None:
+                    samples.setdefault(stage, list()).append(duration)
+    return samples
+
+
+def load_request_counts(samples_file: str) -> Dict[str, int]:
+    """
+    Count measured prompts and prompts that completed without error in a
+    JSONL file of prompt results written by `TraceRecorder`.
+    @param samples_file: path to JSONL prompt results
+    @returns: dict with `requests` and `successes` counts
+    """
+    counts = {"requests": 0, "successes": 0}
+    with open(samples_file) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            if result.get("phase", "warm") != "warm":
+                continue
+            counts["requests"] += 1
+            if "error" not in result:
+                counts["successes"] += 1
+    return counts
+
+
+def compare_counts(baseline: Dict[str, int], current: Dict[str, int],
+                   precision: int = 6) -> dict:
+    """
+    Compare request outcomes to a baseline. Fewer successful prompts or a
+    higher error rate than the baseline is a regression.
+    @param baseline: dict baseline `requests` and `successes` counts
+    @param current: dict `requests` and `successes` counts to compare
+    @param precision: number of decimal places to round to
+    @returns: dict comparison of success counts and error rates
+    """
+    def _error_rate(counts: Dict[str, int]) -> float:
+        if not counts["requests"]:
+            return 1.0
+        return 1 - counts["successes"] / counts["requests"]
+
+    base_error_rate = _error_rate(baseline)
+    error_rate = _error_rate(current)
+    return {"baseline_requests": baseline["requests"],
+            "requests": current["requests"],
+            "baseline_successes": baseline["successes"],
+            "successes": current["successes"],
+            "baseline_error_rate": round(base_error_rate, precision),
+            "error_rate": round(error_rate, precision),
+            "regression": current["successes"] < baseline["successes"] or
+            error_rate > base_error_rate}
+
+
+def save_baseline(directory: str, summary: dict, samples_file: str):
+    """
+    Save test results as a baseline to compare later runs to.
+    @param directory: directory to write the baseline to
+    @param summary: dict test summary
+    @param samples_file: path to JSONL prompt results for the test
+    """
+    makedirs(directory, exist_ok=True)
+    with open(join(directory, SUMMARY_FILE), "w") as f:
+        json.dump(summary, f, indent=2)
+    if abspath(samples_file) != abspath(join(directory, SAMPLES_FILE)):
+        shutil.copyfile(samples_file, join(directory, SAMPLES_FILE))
+
+
+def compare_samples(baseline: Dict[str, List[float]],
+                    current: Dict[str, List[float]],
+                    threshold: float = 0.1, alpha: float = 0.05,
+                    confidence: float = 0.95, iterations: int = 1000,
+                    seed: Optional[int] = None, precision: int = 6) -> dict:
+    """
+    Compare timing samples for each stage to a baseline. A stage regressed if
+    its median increased by more than `threshold` and a Mann-Whitney U test
+    finds the difference significant at level `alpha`, or if it has baseline
+    samples but no current samples (i.e. every prompt failed).
+    @param baseline: dict of stage name to baseline durations
+    @param current: dict of stage name to durations to compare
+    @param threshold: relative increase in median latency that is a regression
+    @param alpha: significance level
+    @param confidence: confidence level of relative change intervals
+    @param iterations: number of bootstrap resamples for intervals
+    @param seed: optional seed for reproducible intervals
+    @param precision: number of decimal places to round to
+    @returns: dict comparison of each stage and list of `regressions`
+    """
+    stages = dict()
+    for stage in baseline:
+        if not baseline[stage]:
+            continue
+        if not current.get(stage):
+            stages[stage] = {"baseline_count": len(baseline[stage]),
+                             "count": 0, "missing": True, "regression": True}
+            continue
+        base_median = percentile(baseline[stage], 50)
+        median = percentile(current[stage], 50)
+        change = median / base_median - 1 if base_median else 0.0
+        _, p_value = mann_whitney_u(baseline[stage], current[stage])
+        low, high = bootstrap_change(baseline[stage], current[stage], 50,
+                                     confidence, iterations, seed)
+        stages[stage] = {
+            "baseline_count": len(baseline[stage]),
+            "count": len(current[stage]),
+            "baseline_p50": round(base_median, precision),
+            "p50": round(median, precision),
+            "change": round(change, precision),
+            "change_ci": [round(low, precision), round(high, precision)],
+            "p_value": round(p_value, precision),
+            "regression": p_value < alpha and change > threshold}
+    return {"threshold": threshold, "alpha": alpha,
+            "stages": stages,
+            "regressions": [stage for stage, comparison in stages.items()
+                            if comparison["regression"]]}
+
+
+def compare_to_baseline(directory: str, samples_file: str,
+                        **kwargs) -> dict:
+    """
+    Compare test results to a saved baseline.
+    @param directory: baseline directory written by `save_baseline`
+    @param samples_file: path to JSONL prompt results to compare
+    @param kwargs: keyword arguments to pass to `compare_samples`
+    @returns: dict comparison (see `compare_samples`) with request outcomes
+        compared under `requests`; `requests` is listed in `regressions` if
+        fewer prompts succeeded or the error rate increased
+    """
+    baseline_file = join(directory, SAMPLES_FILE)
+    comparison = compare_samples(load_stage_samples(baseline_file),
+                                 load_stage_samples(samples_file), **kwargs)
+    requests = compare_counts(load_request_counts(baseline_file),
+                              load_request_counts(samples_file))
+    if requests["regression"]:
+        comparison["regressions"].insert(0, "requests")
+    return {"baseline": directory, **comparison, "requests": requests}
@@ -0,0 +1,408 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import heapq
+import random
+import shutil
+import wave
+
+from base64 import b64decode
+from dataclasses import dataclass, fields
+from io import BytesIO
+from itertools import count
+from math import log, sqrt
+from os.path import join
+from tempfile import mkdtemp
+from threading import Condition, Lock, Thread
+from time import monotonic, time
+from typing import Callable, Dict, Optional, Tuple, Union
+from uuid import uuid4
+
+from ovos_bus_client.message import Message
+from ovos_utils.fakebus import FakeBus
+from ovos_utils.log import LOG
+
+
+MOCK_STAGES = ("get_stt", "save_transcript", "text_parsers",
+               "intent_handler", "get_tts", "audio_output")
+
+
+@dataclass
+class StageConfig:
+    mean: float = 0.0
+    std: float = 0.0
+    distribution: str = "constant"
+    failure_rate: float = 0.0
+
+    def __post_init__(self):
+        if self.distribution not in ("constant", "uniform", "normal",
+                                     "lognormal", "exponential"):
+            raise ValueError(f"Invalid distribution: {self.distribution}")
+        if self.mean < 0 or self.std < 0:
+            raise ValueError(f"Invalid latency: mean={self.mean} "
+                             f"std={self.std}")
+        if not 0 <= self.failure_rate <= 1:
+            raise ValueError(f"Invalid failure rate: {self.failure_rate}")
+
+    @classmethod
+    def from_value(cls, value: Union[float, dict, 'StageConfig']) -> \
+            'StageConfig':
+        """
+        Get a StageConfig from a constant latency or dict of parameters.
+        @param value: latency in seconds, dict with `mean`, `std`,
+            `distribution`, and/or `failure_rate`, or a StageConfig
+        @returns: StageConfig object
+        """
+        if isinstance(value, StageConfig):
+            return value
+        if isinstance(value, (int, float)):
+            return cls(float(value))
+        if not isinstance(value, dict):
+            raise ValueError(f"Invalid stage config: {value}")
+        unknown = set(value) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"Invalid stage config keys: {unknown}")
+        return cls(**value)
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Sample a latency from this stage's distribution.
+        @param rng: random number generator to sample with
+        @returns: latency in seconds (never negative)
+        """
+        if self.distribution == "constant" or self.mean == 0:
+            return self.mean
+        if self.distribution == "exponential":
+            return rng.expovariate(1 / self.mean)
+        if self.distribution == "uniform":
+            spread = self.std * sqrt(3)
+            return max(0.0, rng.uniform(self.mean - spread,
+                                        self.mean + spread))
+        if self.distribution == "lognormal":
+            sigma = sqrt(log(1 + (self.std / self.mean) ** 2))
+            return rng.lognormvariate(log(self.mean) - sigma ** 2 / 2, sigma)
+        return max(0.0, rng.gauss(self.mean, self.std))
+
+
+class MockBus(FakeBus):
+    """
+    FakeBus that only dispatches messages to handlers. FakeBus replicates
+    session handling, which loads configuration for every message and would
+    dominate the latency measured against a mock core.
+    """
+    def emit(self, message: Message):
+        try:
+            self.ee.emit(message.msg_type, message)
+        except Exception as e:
+            LOG.exception(f"Error in event handler for "
+                          f"'{message.msg_type}': {e}")
+
+
+DEFAULT_STAGES = {"get_stt": StageConfig(0.2),
+                  "save_transcript": StageConfig(0.005),
+                  "text_parsers": StageConfig(0.01),
+                  "intent_handler": StageConfig(0.1),
+                  "get_tts": StageConfig(0.2),
+                  "audio_output": StageConfig(0.5)}
+
+
+def _copy_context(context: dict) -> dict:
+    """
+    Copy a message context so that timing can be added to it without changing
+    messages that were already emitted.
+    @param context: message context to copy
+    @returns: shallow copy of `context` with a copy of its `timing` dict
+    """
+    return {**context, "timing": dict(context.get("timing") or dict())}
+
+
+class MockCore:
+    def __init__(self, bus: Optional[FakeBus] = None,
+                 stages: Optional[Dict[str, Union[float, dict,
+                                                  StageConfig]]] = None,
+                 intent_failure_rate: float = 0.0,
+                 seed: Optional[int] = None,
+                 skill_id: str = "mock-skill.neongeckocom",
+                 handler: str = "MockSkill.handle_mock_intent"):
+        """
+        In-process stand-in for a Neon core that responds to prompts on a
+        FakeBus with simulated latency. Stage latencies are added to the
+        `timing` context the same way core reports them. A failure in
+        `get_stt` returns an STT error and a failure in `intent_handler`
+        raises a handler exception; a failure in any other stage drops the
+        prompt so that no further responses are emitted.
+        @param bus: FakeBus to connect to (default creates a new MockBus)
+        @param stages: dict of stage name to latency in seconds or dict
+            StageConfig parameters, overriding `DEFAULT_STAGES`
+        @param intent_failure_rate: fraction of prompts to match no intent
+        @param seed: optional seed for reproducible latencies and failures
+        @param skill_id: skill ID to report handling prompts
+        @param handler: intent handler name to report handling prompts
+        """
+        stages = stages or dict()
+        unknown = set(stages) - set(MOCK_STAGES)
+        if unknown:
+            raise ValueError(f"Invalid stages: {unknown}")
+        if not 0 <= intent_failure_rate <= 1:
+            raise ValueError(f"Invalid failure rate: {intent_failure_rate}")
+        self.bus = bus or MockBus()
+        self.stages = {**DEFAULT_STAGES,
+                       **{name: StageConfig.from_value(config)
+                          for name, config in stages.items()}}
+        self.intent_failure_rate = intent_failure_rate
+        self.skill_id = skill_id
+        self.handler = handler
+        self._rng = random.Random(seed)
+        self._rng_lock = Lock()
+        self._queue = list()
+        self._queue_seq = count()
+        self._queue_cond = Condition()
+        self._thread = None
+        self._tts_dir = None
+
+    @classmethod
+    def from_config(cls, config: dict, bus: Optional[FakeBus] = None) -> \
+            'MockCore':
+        """
+        Create a MockCore from a configuration dict.
+        @param config: dict with optional `stages`, `intent_failure_rate`,
+            `seed`, `skill_id`, and `handler` keys
+        @param bus: FakeBus to connect to (default creates a new MockBus)
+        @returns: MockCore object
+        """
+        unknown = set(config) - {"stages", "intent_failure_rate", "seed",
+                                 "skill_id", "handler"}
+        if unknown:
+            raise ValueError(f"Invalid mock core config keys: {unknown}")
+        return cls(bus, **config)
+
+    def start(self):
+        """
+        Register bus handlers and start responding to prompts.
+        """
+        if self._thread:
+            return
+        self._tts_dir = mkdtemp()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.bus.on("recognizer_loop:utterance", self._handle_utterance)
+        self.bus.on("neon.audio_input", self._handle_audio_input)
+        self.bus.on("neon.get_tts", self._handle_get_tts)
+
+    def stop(self):
+        """
+        Stop responding to prompts. Prompts in progress are dropped.
+        """
+        if not self._thread:
+            return
+        self.bus.remove("recognizer_loop:utterance", self._handle_utterance)
+        self.bus.remove("neon.audio_input", self._handle_audio_input)
+        self.bus.remove("neon.get_tts", self._handle_get_tts)
+        with self._queue_cond:
+            self._queue.clear()
+            thread = self._thread
+            self._thread = None
+            self._queue_cond.notify()
+        thread.join()
+        shutil.rmtree(self._tts_dir, ignore_errors=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self):
+        """
+        Run scheduled callbacks until stopped.
+        """
+        while True:
+            with self._queue_cond:
+                while self._thread and (not self._queue or
+                                        self._queue[0][0] > monotonic()):
+                    self._queue_cond.wait(self._queue[0][0] - monotonic()
+                                          if self._queue else None)
+                if not self._thread:
+                    return
+                _, _, callback = heapq.heappop(self._queue)
+            try:
+                callback()
+            except Exception as e:
+                LOG.exception(e)
+
+    def _schedule(self, delay: float, callback: Callable[[], None]):
+        """
+        Call a function after a delay on the scheduler thread.
+        @param delay: seconds to wait before calling `callback`
+        @param callback: function to call
+        """
+        with self._queue_cond:
+            heapq.heappush(self._queue, (monotonic() + delay,
+                                         next(self._queue_seq), callback))
+            self._queue_cond.notify()
+
+    def _sample(self, stage: str) -> Tuple[float, bool]:
+        """
+        Sample the latency and outcome of a stage.
+        @param stage: name of stage to sample
+        @returns: latency in seconds, True if the stage failed
+        """
+        config = self.stages[stage]
+        with self._rng_lock:
+            return (config.sample(self._rng),
+                    self._rng.random() < config.failure_rate)
+
+    def _after(self, stage: str, context: dict,
+               callback: Callable[[], None],
+               on_failure: Optional[Callable[[], None]] = None):
+        """
+        Run a stage, recording its duration in `context` and then calling
+        `callback`, or `on_failure` (if specified) if the stage fails.
+        @param stage: name of stage to run
+        @param context: prompt message context to record timing in
+        @param callback: function to call when the stage completes
+        @param on_failure: function to call if the stage fails
+        """
+        duration, failed = self._sample(stage)
+
+        def _complete():
+            context["timing"][stage] = duration
+            if not failed:
+                callback()
+            elif on_failure:
+                on_failure()
+            else:
+                LOG.debug(f"Dropping prompt in {stage}")
+        self._schedule(duration, _complete)
+
+    def _handle_utterance(self, message: Message):
+        """
+        Handle a text prompt.
+        @param message: `recognizer_loop:utterance` Message
+        """
+        self._process_utterance(dict(message.data),
+                                _copy_context(message.context))
+
+    def _process_utterance(self, data: dict, context: dict):
+        """
+        Simulate parsing, intent handling, and speaking a response.
+        @param data: `recognizer_loop:utterance` Message data
+        @param context: prompt message context
+        """
+        timing = context["timing"]
+
+        def _emit(msg_type: str, msg_data: dict = None):
+            self.bus.emit(Message(msg_type, msg_data or dict(),
+                                  _copy_context(context)))
+
+        def _handle_intent():
+            timing["handle_utterance"] = time()
+            with self._rng_lock:
+                no_match = self._rng.random() < self.intent_failure_rate
+            if no_match:
+                _emit("complete_intent_failure", data)
+                return
+            context["skill_id"] = self.skill_id
+            self._after("intent_handler", context, _speak, _handler_error)
+
+        def _handler_error():
+            exception = "RuntimeError('Mock handler error')"
+            _emit("mycroft.skill.handler.error", {"name": self.handler,
+                                                  "exception": exception})
+            _emit("mycroft.skill.handler.complete",
+                  {"name": self.handler, "exception": exception})
+
+        def _speak():
+            timing["speech_start"] = time()
+            _emit("mycroft.skill.handler.complete", {"name": self.handler})
+            self._after("get_tts", context, _play_audio)
+
+        def _play_audio():
+            _emit("recognizer_loop:audio_output_start")
+            self._after("audio_output", context,
+                        lambda: _emit("recognizer_loop:audio_output_end"))
+
+        self._after("save_transcript", context,
+                    lambda: self._after("text_parsers", context,
+                                        _handle_intent))
+
+    def _handle_audio_input(self, message: Message):
+        """
+        Handle an audio prompt. Audio synthesized by `neon.get_tts` is
+        transcribed to the original text.
+        @param message: `neon.audio_input` Message
+        """
+        context = _copy_context(message.context)
+        transcript = self._transcribe(message.data.get("audio_data"))
+        lang = message.data.get("lang")
+
+        def _respond():
+            self.bus.emit(message.response({"transcripts": [transcript],
+                                            "parser_data": dict(),
+                                            "skills_recv": True},
+                                           _copy_context(context)))
+            self._process_utterance({"utterances": [transcript],
+                                     "lang": lang}, context)
+
+        def _error():
+            self.bus.emit(message.response({"error": "Mock STT error"},
+                                           _copy_context(context)))
+        self._after("get_stt", context, _respond, _error)
+
+    def _handle_get_tts(self, message: Message):
+        """
+        Handle a request to synthesize audio. Audio is a WAV file encoding
+        the requested text so that `neon.audio_input` can transcribe it.
+        @param message: `neon.get_tts` Message
+        """
+        text = message.data.get("text") or ""
+        speaker = message.data.get("speaker") or dict()
+        lang = speaker.get("language") or "en-us"
+        gender = speaker.get("gender") or "female"
+        file_path = join(self._tts_dir, f"{uuid4()}.wav")
+        with wave.open(file_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(1)
+            f.setframerate(16000)
+            f.writeframes(text.encode("utf-8"))
+        duration, _ = self._sample("get_tts")
+        self._schedule(duration, lambda: self.bus.emit(message.response(
+            {lang: {"sentence": text, gender: file_path}})))
+
+    @staticmethod
+    def _transcribe(audio_data: Optional[str]) -> str:
+        """
+        Get the text encoded in mock TTS audio.
+        @param audio_data: base64-encoded WAV audio
+        @returns: transcribed text, or an empty string for other audio
+        """
+        try:
+            with wave.open(BytesIO(b64decode(audio_data)), "rb") as f:
+                return f.readframes(f.getnframes()).decode("utf-8")
+        except Exception as e:
+            LOG.debug(f"Unable to transcribe audio: {e}")
+            return ""
@@ -0,0 +1,167 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+
+from dataclasses import dataclass, fields
+from threading import Lock
+from typing import Dict, List, Optional, Union
+
+import yaml
+
+from ovos_bus_client.message import Message
+
+from neon_minerva.stats import QuantileSketch
+
+
+@dataclass
+class Prompt:
+    text: str
+    stt_timeout: Optional[float] = None
+    intent_timeout: Optional[float] = None
+    speak_timeout: Optional[float] = None
+    expected_skill: Optional[str] = None
+    expected_intent: Optional[str] = None
+    repeat: int = 1
+    warmup: bool = False
+
+    @classmethod
+    def from_value(cls, value: Union[str, dict, 'Prompt']) -> 'Prompt':
+        """
+        Get a Prompt from a string prompt or dict of prompt metadata.
+        @param value: string prompt, dict with `text` and optional metadata,
+            or a Prompt
+        @returns: Prompt object
+        """
+        if isinstance(value, Prompt):
+            return value
+        if isinstance(value, str):
+            return cls(value)
+        if not isinstance(value, dict) or not value.get("text"):
+            raise ValueError(f"Invalid prompt: {value}")
+        known = {f.name for f in fields(cls)}
+        unknown = set(value) - known
+        if unknown:
+            raise ValueError(f"Invalid prompt keys: {unknown}")
+        return cls(**value)
+
+    def check_handler(self, message: Message) -> Optional[str]:
+        """
+        Check that a completed skill handler is the one expected to handle
+        this prompt.
+        @param message: `mycroft.skill.handler.complete` Message
+        @returns: failure reason, or None if the handler is as expected
+        """
+        skill_id = message.context.get("skill_id")
+        if self.expected_skill and skill_id != self.expected_skill:
+            return f"unexpected skill: {skill_id}"
+        handler = message.data.get("name") or ""
+        if self.expected_intent and self.expected_intent != handler and \
+                not handler.endswith(f".{self.expected_intent}"):
+            return f"unexpected intent handler: {handler}"
+        return None
+
+
+def load_prompts(file_path: str) -> List[Prompt]:
+    """
+    Load prompts from a file. YAML files (`.yaml`/`.yml`) may contain a list
+    of prompts or a dict with a `prompts` list; JSONL files (`.jsonl`) contain
+    one prompt per line. Prompts in either may be strings or dicts of
+    Prompt fields. Any other file is read as one string prompt per line, with
+    `#` comments.
+    @param file_path: path to prompt file
+    @returns: list of Prompt objects
+    """
+    if file_path.endswith((".yaml", ".yml")):
+        with open(file_path) as f:
+            data = yaml.safe_load(f) or list()
+        if isinstance(data, dict):
+            data = data.get("prompts") or list()
+        return [Prompt.from_value(p) for p in data]
+    if file_path.endswith(".jsonl"):
+        with open(file_path) as f:
+            return [Prompt.from_value(json.loads(line)) for line in f
+                    if line.strip()]
+    from neon_utils.file_utils import load_commented_file
+    return [Prompt(p) for p in load_commented_file(file_path).split('\n')
+            if p]
+
+
+class AdaptiveTimeout:
+    def __init__(self, default: float, factor: Optional[float] = None,
+                 pct: float = 99, min_samples: int = 20,
+                 minimum: float = 1.0):
+        """
+        Timeout learned from observed durations as a multiple of a high
+        percentile, so that fast operations fail fast without slow ones
+        timing out early. Durations may be recorded per key (i.e. prompt) so
+        that a slow prompt's timeout is not sized by faster prompts.
+        @param default: timeout in seconds before enough samples are observed
+        @param factor: multiple of the observed percentile to wait for
+            (None to always use `default`)
+        @param pct: percentile of observed durations to scale
+        @param min_samples: number of observations before adapting
+        @param minimum: minimum adaptive timeout in seconds
+        """
+        self.default = default
+        self.factor = factor
+        self.pct = pct
+        self.min_samples = min_samples
+        self.minimum = minimum
+        self._sketch = QuantileSketch()
+        self._key_sketches: Dict[str, QuantileSketch] = dict()
+        self._lock = Lock()
+
+    def add(self, seconds: float, key: Optional[str] = None):
+        """
+        Record an observed duration.
+        @param seconds: duration of a successful operation
+        @param key: optional key (i.e. prompt text) the duration applies to
+        """
+        with self._lock:
+            self._sketch.add(seconds)
+            if key is not None:
+                self._key_sketches.setdefault(key, QuantileSketch()).add(
+                    seconds)
+
+    def get(self, override: Optional[float] = None,
+            key: Optional[str] = None) -> float:
+        """
+        Get the current timeout.
+        @param override: explicit timeout to use instead, if not None
+        @param key: optional key to get a timeout for; `default` is used
+            until `min_samples` durations are recorded for the key
+        @returns: timeout in seconds
+        """
+        if override is not None:
+            return override
+        with self._lock:
+            sketch = self._sketch if key is None else \
+                self._key_sketches.get(key)
+            if not self.factor or not sketch or \
+                    sketch.count < self.min_samples:
+                return self.default
+            return max(self.minimum, sketch.quantile(self.pct) * self.factor)
@@ -24,9 +24,20 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import json
+import re
 import pytest
 
-from os import environ
+from os import environ, remove
+from pathlib import Path
+from subprocess import CalledProcessError
+from tempfile import NamedTemporaryFile
+from typing import Optional, Sequence, Union
+
+from ovos_utils.log import LOG
+
+from neon_minerva.integration.amqp_server import LocalAMQPServer, \
+    hash_password
 
 try:
     from port_for import get_port
@@ -36,59 +47,242 @@ try:
 except ImportError:
     _INITIALIZED = False
 
+_SESSION_BROKER = None
 
-@pytest.fixture(scope="class")
-def rmq_instance(request, tmp_path_factory):
-    """Start a RabbitMQ subprocess for the test class and stop it after."""
 
+def _check_initialized():
     if not _INITIALIZED:
         raise ModuleNotFoundError(
             "Missing optional extra dependencies install `neon-minerva[rmq]`"
         )
 
-    config = get_config(request)
-    rabbit_ctl = config["ctl"]
-    rabbit_server = config["server"]
-    rabbit_host = "127.0.0.1"
-    rabbit_port = get_port(config["port"])
+
+def get_worker_id() -> str:
+    """
+    Get the pytest-xdist worker ID of this process.
+    @returns: worker ID (i.e. `gw0`), or `master` if not running in xdist
+    """
+    return environ.get("PYTEST_XDIST_WORKER", "master")
+
+
+def _get_worker_index(worker_id: str) -> int:
+    match = re.fullmatch(r"gw(\d+)", worker_id)
+    return int(match.group(1)) if match else 0
+
+
+def _get_node_name(node: Optional[str], worker_id: str,
+                   port: int) -> str:
+    if not node:
+        return f"rabbitmq-test-{worker_id}-{port}"
+    name, _, host = node.partition("@")
+    return f"{name}-{worker_id}@{host}" if host else f"{name}-{worker_id}"
+
+
+def start_rmq_broker(path: Path,
+                     server: str = "/usr/lib/rabbitmq/bin/rabbitmq-server",
+                     ctl: str = "/usr/lib/rabbitmq/bin/rabbitmqctl",
+                     host: str = "127.0.0.1", port: Optional[int] = None,
+                     distribution_port: Optional[int] = None,
+                     node: Optional[str] = None,
+                     plugin_path: Optional[Path] = None,
+                     logpath: Optional[Path] = None,
+                     worker_id: Optional[str] = None) -> 'RabbitMqExecutor':
+    """
+    Start a RabbitMQ broker subprocess. This does not depend on pytest, so it
+    may be used to start a broker outside of a test session.
+    @param path: directory to write broker data to
+    @param server: path to `rabbitmq-server`
+    @param ctl: path to `rabbitmqctl`
+    @param host: host to accept connections on
+    @param port: base AMQP port (default any available port)
+    @param distribution_port: base node distribution port (default any
+        available port)
+    @param node: base node name (default derived from the port)
+    @param plugin_path: directory containing the enabled `plugins` file
+        (default `path`)
+    @param logpath: directory to write logs to (default `path`/logs)
+    @param worker_id: pytest-xdist worker ID (default from the environment).
+        Ports are offset by the worker number and node names suffixed with
+        the worker ID so that brokers for parallel workers do not collide.
+    @returns: started RabbitMqExecutor; call `stop()` to stop the broker
+    """
+    _check_initialized()
+    worker_id = worker_id or get_worker_id()
+    offset = _get_worker_index(worker_id)
+    rabbit_port = get_port(port + offset if port else None)
     rabbit_distribution_port = get_port(
-        config["distribution_port"], [rabbit_port]
-    )
+        distribution_port + offset if distribution_port else None,
+        [rabbit_port])
     assert rabbit_distribution_port
     assert (
             rabbit_distribution_port != rabbit_port
     ), "rabbit_port and distribution_port can not be the same!"
+    path = Path(path)
+    logpath = Path(logpath) if logpath else path / "logs"
+    rabbit_executor = RabbitMqExecutor(
+        server,
+        host,
+        rabbit_port,
+        rabbit_distribution_port,
+        ctl,
+        logpath=logpath,
+        path=path,
+        plugin_path=Path(plugin_path) if plugin_path else path,
+        node_name=_get_node_name(node, worker_id, rabbit_port),
+    )
+    rabbit_executor.start()
+    return rabbit_executor
 
-    tmpdir = tmp_path_factory.mktemp(f"pytest-rabbitmq-{request.fixturename}")
 
-    rabbit_plugin_path = config["plugindir"]
+def get_rmq_definitions(username: str, password: str, vhosts: Sequence[str],
+                        definitions_file: Optional[str] = None) -> dict:
+    """
+    Get RabbitMQ definitions for a user with full permissions on vhosts.
+    @param username: user to define
+    @param password: password of user to define
+    @param vhosts: vhosts to define
+    @param definitions_file: optional path to a JSON definitions file (i.e.
+        exchanges, queues, and bindings) to merge into the definitions
+    @returns: dict definitions to import
+    """
+    definitions = {
+        "users": [{"name": username,
+                   "password_hash": hash_password(password),
+                   "hashing_algorithm": "rabbit_password_hashing_sha256",
+                   "tags": ""}],
+        "vhosts": [{"name": vhost} for vhost in vhosts],
+        "permissions": [{"user": username, "vhost": vhost, "configure": ".*",
+                         "write": ".*", "read": ".*"} for vhost in vhosts]}
+    if definitions_file:
+        with open(definitions_file) as f:
+            for key, values in json.load(f).items():
+                if isinstance(values, list):
+                    definitions.setdefault(key, list()).extend(values)
+    return definitions
 
-    rabbit_logpath = config["logsdir"]
 
-    if not rabbit_logpath:
-        rabbit_logpath = tmpdir / "logs"
+def import_rmq_definitions(broker: Union['RabbitMqExecutor', LocalAMQPServer],
+                           definitions: dict):
+    """
+    Create users, vhosts, permissions, and any other objects in definitions
+    with a single `rabbitmqctl import_definitions` call.
+    @param broker: running RabbitMqExecutor or LocalAMQPServer
+    @param definitions: dict definitions (see `get_rmq_definitions`)
+    """
+    with NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(definitions, f)
+    try:
+        broker.rabbitctl_output("import_definitions", f.name)
+    finally:
+        remove(f.name)
 
-    rabbit_executor = RabbitMqExecutor(
-        rabbit_server,
-        rabbit_host,
-        rabbit_port,
-        rabbit_distribution_port,
-        rabbit_ctl,
-        logpath=rabbit_logpath,
-        path=tmpdir,
-        plugin_path=rabbit_plugin_path,
-        node_name=config["node"],
-    )
 
-    rabbit_executor.start()
+def _erlang_binaries(values: Sequence[str]) -> str:
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return "[" + ", ".join(f'<<"{v}"/utf8>>' for v in escaped) + "]"
+
+
+def get_rmq_delete_expression(definitions: dict) -> str:
+    """
+    Get an Erlang expression for `rabbitmqctl eval` that deletes vhosts and
+    users in definitions. Each deletion is attempted even if another fails.
+    @param definitions: dict definitions (see `get_rmq_definitions`)
+    @returns: Erlang expression evaluating to the result of each deletion
+    """
+    vhosts = _erlang_binaries([vhost["name"] for vhost
+                               in definitions.get("vhosts", list())])
+    users = _erlang_binaries([user["name"] for user
+                              in definitions.get("users", list())])
+    return (f"[{{V, catch rabbit_vhost:delete(V, <<\"minerva\">>)}} "
+            f"|| V <- {vhosts}] ++ "
+            f"[{{U, catch rabbit_auth_backend_internal:delete_user("
+            f"U, <<\"minerva\">>)}} || U <- {users}].")
+
+
+def delete_rmq_definitions(broker: Union['RabbitMqExecutor', LocalAMQPServer],
+                           definitions: dict):
+    """
+    Delete vhosts (including their exchanges and queues) and users in
+    definitions with a single `rabbitmqctl eval` call.
+    @param broker: running RabbitMqExecutor or LocalAMQPServer
+    @param definitions: dict definitions (see `get_rmq_definitions`)
+    """
+    try:
+        if isinstance(broker, LocalAMQPServer):
+            broker.delete_definitions(definitions)
+        else:
+            LOG.debug(broker.rabbitctl_output(
+                "eval", get_rmq_delete_expression(definitions)))
+    except (CalledProcessError, ValueError) as e:
+        LOG.warning(f"Failed to delete definitions: {e}")
+
+
+def use_local_broker() -> bool:
+    """
+    Check if fixtures should use a LocalAMQPServer instead of RabbitMQ.
+    @returns: True if `TEST_RMQ_BACKEND` is set to `local`
+    """
+    backend = environ.get("TEST_RMQ_BACKEND", "rabbitmq").lower()
+    if backend not in ("rabbitmq", "local"):
+        raise ValueError(f"Invalid TEST_RMQ_BACKEND: {backend}")
+    return backend == "local"
+
+
+def _get_session_broker(request, tmp_path_factory) -> \
+        Union['RabbitMqExecutor', LocalAMQPServer]:
+    """
+    Get the broker for this test session, starting it on first use. The
+    broker is stopped when the session ends.
+    """
+    global _SESSION_BROKER
+    if _SESSION_BROKER is None:
+        if use_local_broker():
+            broker = LocalAMQPServer()
+            broker.start()
+        else:
+            _check_initialized()
+            config = get_config(request)
+            broker = start_rmq_broker(
+                tmp_path_factory.mktemp("pytest-rabbitmq"),
+                server=config["server"], ctl=config["ctl"],
+                port=config["port"],
+                distribution_port=config["distribution_port"],
+                node=config["node"], plugin_path=config["plugindir"],
+                logpath=config["logsdir"])
+
+        def _stop():
+            global _SESSION_BROKER
+            broker.stop()
+            _SESSION_BROKER = None
+        request.config.add_cleanup(_stop)
+        _SESSION_BROKER = broker
+    return _SESSION_BROKER
+
+
+@pytest.fixture(scope="session")
+def rmq_broker(request, tmp_path_factory):
+    """
+    Start a RabbitMQ subprocess (or LocalAMQPServer if `TEST_RMQ_BACKEND` is
+    `local`) shared by all tests in the session.
+    """
+    return _get_session_broker(request, tmp_path_factory)
+
+
+@pytest.fixture(scope="class")
+def rmq_instance(request, tmp_path_factory):
+    """
+    Create a user and vhosts on the session RabbitMQ broker for the test
+    class and delete them after.
+    """
+    rabbit_executor = _get_session_broker(request, tmp_path_factory)
 
     # Init RMQ config
     rmq_username = environ.get("TEST_RMQ_USERNAME", "test_user")
     rmq_password = environ.get("TEST_RMQ_PASSWORD", "test_password")
-    rmq_vhosts = environ.get("TEST_RMQ_VHOSTS", "/test")
-    rabbit_executor.rabbitctl_output("add_user", rmq_username, rmq_password)
-    for vhost in rmq_vhosts.split(","):
-        rabbit_executor.rabbitctl_output("add_vhost", vhost)
-        rabbit_executor.rabbitctl_output("set_permissions", "-p", vhost,
-                                         rmq_username, ".*", ".*", ".*")
+    rmq_vhosts = environ.get("TEST_RMQ_VHOSTS", "/test").split(",")
+    definitions = get_rmq_definitions(rmq_username, rmq_password, rmq_vhosts,
+                                      environ.get("TEST_RMQ_DEFINITIONS"))
+    import_rmq_definitions(rabbit_executor, definitions)
     request.cls.rmq_instance = rabbit_executor
+    yield rabbit_executor
+    delete_rmq_definitions(rabbit_executor, definitions)
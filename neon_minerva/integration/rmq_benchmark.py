@@ -0,0 +1,354 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import struct
+
+from os import environ
+from threading import Barrier, BrokenBarrierError, Event, Lock, Thread
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple
+from uuid import uuid4
+
+from ovos_utils.log import LOG
+
+from neon_minerva.stats import summarize
+
+try:
+    import pika
+    _INITIALIZED = True
+except ImportError:
+    _INITIALIZED = False
+
+WORKLOADS = ("publish_consume", "rpc")
+
+
+def _check_initialized():
+    if not _INITIALIZED:
+        raise ModuleNotFoundError(
+            "Missing optional extra dependencies install `neon-minerva[rmq]`"
+        )
+
+
+class RMQBenchmark:
+    def __init__(self, host: str = "127.0.0.1", port: int = 5672,
+                 vhost: str = "/", username: str = "guest",
+                 password: str = "guest", payload_size: int = 1024,
+                 publishers: int = 1, consumers: int = 1, prefetch: int = 100,
+                 confirm: bool = False, timeout: float = 60):
+        """
+        Measure RabbitMQ throughput and latency with pika clients. Each
+        publisher and consumer uses its own connection in its own thread.
+        @param host: broker host
+        @param port: broker AMQP port
+        @param vhost: vhost to declare benchmark queues in
+        @param username: user to connect as
+        @param password: password to connect with
+        @param payload_size: message body size in bytes (minimum 8, which
+            holds the send timestamp)
+        @param publishers: number of publishers (RPC clients)
+        @param consumers: number of consumers (RPC servers)
+        @param prefetch: consumer prefetch count (0 for unlimited)
+        @param confirm: if True, publish with publisher confirms, waiting for
+            each message to be confirmed
+        @param timeout: seconds to wait for each workload to complete
+        """
+        _check_initialized()
+        if publishers < 1 or consumers < 1:
+            raise ValueError("At least one publisher and consumer is required")
+        self.host = host
+        self.port = port
+        self.vhost = vhost
+        self.payload_size = max(payload_size, 8)
+        self.publishers = publishers
+        self.consumers = consumers
+        self.prefetch = prefetch
+        self.confirm = confirm
+        self.timeout = timeout
+        self._params = pika.ConnectionParameters(
+            host, port, vhost, pika.PlainCredentials(username, password))
+        self._padding = bytes(self.payload_size - 8)
+
+    @classmethod
+    def from_broker(cls, broker, **kwargs) -> 'RMQBenchmark':
+        """
+        Get a benchmark for the broker from the `rmq_instance` fixture, using
+        the same `TEST_RMQ_*` credentials and the first configured vhost.
+        @param broker: RabbitMqExecutor or LocalAMQPServer
+        @param kwargs: other RMQBenchmark arguments
+        @returns: RMQBenchmark for `broker`
+        """
+        kwargs.setdefault("username", environ.get("TEST_RMQ_USERNAME",
+                                                  "test_user"))
+        kwargs.setdefault("password", environ.get("TEST_RMQ_PASSWORD",
+                                                  "test_password"))
+        kwargs.setdefault("vhost", environ.get("TEST_RMQ_VHOSTS",
+                                               "/test").split(",")[0])
+        return cls(broker.host, broker.port, **kwargs)
+
+    def _payload(self) -> bytes:
+        return struct.pack(">d", perf_counter()) + self._padding
+
+    def _get_config(self) -> dict:
+        return {"payload_size": self.payload_size,
+                "publishers": self.publishers,
+                "consumers": self.consumers,
+                "prefetch": self.prefetch,
+                "confirm": self.confirm}
+
+    @staticmethod
+    def _split(count: int, workers: int) -> List[int]:
+        return [count // workers + (idx < count % workers)
+                for idx in range(workers)]
+
+    def run(self, workload: str, count: int) -> dict:
+        """
+        Run a benchmark workload.
+        @param workload: one of `WORKLOADS`
+        @param count: number of messages (or RPC requests) to send
+        @returns: dict benchmark results
+        """
+        if workload == "publish_consume":
+            return self.run_publish_consume(count)
+        if workload == "rpc":
+            return self.run_rpc(count)
+        raise ValueError(f"Invalid workload: {workload}")
+
+    def _run_workers(self, workers: List[Callable[[Barrier], None]],
+                     done: Event) -> Tuple[Optional[float], List[str]]:
+        """
+        Run workers in threads, starting them together once all are
+        connected, and wait for `done` or the timeout.
+        @param workers: callables that connect, wait on the barrier, and run
+        @param done: event set when the workload is complete
+        @returns: perf_counter time the workers started (None if any worker
+            failed to start), list of worker errors
+        """
+        barrier = Barrier(len(workers) + 1)
+        errors = list()
+
+        def _run(worker):
+            try:
+                worker(barrier)
+            except BrokenBarrierError:
+                pass
+            except Exception as e:
+                LOG.exception(f"Benchmark worker failed: {e}")
+                errors.append(e)
+                barrier.abort()
+                done.set()
+
+        threads = [Thread(target=_run, args=(worker,), daemon=True)
+                   for worker in workers]
+        for thread in threads:
+            thread.start()
+        try:
+            barrier.wait(self.timeout)
+            start = perf_counter()
+            done.wait(self.timeout)
+        except BrokenBarrierError:
+            start = None
+        done.set()
+        for thread in threads:
+            thread.join(self.timeout)
+        return start, [repr(e) for e in errors]
+
+    def _declare_queue(self) -> str:
+        queue = f"minerva-bench-{uuid4().hex}"
+        connection = pika.BlockingConnection(self._params)
+        connection.channel().queue_declare(queue)
+        connection.close()
+        return queue
+
+    def _delete_queue(self, queue: str):
+        try:
+            connection = pika.BlockingConnection(self._params)
+            connection.channel().queue_delete(queue)
+            connection.close()
+        except Exception as e:
+            LOG.warning(f"Failed to delete {queue}: {e}")
+
+    def run_publish_consume(self, messages: int) -> dict:
+        """
+        Publish messages to a queue and consume them, measuring the time from
+        publish to delivery of each message.
+        @param messages: total number of messages to publish
+        @returns: dict with throughput (`msgs_per_sec`) and `latency` summary
+        """
+        queue = self._declare_queue()
+        latencies = list()
+        lock = Lock()
+        done = Event()
+        timing = {"published": 0.0, "received": 0.0}
+
+        def _consumer(barrier: Barrier):
+            connection = pika.BlockingConnection(self._params)
+            try:
+                channel = connection.channel()
+                channel.basic_qos(prefetch_count=self.prefetch)
+
+                def _on_message(ch, method, _, body):
+                    received = perf_counter()
+                    ch.basic_ack(method.delivery_tag)
+                    with lock:
+                        latencies.append(
+                            received - struct.unpack_from(">d", body)[0])
+                        timing["received"] = received
+                        if len(latencies) >= messages:
+                            done.set()
+                channel.basic_consume(queue, _on_message)
+                barrier.wait(self.timeout)
+                while not done.is_set():
+                    connection.process_data_events(0.05)
+            finally:
+                connection.close()
+
+        def _publisher(count: int) -> Callable[[Barrier], None]:
+            def _publish(barrier: Barrier):
+                connection = pika.BlockingConnection(self._params)
+                try:
+                    channel = connection.channel()
+                    if self.confirm:
+                        channel.confirm_delivery()
+                    barrier.wait(self.timeout)
+                    for _ in range(count):
+                        if done.is_set():
+                            break
+                        channel.basic_publish("", queue, self._payload())
+                    with lock:
+                        timing["published"] = max(timing["published"],
+                                                   perf_counter())
+                finally:
+                    connection.close()
+            return _publish
+
+        try:
+            start, errors = self._run_workers(
+                [_consumer] * self.consumers +
+                [_publisher(count)
+                 for count in self._split(messages, self.publishers)], done)
+        finally:
+            self._delete_queue(queue)
+        result = {"workload": "publish_consume", "messages": messages,
+                  "received": len(latencies), **self._get_config()}
+        if start is not None:
+            elapsed = (timing["received"] or perf_counter()) - start
+            published = (timing["published"] or perf_counter()) - start
+            result["duration"] = round(elapsed, 6)
+            result["msgs_per_sec"] = round(len(latencies) / elapsed, 3) \
+                if elapsed > 0 else None
+            result["publish_rate"] = round(messages / published, 3) \
+                if published > 0 else None
+        result["latency"] = summarize(latencies)
+        result["errors"] = errors
+        return result
+
+    def run_rpc(self, requests: int) -> dict:
+        """
+        Send RPC requests from clients, each waiting for the response to one
+        request before sending the next, to consumers that reply to the
+        request's `reply_to` queue.
+        @param requests: total number of requests to send
+        @returns: dict with throughput (`msgs_per_sec`) and round-trip
+            `latency` summary
+        """
+        queue = self._declare_queue()
+        latencies = list()
+        lock = Lock()
+        done = Event()
+        timing = {"completed": 0.0}
+
+        def _server(barrier: Barrier):
+            connection = pika.BlockingConnection(self._params)
+            try:
+                channel = connection.channel()
+                channel.basic_qos(prefetch_count=self.prefetch)
+
+                def _on_request(ch, method, properties, body):
+                    ch.basic_publish("", properties.reply_to, body,
+                                     pika.BasicProperties(
+                                         correlation_id=properties.
+                                         correlation_id))
+                    ch.basic_ack(method.delivery_tag)
+                channel.basic_consume(queue, _on_request)
+                barrier.wait(self.timeout)
+                while not done.is_set():
+                    connection.process_data_events(0.05)
+            finally:
+                connection.close()
+
+        def _client(count: int) -> Callable[[Barrier], None]:
+            def _request(barrier: Barrier):
+                connection = pika.BlockingConnection(self._params)
+                try:
+                    channel = connection.channel()
+                    reply_to = channel.queue_declare(
+                        "", exclusive=True).method.queue
+                    responses = set()
+                    channel.basic_consume(
+                        reply_to, lambda _, __, props, ___:
+                        responses.add(props.correlation_id), auto_ack=True)
+                    if self.confirm:
+                        channel.confirm_delivery()
+                    barrier.wait(self.timeout)
+                    for _ in range(count):
+                        correlation_id = uuid4().hex
+                        sent = perf_counter()
+                        channel.basic_publish(
+                            "", queue, self._payload(), pika.BasicProperties(
+                                reply_to=reply_to,
+                                correlation_id=correlation_id))
+                        while correlation_id not in responses and \
+                                not done.is_set():
+                            connection.process_data_events(0.05)
+                        if correlation_id not in responses:
+                            break
+                        received = perf_counter()
+                        with lock:
+                            latencies.append(received - sent)
+                            timing["completed"] = received
+                            if len(latencies) >= requests:
+                                done.set()
+                finally:
+                    connection.close()
+            return _request
+
+        try:
+            start, errors = self._run_workers(
+                [_server] * self.consumers +
+                [_client(count)
+                 for count in self._split(requests, self.publishers)], done)
+        finally:
+            self._delete_queue(queue)
+        result = {"workload": "rpc", "requests": requests,
+                  "completed": len(latencies), **self._get_config()}
+        if start is not None:
+            elapsed = (timing["completed"] or perf_counter()) - start
+            result["duration"] = round(elapsed, 6)
+            result["msgs_per_sec"] = round(len(latencies) / elapsed, 3) \
+                if elapsed > 0 else None
+        result["latency"] = summarize(latencies)
+        result["errors"] = errors
+        return result
@@ -0,0 +1,214 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import csv
+import json
+
+from os import sysconf
+from os.path import splitext
+from threading import Event, Lock, Thread
+from time import monotonic, time
+from typing import List, Optional, Sequence
+
+from ovos_utils.log import LOG
+
+from neon_minerva.integration.trace import ResultRecorder
+from neon_minerva.integration.user_utterance import get_stage_timings
+from neon_minerva.stats import StreamingStats
+
+
+class ProcessSampler:
+    def __init__(self, pids: Sequence[int]):
+        """
+        Sample memory and CPU usage of local processes from `/proc`.
+        @param pids: IDs of processes to sample; usage is summed over them
+        """
+        self.pids = list(pids)
+        self._ticks_per_second = sysconf("SC_CLK_TCK")
+        self._last_ticks = None
+        self._last_time = None
+
+    @staticmethod
+    def _get_rss_kb(pid: int) -> int:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        return 0
+
+    @staticmethod
+    def _get_cpu_ticks(pid: int) -> int:
+        with open(f"/proc/{pid}/stat") as f:
+            # `comm` may contain spaces; fields after it are space-separated
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime and stime are fields 14 and 15 of `stat`
+        return int(fields[11]) + int(fields[12])
+
+    def sample(self) -> dict:
+        """
+        Get current memory usage and CPU usage since the last sample.
+        @returns: dict `rss_mb` and `cpu_percent` (None for the first sample)
+            or an empty dict if a process could not be read
+        """
+        try:
+            rss_kb = sum(self._get_rss_kb(pid) for pid in self.pids)
+            ticks = sum(self._get_cpu_ticks(pid) for pid in self.pids)
+        except (OSError, IndexError, ValueError) as e:
+            LOG.warning(f"Failed to sample processes {self.pids}: {e}")
+            return dict()
+        now = monotonic()
+        cpu_percent = None
+        if self._last_ticks is not None and now > self._last_time:
+            cpu_percent = round((ticks - self._last_ticks) /
+                                self._ticks_per_second /
+                                (now - self._last_time) * 100, 2)
+        self._last_ticks = ticks
+        self._last_time = now
+        return {"rss_mb": round(rss_kb / 1024, 2),
+                "cpu_percent": cpu_percent}
+
+
+class TimeSeriesRecorder(ResultRecorder):
+    def __init__(self, output_file: str, interval: float = 60,
+                 percentiles: Sequence[float] = (50, 90, 99),
+                 pids: Optional[Sequence[int]] = None):
+        """
+        Write windowed latency percentiles and throughput to a CSV or JSONL
+        file at a fixed interval. Each row summarizes measured (not warmup)
+        prompts that finished in that window, and is written as soon as the
+        window ends so the file can be followed during a long test. Windows
+        start when the measured phase starts (see `start`).
+        @param output_file: path to write to; `.csv` files are written as CSV
+            and any other extension as JSONL
+        @param interval: window length in seconds
+        @param percentiles: total latency percentiles to report per window
+        @param pids: optional local process IDs to report memory and CPU
+            usage of
+        """
+        if interval <= 0:
+            raise ValueError(f"Invalid interval: {interval}")
+        self.interval = interval
+        self._percentiles = percentiles
+        self._sampler = ProcessSampler(pids) if pids else None
+        self._file = open(output_file, "w", newline="")
+        self._columns = self._get_columns()
+        self._csv = None
+        if splitext(output_file)[1].lower() == ".csv":
+            self._csv = csv.DictWriter(self._file, self._columns)
+            self._csv.writeheader()
+            self._file.flush()
+        self._lock = Lock()
+        self._window = self._new_window()
+        self._start = None
+        self._window_start = None
+        self._stopped = Event()
+        self._thread = None
+
+    def _get_columns(self) -> List[str]:
+        columns = ["time", "elapsed", "requests", "completed", "errors",
+                   "throughput", "total_average"]
+        columns += [f"total_p{pct}" for pct in self._percentiles]
+        columns += [f"latency_p{pct}" for pct in self._percentiles]
+        if self._sampler:
+            columns += ["rss_mb", "cpu_percent"]
+        return columns
+
+    def _new_window(self) -> dict:
+        return {"requests": 0, "errors": 0,
+                "total": StreamingStats(self._percentiles),
+                "latency": StreamingStats(self._percentiles)}
+
+    def add(self, result: dict, phase: str = "warm"):
+        if phase != "warm":
+            return
+        timings = get_stage_timings(result)
+        with self._lock:
+            self._window["requests"] += 1
+            if "error" in result:
+                self._window["errors"] += 1
+                return
+            if timings["total"] is not None:
+                self._window["total"].add(timings["total"])
+            if result.get("latency") is not None:
+                self._window["latency"].add(result["latency"])
+
+    def start(self):
+        if self._thread:
+            return
+        with self._lock:
+            self._window = self._new_window()
+            self._start = time()
+            self._window_start = self._start
+        if self._sampler:
+            self._sampler.sample()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self._window_start + self.interval -
+                                     time()):
+            self._write_window()
+
+    def _write_window(self):
+        """
+        Write a row for the current window and start a new window.
+        """
+        with self._lock:
+            window = self._window
+            self._window = self._new_window()
+            start = self._window_start
+            self._window_start = time()
+        end = self._window_start
+        total = window["total"].summary()
+        latency = window["latency"].summary()
+        row = {"time": round(end, 3),
+               "elapsed": round(end - self._start, 3),
+               "requests": window["requests"],
+               "completed": window["requests"] - window["errors"],
+               "errors": window["errors"],
+               "throughput": round((window["requests"] - window["errors"]) /
+                                   (end - start), 6) if end > start else 0.0,
+               "total_average": total.get("average")}
+        for pct in self._percentiles:
+            row[f"total_p{pct}"] = total.get(f"p{pct}")
+        for pct in self._percentiles:
+            row[f"latency_p{pct}"] = latency.get(f"p{pct}")
+        if self._sampler:
+            row.update(self._sampler.sample())
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._write_window()
+        self._file.close()
@@ -0,0 +1,189 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+# Stages reported by core as durations only, in the order they are handled
+SEQUENTIAL_STAGES = ("get_stt", "save_transcript", "text_parsers")
+
+
+def get_trace_spans(result: dict) -> List[Tuple[str, float, float]]:
+    """
+    Get trace spans for a prompt result. Stages with known start times are
+    placed at those times; stages core reports only as durations are placed
+    back-to-back from when the prompt was sent (`transcribed`), and `get_tts`
+    is placed at `speech_start`.
+    @param result: dict prompt result with `sent`, `finished`, optional
+        `scheduled`, and `timing` context if the prompt was handled
+    @returns: list of (name, start, end) spans with times in epoch seconds
+    """
+    timing = result.get("timing") or dict()
+    start = timing.get("transcribed", result.get("sent"))
+    if start is None:
+        return list()
+    spans = list()
+    if result.get("scheduled") is not None and result.get("sent") is not None \
+            and result["scheduled"] < result["sent"]:
+        spans.append(("queued", result["scheduled"], result["sent"]))
+    if "finished" in result:
+        spans.append(("prompt", start, result["finished"]))
+    cursor = start
+    for stage in SEQUENTIAL_STAGES:
+        if timing.get(stage) is not None:
+            spans.append((stage, cursor, cursor + timing[stage]))
+            cursor += timing[stage]
+    handle_utterance = timing.get("handle_utterance")
+    speech_start = timing.get("speech_start")
+    if handle_utterance is not None and speech_start is not None:
+        spans.append(("intent_handler", handle_utterance, speech_start))
+    if timing.get("get_tts") is not None:
+        tts_start = speech_start if speech_start is not None else cursor
+        spans.append(("get_tts", tts_start, tts_start + timing["get_tts"]))
+    return spans
+
+
+class ResultRecorder(ABC):
+    """
+    Base class for outputs that record each prompt result as it is added to
+    a `ResultAggregator`.
+    """
+    @abstractmethod
+    def add(self, result: dict, phase: str = "warm"):
+        """
+        Record a prompt result.
+        @param result: dict prompt result
+        @param phase: `warm` for measured prompts or `cold` for warmup
+        """
+
+    def start(self):
+        """
+        Called when the measured phase (after any warmup) starts.
+        """
+
+    def close(self):
+        """
+        Finish writing output.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TraceRecorder(ResultRecorder):
+    def __init__(self, trace_file: Optional[str] = None,
+                 samples_file: Optional[str] = None):
+        """
+        Write per-prompt timing to a Chrome trace (viewable in Perfetto or
+        chrome://tracing) and/or a JSONL file with one raw result per line.
+        Records are written as they are added, so memory use does not grow
+        with the number of prompts.
+        @param trace_file: optional path to write Chrome trace JSON to
+        @param samples_file: optional path to write JSONL results to
+        """
+        self._trace = open(trace_file, "w") if trace_file else None
+        self._samples = open(samples_file, "w") if samples_file else None
+        self._lanes: Dict[str, List[float]] = dict()
+        self._count = 0
+        self._lock = Lock()
+        if self._trace:
+            self._trace.write("[\n")
+            self._write_event({"name": "process_name", "ph": "M", "pid": 1,
+                               "args": {"name": "minerva"}})
+
+    def _write_event(self, event: dict):
+        if self._count:
+            self._trace.write(",\n")
+        self._trace.write(json.dumps(event))
+        self._count += 1
+
+    def _get_lane(self, phase: str, start: float, end: float) -> int:
+        """
+        Get a trace thread for a prompt so that concurrent prompts are
+        displayed on separate rows.
+        @param phase: test phase the prompt was sent in
+        @param start: prompt start time
+        @param end: prompt end time
+        @returns: thread ID to use for the prompt
+        """
+        lanes = self._lanes.setdefault(phase, list())
+        for idx, lane_end in enumerate(lanes):
+            if lane_end <= start:
+                lanes[idx] = end
+                return idx
+        lanes.append(end)
+        pid = 2 if phase == "cold" else 1
+        self._write_event({"name": "thread_name", "ph": "M", "pid": pid,
+                           "tid": len(lanes) - 1,
+                           "args": {"name": f"{phase} {len(lanes) - 1}"}})
+        return len(lanes) - 1
+
+    def add(self, result: dict, phase: str = "warm"):
+        with self._lock:
+            if self._samples:
+                self._samples.write(json.dumps({**result, "phase": phase}) +
+                                    "\n")
+            if not self._trace:
+                return
+            spans = get_trace_spans(result)
+            if not spans:
+                return
+            start = min(s[1] for s in spans)
+            end = max(s[2] for s in spans)
+            pid = 2 if phase == "cold" else 1
+            if pid == 2 and "cold" not in self._lanes:
+                self._write_event({"name": "process_name", "ph": "M",
+                                   "pid": pid,
+                                   "args": {"name": "minerva (cold)"}})
+            tid = self._get_lane(phase, start, end)
+            args = {"prompt": result.get("prompt")}
+            for key in ("username", "latency", "error"):
+                if key in result:
+                    args[key] = result[key]
+            for name, span_start, span_end in spans:
+                self._write_event({"name": name, "cat": phase, "ph": "X",
+                                   "pid": pid, "tid": tid,
+                                   "ts": round(span_start * 1000000),
+                                   "dur": round((span_end - span_start) *
+                                                1000000),
+                                   "args": args if name == "prompt" else
+                                   {"prompt": result.get("prompt")}})
+
+    def close(self):
+        with self._lock:
+            if self._trace:
+                self._trace.write("\n]\n")
+                self._trace.close()
+                self._trace = None
+            if self._samples:
+                self._samples.close()
+                self._samples = None
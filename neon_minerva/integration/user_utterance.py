@@ -24,10 +24,22 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-from tempfile import mkstemp
+import random
+import shutil
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass, field
+from hashlib import sha256
+from os import listdir
+from os.path import join, splitext
+from tempfile import mkdtemp
 from threading import Event, Lock
-from time import time
-from typing import List
+from time import sleep, time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, \
+    Sequence, Tuple, Union
+from uuid import uuid4
 
 from neon_utils.file_utils import encode_file_to_base64_string
 from ovos_utils.log import LOG
@@ -35,34 +47,552 @@ from ovos_bus_client.client import MessageBusClient
 from ovos_bus_client.message import Message
 from ovos_plugin_manager.tts import TTS
 
+from neon_minerva.cache import DiskCache
+from neon_minerva.clock import Clock
+from neon_minerva.integration.prompts import AdaptiveTimeout, Prompt
+from neon_minerva.integration.trace import ResultRecorder
+from neon_minerva.stats import DEFAULT_PERCENTILES, StreamingStats
 
-class UtteranceTests:
-    def __init__(self, prompts: List[str], lang: str = "en-us",
-                 bus_config: dict = None, user_config: dict = None,
-                 audio: bool = False, tts: TTS = None):
+STAGES = ("save_transcript", "text_parsers", "get_tts", "intent_handler",
+          "total")
+
+
+def get_stage_timings(result: dict) -> Dict[str, Optional[float]]:
+    """
+    Get the duration of each stage of prompt handling from a prompt result.
+    @param result: dict prompt result with `timing` context and `finished`
+    @returns: dict of stage name to duration in seconds (None if unknown)
+    """
+    timing = result.get("timing") or dict()
+    stages = {stage: timing.get(stage) for stage in
+              ("save_transcript", "text_parsers", "get_tts", "get_stt")}
+    stages["intent_handler"] = None
+    stages["total"] = None
+    if timing.get("speech_start") is not None and \
+            timing.get("handle_utterance") is not None:
+        stages["intent_handler"] = \
+            timing["speech_start"] - timing["handle_utterance"]
+    if "finished" in result and "transcribed" in timing:
+        stages["total"] = result["finished"] - timing["transcribed"]
+    return stages
+
+
+class ResultAggregator:
+    def __init__(self, audio: bool = False,
+                 percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                 histogram_bounds: Optional[Sequence[float]] = None,
+                 recorders: Sequence[ResultRecorder] = (),
+                 phase: str = "warm"):
+        """
+        Aggregate prompt results into constant-memory statistics.
+        @param audio: if True, include STT timing
+        @param percentiles: percentiles to report for each stage
+        @param histogram_bounds: optional histogram bucket upper bounds
+        @param recorders: ResultRecorders to write each result to
+        @param phase: test phase results are from (`warm` or `cold`)
+        """
+        stages = STAGES + ("get_stt",) if audio else STAGES
+        self.stages = {stage: StreamingStats(percentiles, histogram_bounds)
+                       for stage in stages}
+        self.latency = StreamingStats(percentiles, histogram_bounds)
+        self.prompts: Dict[str, StreamingStats] = dict()
+        self._percentiles = percentiles
+        self.requests = 0
+        self.errors = Counter()
+        self.failures: List[dict] = list()
+        self.max_failures = 100
+        self._recorders = recorders
+        self.phase = phase
+        self._lock = Lock()
+
+    def add(self, result: dict):
+        """
+        Add a prompt result.
+        @param result: dict prompt result with `timing` context and
+            `finished`, optional `latency`, or `error` if the prompt failed
+        """
+        for recorder in self._recorders:
+            recorder.add(result, self.phase)
+        with self._lock:
+            self.requests += 1
+            prompt_stats = self.prompts.setdefault(
+                result.get("prompt"), StreamingStats(self._percentiles))
+            if "error" in result:
+                prompt_stats.add_failure()
+                self.errors[result["error"]] += 1
+                if len(self.failures) < self.max_failures:
+                    self.failures.append({"prompt": result.get("prompt"),
+                                          "error": result["error"]})
+                for stats in self.stages.values():
+                    stats.add_failure()
+                if "latency" in result:
+                    self.latency.add_failure()
+                return
+            timings = get_stage_timings(result)
+            if timings["total"] is None:
+                prompt_stats.add_failure()
+            else:
+                prompt_stats.add(timings["total"])
+            for stage, stats in self.stages.items():
+                if timings.get(stage) is None:
+                    stats.add_failure()
+                else:
+                    stats.add(timings[stage])
+            if "latency" in result:
+                self.latency.add(result["latency"])
+
+    @property
+    def completed(self) -> int:
+        return self.requests - sum(self.errors.values())
+
+    def summary(self, precision: int = 6) -> dict:
+        """
+        Get statistics for each stage of prompt handling
+        @param precision: number of decimal places to round to
+        @returns: dict of stage name to summary statistics
+        """
+        return {stage: stats.summary(precision)
+                for stage, stats in self.stages.items()}
+
+    def prompt_summary(self, precision: int = 6) -> dict:
+        """
+        Get total latency statistics for each prompt. Prompts with a median
+        latency above the upper Tukey fence of all prompts' latencies are
+        flagged as outliers.
+        @param precision: number of decimal places to round to
+        @returns: dict of prompt to summary statistics
+        """
+        fence = self.stages["total"].sketch.upper_fence()
+        summary = dict()
+        for prompt, stats in self.prompts.items():
+            summary[prompt] = stats.summary(precision)
+            summary[prompt].pop("outliers", None)
+            summary[prompt]["outlier"] = fence is not None and \
+                stats.sketch.count > 0 and stats.sketch.quantile(50) > fence
+        return summary
+
+
+def aggregate_results(results: Iterable[dict], audio: bool = False,
+                      percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                      histogram_bounds: Optional[Sequence[float]] = None
+                      ) -> dict:
+    """
+    Get statistics for each stage of prompt handling from prompt results.
+    @param results: iterable of prompt results
+    @param audio: if True, include STT timing
+    @param percentiles: percentiles to report for each stage
+    @param histogram_bounds: optional histogram bucket upper bounds
+    @returns: dict of stage name to summary statistics
+    """
+    aggregator = ResultAggregator(audio, percentiles, histogram_bounds)
+    for result in results:
+        aggregator.add(result)
+    return aggregator.summary()
+
+
+def get_failure_reason(message: Message) -> Optional[str]:
+    """
+    Get the reason a prompt failed from a response message.
+    @param message: Message emitted in response to a prompt
+    @returns: failure reason, or None if the message does not indicate failure
+    """
+    if message.msg_type == "complete_intent_failure":
+        return "intent failure"
+    if message.msg_type in ("mycroft.skill.handler.complete",
+                            "mycroft.skill.handler.error") and \
+            message.data.get("exception"):
+        return f"handler error: {message.data['exception']}"
+    if message.msg_type == "neon.audio_input.response" and \
+            message.data.get("error"):
+        return f"stt error: {message.data['error']}"
+    return None
+
+
+# Messages indicating a prompt was handled (or failed to be)
+HANDLED_EVENTS = ("mycroft.mic.listen", "mycroft.skill.handler.complete",
+                  "mycroft.skill.handler.error", "complete_intent_failure")
+
+
+def get_prompt_failure(message: Message, prompt: Prompt) -> Optional[str]:
+    """
+    Get the reason a prompt failed from a message indicating it was handled.
+    @param message: one of `HANDLED_EVENTS` emitted in response to `prompt`
+    @param prompt: Prompt the message is a response to
+    @returns: failure reason, or None if the prompt was handled successfully
+    """
+    reason = get_failure_reason(message)
+    if message.msg_type == "mycroft.skill.handler.error":
+        return reason or "handler error"
+    if not reason and message.msg_type == "mycroft.skill.handler.complete":
+        return prompt.check_handler(message)
+    return reason
+
+
+def _get_error_summary(aggregator: ResultAggregator) -> dict:
+    errors = sum(aggregator.errors.values())
+    return {"requests": aggregator.requests,
+            "completed": aggregator.completed,
+            "errors": errors,
+            "error_rate": round(errors / aggregator.requests, 6)
+            if aggregator.requests else 0.0,
+            "error_reasons": dict(aggregator.errors)}
+
+
+def get_test_summary(aggregator: ResultAggregator,
+                     cold: Optional[ResultAggregator] = None) -> dict:
+    """
+    Get test results.
+    @param aggregator: ResultAggregator containing every measured result
+    @param cold: optional ResultAggregator containing warmup results
+    @returns: dict test results with request and error counts, per-stage
+        statistics, per-prompt statistics, and cold (warmup) statistics
+    """
+    summary = {**_get_error_summary(aggregator),
+               "stages": aggregator.summary(),
+               "prompts": aggregator.prompt_summary()}
+    if cold and cold.requests:
+        summary["cold"] = {**_get_error_summary(cold),
+                           "stages": cold.summary()}
+    return summary
+
+
+def get_load_summary(aggregator: ResultAggregator, rate: float,
+                     concurrency: int, elapsed: float,
+                     cold: Optional[ResultAggregator] = None) -> dict:
+    """
+    Get load test results.
+    @param aggregator: ResultAggregator containing every prompt result
+    @param rate: target arrival rate in prompts per second
+    @param concurrency: maximum number of prompts in flight
+    @param elapsed: seconds from the first prompt until the last completed
+    @param cold: optional ResultAggregator containing warmup results
+    @returns: dict load test results
+    """
+    return {**get_test_summary(aggregator, cold),
+            "offered_rate": rate,
+            "concurrency": concurrency,
+            "duration": round(elapsed, 6),
+            "throughput": round(aggregator.completed / elapsed, 6)
+            if elapsed else 0.0,
+            "latency": aggregator.latency.summary()}
+
+
+def get_tts_engine_id(tts: Optional[TTS]) -> str:
+    """
+    Get an identifier of the TTS engine and voice used to synthesize prompts.
+    @param tts: TTS plugin, or None if prompts are synthesized by core
+    @returns: string identifying the TTS engine and voice
+    """
+    if not tts:
+        return "neon.get_tts"
+    plugin_id = getattr(tts, "_plugin_id", None) or \
+        f"{tts.__module__}.{tts.__class__.__name__}"
+    return f"{plugin_id}:{getattr(tts, 'voice', None)}"
+
+
+class AudioCache(DiskCache):
+    def __init__(self, *args, **kwargs):
+        """
+        Persistent cache of synthesized prompt audio, keyed by prompt text,
+        language, voice, and TTS engine.
+        """
+        DiskCache.__init__(self, "audio", *args, **kwargs)
+
+    @staticmethod
+    def get_key(text: str, lang: str, gender: str, engine: str) -> str:
+        """
+        Get the cache key for a synthesized prompt.
+        @param text: prompt text
+        @param lang: language of the prompt
+        @param gender: requested voice gender
+        @param engine: identifier of the TTS engine and voice
+        @returns: hex digest identifying the audio
+        """
+        return sha256(f"{engine}|{lang}|{gender}|{text}".encode()).hexdigest()
+
+    def get_audio(self, key: str) -> Optional[str]:
+        """
+        Get cached audio.
+        @param key: cache key of the audio
+        @returns: path to the cached audio file if available, else None
+        """
+        entry = self.get(key)
+        if not entry:
+            return None
+        for file in listdir(entry):
+            if file.startswith("audio"):
+                return join(entry, file)
+        return None
+
+    def put_audio(self, key: str, audio_file: str) -> str:
+        """
+        Copy an audio file into the cache.
+        @param key: cache key of the audio
+        @param audio_file: path to synthesized audio
+        @returns: path to the cached audio file
+        """
+        staging = self.make_staging_dir()
+        shutil.copy(audio_file, join(staging, "audio" +
+                                     splitext(audio_file)[1]))
+        self.put(key, staging)
+        return self.get_audio(key)
+
+
+class UtteranceTestBase:
+    def __init__(self, prompts: List[Union[str, Prompt]], lang: str = "en-us",
+                 user_config: dict = None, audio: bool = False,
+                 tts: TTS = None, gender: str = "female",
+                 audio_cache: AudioCache = None, stt_timeout: float = 60,
+                 intent_timeout: float = 60, speak_timeout: float = 60,
+                 percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                 histogram_bounds: Optional[Sequence[float]] = None,
+                 timeout_factor: Optional[float] = None, repeat: int = 1,
+                 warmup: int = 0, warmup_duration: float = 0,
+                 recorders: Optional[Sequence[ResultRecorder]] = None,
+                 clock: Clock = None):
+        """
+        Prompt selection, scheduling, and result aggregation shared by the
+        `UtteranceTests` and `AsyncUtteranceTests` drivers. See
+        `UtteranceTests` for arguments.
+        """
         if not user_config:
             from neon_utils.configuration_utils import get_neon_user_config
             user_config = get_neon_user_config().content
         user_config['user']['username'] = "minerva"
         self._user_config = user_config
-        bus_config = bus_config or dict()
-        self.core_bus = MessageBusClient(**bus_config)
-        self.core_bus.run_in_thread()
         self.lang = lang
         self.test_audio = audio
         self._tts = tts
-        # TODO: Handle prompt metadata for longer timeouts
-        self._prompts = prompts
-        self._stt_timeout = 60     # Time to transcribe + audio parsers
-        self._intent_timeout = 60  # Time to match AND handle intent
-        self._speak_timeout = 60   # Time after intent handling for TTS playback
+        self.gender = gender
+        self._audio_cache = audio_cache
+        self._prompts = [Prompt.from_value(p) for p in prompts]
+        self.repeat = repeat
+        self.warmup = warmup
+        self.warmup_duration = warmup_duration
+        # Time to transcribe + audio parsers
+        self._stt_timeout = AdaptiveTimeout(stt_timeout, timeout_factor)
+        # Time to match AND handle intent
+        self._intent_timeout = AdaptiveTimeout(intent_timeout, timeout_factor)
+        # Time after intent handling for TTS playback
+        self._speak_timeout = AdaptiveTimeout(speak_timeout, timeout_factor)
+        self._clock = clock or Clock()
+
+        self._percentiles = percentiles
+        self._histogram_bounds = histogram_bounds
+        self._recorders = list(recorders or list())
+        self._results = self._get_aggregator()
+        self._cold_results = self._get_aggregator("cold")
 
-        self._results = list()
+    @property
+    def warmup_prompts(self) -> List[Prompt]:
+        """
+        Prompts to send before measuring results
+        """
+        return [p for p in self._prompts if p.warmup]
+
+    @property
+    def test_prompts(self) -> List[Prompt]:
+        """
+        Prompts to measure, with each repeated as requested
+        """
+        return [p for p in self._prompts if not p.warmup
+                for _ in range(p.repeat * self.repeat)]
+
+    @property
+    def failures(self) -> List[dict]:
+        """
+        Prompts that failed in the last test run and the reason for each
+        """
+        return self._results.failures
+
+    @property
+    def tts_engine(self) -> str:
+        """
+        Identifier of the TTS engine and voice used to synthesize prompts.
+        """
+        return get_tts_engine_id(self._tts)
+
+    def _get_aggregator(self, phase: str = "warm") -> ResultAggregator:
+        return ResultAggregator(self.test_audio, self._percentiles,
+                                self._histogram_bounds, self._recorders,
+                                phase)
+
+    def _start_measurement(self) -> ResultAggregator:
+        """
+        Start the measured phase of a test after any warmup.
+        @returns: ResultAggregator to add measured results to
+        """
+        for recorder in self._recorders:
+            recorder.start()
+        return self._get_aggregator()
+
+    def _get_warmup_prompts(self) -> Iterator[Prompt]:
+        """
+        Get warmup prompts, then test prompts until the configured warmup
+        count and duration are reached.
+        """
+        yield from self.warmup_prompts
+        prompts = self.test_prompts
+        sent = 0
+        start = time()
+        while prompts and (sent < self.warmup or time() - start <
+                           self.warmup_duration):
+            yield prompts[sent % len(prompts)]
+            sent += 1
+
+    def _get_soak_prompts(self, duration: float) -> Iterator[Prompt]:
+        """
+        Cycle through test prompts for a duration.
+        @param duration: seconds to get prompts for
+        """
+        prompts = self.test_prompts
+        sent = 0
+        start = time()
+        while prompts and time() - start < duration:
+            yield prompts[sent % len(prompts)]
+            sent += 1
+
+    @staticmethod
+    def _check_load_args(rate: float, arrival: str):
+        if rate <= 0:
+            raise ValueError(f"Invalid rate: {rate}")
+        if arrival not in ("poisson", "fixed"):
+            raise ValueError(f"Invalid arrival process: {arrival}")
+
+    def _get_load_schedule(self, rate: float, concurrency: int, arrival: str,
+                           count: Optional[int], duration: Optional[float],
+                           seed: Optional[int], start: float) -> \
+            Iterator[Tuple[Prompt, str, float]]:
+        """
+        Get prompts to send in a load test and when to send each.
+        See `UtteranceTests.run_load_test` for arguments.
+        @param start: time the load test starts
+        @returns: iterator of (prompt, username, scheduled time)
+        """
+        prompts = self.test_prompts
+        if count is None and duration is None:
+            count = len(prompts)
+        rng = random.Random(seed)
+        sent = 0
+        scheduled = start
+        while count is None or sent < count:
+            if duration is not None and scheduled - start >= duration:
+                break
+            yield (prompts[sent % len(prompts)],
+                   f"minerva-{sent % concurrency}", scheduled)
+            sent += 1
+            scheduled += rng.expovariate(rate) if arrival == "poisson" \
+                else 1 / rate
+
+    def _get_prompt_context(self, context: Optional[dict] = None) -> dict:
+        """
+        Get the context to send a prompt with.
+        @param context: optional context to add
+        """
+        return {"neon_should_respond": True,
+                "source": ["minerva"],
+                "destination": ["skills"],
+                "timing": {"transcribed": time()},
+                "username": "minerva",
+                "user_profiles": [self._user_config],
+                **(context or dict())}
+
+    def _get_session_context(self, prompt_id: str, username: str) -> dict:
+        """
+        Get context to send a prompt in a new session as a distinct user.
+        @param prompt_id: prompt ID to use as the session ID
+        @param username: username to send the prompt as
+        """
+        user_config = deepcopy(self._user_config)
+        user_config['user']['username'] = username
+        return {"session": {"session_id": prompt_id},
+                "username": username,
+                "user_profiles": [user_config]}
+
+    def _get_audio_key(self, prompt: str) -> str:
+        return AudioCache.get_key(prompt, self.lang, self.gender,
+                                  self.tts_engine)
+
+    @staticmethod
+    def _check_timing(result: dict):
+        """
+        Fill in a missing `speech_start` timestamp of a completed result.
+        """
+        timing = result.get("timing")
+        if timing is not None and "speech_start" not in timing:
+            LOG.warning(f"Missing speech_start timestamp for "
+                        f"{result['prompt']}")
+            timing["speech_start"] = timing.get("handle_utterance")
+
+
+@dataclass
+class PendingPrompt:
+    prompt: Prompt
+    prompt_id: str
+    scheduled: float
+    handled: Event = field(default_factory=Event)
+    audio_done: Event = field(default_factory=Event)
+    last_message: Optional[Message] = None
+    error: Optional[str] = None
+
+
+class UtteranceTests(UtteranceTestBase):
+    def __init__(self, prompts: List[Union[str, Prompt]], lang: str = "en-us",
+                 bus_config: dict = None, user_config: dict = None,
+                 audio: bool = False, tts: TTS = None,
+                 gender: str = "female", audio_cache: AudioCache = None,
+                 stt_timeout: float = 60, intent_timeout: float = 60,
+                 speak_timeout: float = 60, clock: Clock = None,
+                 percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                 histogram_bounds: Optional[Sequence[float]] = None,
+                 timeout_factor: Optional[float] = None, repeat: int = 1,
+                 warmup: int = 0, warmup_duration: float = 0,
+                 recorders: Optional[Sequence[ResultRecorder]] = None,
+                 bus: Optional[MessageBusClient] = None):
+        """
+        @param prompts: list of string prompts or Prompt objects to send
+        @param lang: language of prompts
+        @param bus_config: MessageBusClient configuration
+        @param user_config: user profile to include with prompts
+        @param audio: if True, send prompts as audio for STT
+        @param tts: optional TTS plugin to generate prompt audio locally
+        @param gender: voice gender to request for prompt audio
+        @param audio_cache: optional cache of synthesized prompt audio
+        @param stt_timeout: seconds to wait for TTS/STT responses
+        @param intent_timeout: seconds to wait for a prompt to be handled
+        @param speak_timeout: seconds to wait for audio output to finish
+        @param clock: Clock to use for timeouts (default wall clock). Result
+            timestamps always use wall-clock time to match core timing
+        @param percentiles: percentiles to report for each timing stage
+        @param histogram_bounds: optional histogram bucket upper bounds in
+            seconds to report for each timing stage
+        @param timeout_factor: if set, timeouts not specified by a prompt
+            adapt to this multiple of the observed p99 duration
+        @param repeat: number of times to send each prompt
+        @param warmup: number of prompts to send before measuring results
+        @param warmup_duration: seconds to send prompts before measuring
+            results
+        @param recorders: optional ResultRecorders to write each prompt
+            result to
+        @param bus: optional connected bus to use instead of connecting to
+            `bus_config` (i.e. a FakeBus with a `MockCore`)
+        """
+        UtteranceTestBase.__init__(self, prompts, lang, user_config, audio,
+                                   tts, gender, audio_cache, stt_timeout,
+                                   intent_timeout, speak_timeout, percentiles,
+                                   histogram_bounds, timeout_factor, repeat,
+                                   warmup, warmup_duration, recorders, clock)
+        if bus:
+            self.core_bus = bus
+        else:
+            self.core_bus = MessageBusClient(**(bus_config or dict()))
+            self.core_bus.run_in_thread()
         self._audio_output_done = Event()
-        self._prompt_handled = Event()
         self._prompt_lock = Lock()
+        self._pending: Dict[str, PendingPrompt] = dict()
+        self._pending_lock = Lock()
+        self._current: Optional[PendingPrompt] = None
 
-        self._last_message = None
         self._audio_output_done.set()
         self.register_bus_events()
 
@@ -70,34 +600,153 @@ class UtteranceTests:
         """
         Run tests and return dict timing results
         """
-        self._results.clear()
-        for prompt in self._prompts:
-            self.handle_prompt(prompt)
-        aggregated_results = {"save_transcript": [],
-                              "text_parsers": [],
-                              "get_tts": [],
-                              "intent_handler": [],
-                              "total": []}
-        if self.test_audio:
-            aggregated_results['get_stt'] = []
-        for result in self._results:
-            try:
-                aggregated_results['save_transcript'].append(result['save_transcript'])
-                aggregated_results['text_parsers'].append(result['text_parsers'])
-                aggregated_results['get_tts'].append(result['get_tts'])
-                aggregated_results['intent_handler'].append(result['speech_start'] - result['handle_utterance'])
-                aggregated_results['total'].append(result['finished'] - result['transcribed'])
-                if self.test_audio:
-                    aggregated_results['get_stt'].append(result['get_stt'])
-            except KeyError:
-                LOG.error(result)
-        formatted_results = dict()
-        for key, values in aggregated_results.items():
-            formatted_results[key] = {"average": round(sum(values) /
-                                                       len(values), 6),
-                                      "minimum": round(min(values), 6),
-                                      "maximum": round(max(values), 6)}
-        return formatted_results
+        self._run_warmup(self.handle_prompt)
+        self._results = self._start_measurement()
+        for prompt in self.test_prompts:
+            self._results.add(self.handle_prompt(prompt))
+        return get_test_summary(self._results, self._cold_results)
+
+    def run_soak_test(self, duration: float) -> dict:
+        """
+        Send prompts in sequence, cycling through test prompts, for a
+        duration and return dict timing results.
+        @param duration: seconds to send prompts for (after warmup)
+        """
+        if duration <= 0:
+            raise ValueError(f"Invalid duration: {duration}")
+        self._run_warmup(self.handle_prompt)
+        self._results = self._start_measurement()
+        for prompt in self._get_soak_prompts(duration):
+            self._results.add(self.handle_prompt(prompt))
+        return get_test_summary(self._results, self._cold_results)
+
+    def _run_warmup(self, send: Callable[[Prompt], dict]):
+        """
+        Send warmup prompts and record results as cold samples.
+        @param send: function to send a prompt and return its result
+        """
+        self._cold_results = self._get_aggregator("cold")
+        for prompt in self._get_warmup_prompts():
+            self._cold_results.add(send(prompt))
+
+    def run_load_test(self, rate: float, concurrency: int = 1,
+                      arrival: str = "poisson", count: Optional[int] = None,
+                      duration: Optional[float] = None,
+                      seed: Optional[int] = None) -> dict:
+        """
+        Send prompts open-loop at a target arrival rate, each from a distinct
+        user session, and collect throughput, latency, and error results.
+        Latency is measured from each prompt's scheduled arrival time so that
+        queueing behind the concurrency limit is included. Warmup prompts are
+        sent sequentially before the load test starts.
+        @param rate: target arrival rate in prompts per second
+        @param concurrency: maximum number of prompts in flight (and number
+            of simulated users)
+        @param arrival: `poisson` for exponential inter-arrival times or
+            `fixed` for a constant rate
+        @param count: number of prompts to send (default one of each prompt)
+        @param duration: seconds to send prompts for (default unlimited if
+            `count` is specified)
+        @param seed: random seed for reproducible arrival times
+        @returns: dict load test results
+        """
+        self._check_load_args(rate, arrival)
+        self._run_warmup(lambda p: self._run_load_prompt(
+            p, "minerva-0", time()))
+        aggregator = self._results = self._start_measurement()
+        start = time()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for prompt, username, scheduled in self._get_load_schedule(
+                    rate, concurrency, arrival, count, duration, seed, start):
+                delay = scheduled - time()
+                if delay > 0:
+                    sleep(delay)
+                future = executor.submit(self._run_load_prompt, prompt,
+                                         username, scheduled)
+                future.add_done_callback(
+                    lambda f: aggregator.add(f.result()))
+        return get_load_summary(aggregator, rate, concurrency,
+                                time() - start,
+                                self._cold_results)
+
+    def _run_load_prompt(self, prompt: Prompt, username: str,
+                         scheduled: float) -> dict:
+        """
+        Send a single prompt in a new session and wait for it to be handled.
+        @param prompt: Prompt to send
+        @param username: username to send the prompt as
+        @param scheduled: time the prompt was scheduled to be sent
+        @returns: dict prompt result with `latency` and optional `error`
+        """
+        pending = PendingPrompt(prompt, str(uuid4()), scheduled)
+        result = self._send_and_wait(
+            pending, self._get_session_context(pending.prompt_id, username))
+        result["username"] = username
+        result["scheduled"] = scheduled
+        result["latency"] = result["finished"] - scheduled
+        return result
+
+    def _send_and_wait(self, pending: PendingPrompt,
+                       context: Optional[dict] = None) -> dict:
+        """
+        Send a prompt and wait for it to be handled and spoken, or to fail.
+        @param pending: PendingPrompt to send
+        @param context: optional context to add to the prompt message
+        @returns: dict prompt result with `timing` or `error`
+        """
+        prompt = pending.prompt
+        with self._pending_lock:
+            self._pending[pending.prompt_id] = pending
+        result = {"prompt": prompt.text, "sent": time()}
+        try:
+            self.send_prompt(prompt, {"minerva_prompt_id": pending.prompt_id,
+                                      **(context or dict())})
+            # In audio mode, `send_prompt` returns after STT
+            transcribed = self._clock.time()
+            if not self._clock.wait(pending.handled, self._intent_timeout.get(
+                    prompt.intent_timeout, prompt.text)):
+                result["error"] = "intent timeout"
+            elif not pending.error:
+                handled = self._clock.time()
+                self._intent_timeout.add(handled - transcribed, prompt.text)
+                if not self._clock.wait(
+                        pending.audio_done,
+                        self._speak_timeout.get(prompt.speak_timeout,
+                                                prompt.text)):
+                    result["error"] = "speak timeout"
+                elif not pending.error:
+                    self._speak_timeout.add(self._clock.time() - handled,
+                                            prompt.text)
+            if pending.error:
+                result["error"] = pending.error
+            elif "error" not in result:
+                result["timing"] = \
+                    dict(pending.last_message.context.get("timing", {}))
+        except Exception as e:
+            LOG.error(f"{prompt.text}: {e}")
+            result["error"] = type(e).__name__
+        finally:
+            with self._pending_lock:
+                self._pending.pop(pending.prompt_id, None)
+        result["finished"] = time()
+        if "error" in result:
+            LOG.error(f"{prompt.text}: {result['error']}")
+        self._check_timing(result)
+        return result
+
+    def _get_pending(self, message: Message) -> Optional[PendingPrompt]:
+        """
+        Get the pending prompt a response message is associated with
+        @param message: Message emitted in response to a prompt
+        @returns: PendingPrompt if the message context matches one, else the
+            prompt being handled sequentially (if any) for messages without
+            a prompt id
+        """
+        prompt_id = message.context.get("minerva_prompt_id")
+        with self._pending_lock:
+            if prompt_id:
+                return self._pending.get(prompt_id)
+            return self._current
 
     def register_bus_events(self):
         """
@@ -107,11 +756,39 @@ class UtteranceTests:
                          self._audio_started)
         self.core_bus.on("recognizer_loop:audio_output_end",
                          self._audio_stopped)
-        self.core_bus.on("mycroft.mic.listen", self._mic_listen)
-        self.core_bus.on("mycroft.skill.handler.complete",
-                         self._handler_complete)
+        for msg_type in HANDLED_EVENTS:
+            self.core_bus.on(msg_type, self._prompt_handled)
+
+    def _fail_prompt(self, message: Message, reason: str):
+        """
+        Mark the prompt associated with a message as failed so waits for
+        handling and audio output end immediately.
+        @param message: Message indicating a prompt failed
+        @param reason: reason the prompt failed
+        """
+        LOG.warning(f"Prompt failed: {reason}")
+        pending = self._get_pending(message)
+        if pending:
+            pending.error = pending.error or reason
+            pending.handled.set()
+            pending.audio_done.set()
+
+    def _prompt_handled(self, message):
+        """
+        Handle skill execution complete (audio output may not be complete),
+        start listening (for prompts that trigger `get_response`), or a failure
+        to handle a prompt
+        """
+        LOG.debug(f"Prompt handled: {message.msg_type}")
+        pending = self._get_pending(message)
+        reason = get_prompt_failure(message, pending.prompt) if pending \
+            else get_failure_reason(message)
+        if reason:
+            self._fail_prompt(message, reason)
+        elif pending:
+            pending.handled.set()
 
-    def _audio_started(self, _):
+    def _audio_started(self, message):
         """
         Handle audio output started
         """
@@ -123,88 +800,123 @@ class UtteranceTests:
         @param message: Message associated with completed audio playback
         """
         LOG.debug("audio finished")
-        self._last_message = message
+        pending = self._get_pending(message)
+        if pending:
+            pending.last_message = message
+            pending.audio_done.set()
         self._audio_output_done.set()
 
-    def _mic_listen(self, message):
-        """
-        Handle start listening (for prompts that trigger `get_response`)
-        @param message: Message associated with completed skill handler
-        """
-        LOG.debug("`get_response` call")
-        # self._last_message = message
-        self._prompt_handled.set()
-
-    def _handler_complete(self, _):
-        """
-        Handle skill execution complete (audio output may not be complete)
-        """
-        LOG.debug("Skill Handler Complete")
-        self._prompt_handled.set()
-
-    def send_prompt(self, prompt: str):
+    def send_prompt(self, prompt: Union[str, Prompt], context: dict = None):
         """
         Send a prompt to core for intent handling
+        @param prompt: string prompt or Prompt to send
+        @param context: optional context to add to the prompt message
         """
-        context = {"neon_should_respond": True,
-                   "source": ["minerva"],
-                   "destination": ["skills"],
-                   "timing": {"transcribed": time()},
-                   "username": "minerva",
-                   "user_profiles": [self._user_config]}
+        prompt = Prompt.from_value(prompt)
+        audio_data = self.get_audio_data(prompt.text) \
+            if self.test_audio else None
+        context = self._get_prompt_context(context)
         if self.test_audio:
-            if self._tts:
-                _, file_path = mkstemp()
-                audio, _ = self._tts.get_tts(prompt, file_path, lang=self.lang)
-            else:
-                resp = self.core_bus.wait_for_response(
-                    Message("neon.get_tts", {'text': prompt,
-                                             'speaker': {'language': self.lang,
-                                                         'gender': 'female'}}),
-                    timeout=self._stt_timeout)
-                file_path = resp.data[self.lang]['female']
+            sent = self._clock.time()
             resp = self.core_bus.wait_for_response(
                 Message("neon.audio_input",
-                        {"audio_data": encode_file_to_base64_string(file_path),
+                        {"audio_data": audio_data,
                          "lang": self.lang}, context),
-                timeout=self._stt_timeout)
+                timeout=self._stt_timeout.get(prompt.stt_timeout,
+                                              prompt.text))
+            if not resp:
+                self._fail_prompt(Message("neon.audio_input", {}, context),
+                                  "stt timeout")
+                return
             LOG.info(resp.data)
-            if prompt.lower() not in (t.lower() for t
-                                      in resp.data['transcripts']):
-                LOG.warning(f"Invalid transcription for '{prompt}': "
+            reason = get_failure_reason(resp)
+            if reason:
+                self._fail_prompt(resp, reason)
+                return
+            self._stt_timeout.add(self._clock.time() - sent, prompt.text)
+            if prompt.text.lower() not in (t.lower() for t
+                                           in resp.data['transcripts']):
+                LOG.warning(f"Invalid transcription for '{prompt.text}': "
                             f"{resp.data['transcripts']}")
         else:
             self.core_bus.emit(Message("recognizer_loop:utterance",
-                                       {"utterances": [prompt],
+                                       {"utterances": [prompt.text],
                                         "lang": self.lang}, context))
 
-    def handle_prompt(self, prompt: str):
+    def _synthesize(self, prompt: str, directory: str) -> str:
+        """
+        Synthesize a prompt with the configured TTS plugin or core.
+        @param prompt: string prompt to synthesize
+        @param directory: directory to write local TTS audio to
+        @returns: path to synthesized audio
+        """
+        if self._tts:
+            file_path = join(directory, f"prompt.{self._tts.audio_ext}")
+            file_path, _ = self._tts.get_tts(prompt, file_path,
+                                             lang=self.lang)
+            return file_path
+        resp = self.core_bus.wait_for_response(
+            Message("neon.get_tts", {'text': prompt,
+                                     'speaker': {'language': self.lang,
+                                                 'gender': self.gender}}),
+            timeout=self._stt_timeout.default)
+        return resp.data[self.lang][self.gender]
+
+    def prepare_audio(self, prompt: str) -> str:
+        """
+        Get cached audio for a prompt, synthesizing it if not yet cached.
+        @param prompt: string prompt to get audio for
+        @returns: path to cached prompt audio
+        """
+        if not self._audio_cache:
+            raise RuntimeError("No audio cache configured")
+        key = self._get_audio_key(prompt)
+        cached = self._audio_cache.get_audio(key)
+        if cached:
+            return cached
+        tmp_dir = mkdtemp()
+        try:
+            return self._audio_cache.put_audio(
+                key, self._synthesize(prompt, tmp_dir))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def get_audio_data(self, prompt: str) -> str:
+        """
+        Get base64-encoded audio for a prompt, using the audio cache if
+        configured.
+        @param prompt: string prompt to get audio for
+        @returns: base64-encoded prompt audio
+        """
+        if self._audio_cache:
+            return encode_file_to_base64_string(self.prepare_audio(prompt))
+        tmp_dir = mkdtemp()
+        try:
+            return encode_file_to_base64_string(
+                self._synthesize(prompt, tmp_dir))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def handle_prompt(self, prompt: Union[str, Prompt]) -> dict:
         """
         Send a prompt (text or audio) and collect timing results.
-        @param prompt: string prompt to send for intent (and optionally STT)
-            processing
+        @param prompt: string prompt or Prompt to send for intent (and
+            optionally STT) processing
+        @returns: dict prompt result with `timing` or `error`
         """
+        prompt = Prompt.from_value(prompt)
         with self._prompt_lock:
             # Ensure event state matches expectation
             if not self._audio_output_done.is_set():
                 LOG.warning("Audio output not finished when expected!")
-                self._audio_output_done.wait(self._speak_timeout)
-            self._audio_output_done.clear()
-            self._prompt_handled.clear()
-            self._last_message = None
-
-            # Send prompt
-            self.send_prompt(prompt)
+                self._clock.wait(self._audio_output_done,
+                                 self._speak_timeout.get(prompt.speak_timeout,
+                                                         prompt.text))
+            pending = PendingPrompt(prompt, str(uuid4()), time())
+            self._current = pending
             try:
-                assert self._prompt_handled.wait(self._intent_timeout)
-                assert self._audio_output_done.wait(self._speak_timeout)
-                assert self._last_message is not None
-                if "speech_start" not in self._last_message.context["timing"]:
-                    LOG.warning(f"Missing speech_start timestamp for {prompt}")
-                    self._last_message.context["timing"]["speech_start"] = \
-                        self._last_message.context["timing"]["handle_utterance"]
-                self._results.append({**self._last_message.context["timing"],
-                                      **{'finished': time()}})
-            except AssertionError as e:
-                LOG.error(f"{prompt}: {e}")
-        LOG.debug(f"Handled {prompt}")
+                result = self._send_and_wait(pending)
+            finally:
+                self._current = None
+        LOG.debug(f"Handled {prompt.text}")
+        return result
@@ -28,3 +28,13 @@ from collections import namedtuple
 IntentMatch = namedtuple('IntentMatch',
                          ['intent_service', 'intent_type',
                           'intent_data', 'skill_id', 'utterance'])
+
+
+def normalize_utterance(utterance: str) -> str:
+    """
+    Normalize an utterance for matching so equivalent inputs are only matched
+    once by batch methods.
+    @param utterance: input utterance
+    @returns: lowercase utterance with normalized whitespace
+    """
+    return " ".join(utterance.lower().split())
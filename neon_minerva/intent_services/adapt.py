@@ -26,15 +26,15 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-from typing import Optional
+from typing import List, Optional, Union
 from adapt.engine import IntentDeterminationEngine
 from ovos_workshop.intents import open_intent_envelope
 from ovos_utils.log import LOG
 from ovos_utils.fakebus import FakeBus
 from ovos_bus_client.util import get_message_lang
 
-from neon_minerva.exceptions import IntentNotMatched, ConfidenceTooLow
-from neon_minerva.intent_services import IntentMatch
+from neon_minerva.exceptions import IntentNotMatched
+from neon_minerva.intent_services import IntentMatch, normalize_utterance
 
 
 class AdaptContainer:
@@ -63,28 +63,66 @@ class AdaptContainer:
         intent = open_intent_envelope(message)
         self.adapt.register_intent_parser(intent)
 
-    def test_intent(self, utterance: str) -> Optional[IntentMatch]:
-        best_intent = None
+    def _determine_best_intent(self, utterance: str) -> Optional[dict]:
+        """
+        Get the highest confidence Adapt intent for the best parse of an
+        utterance. Up to 100 parses are only checked if the best parse
+        matches no intent.
+        @param utterance: utterance to match
+        @returns: best Adapt intent if any matched, else None
+        """
         try:
-            intents = [i for i in self.adapt.determine_intent(
-                utterance, 100,
-                include_tags=True)]
-            if intents:
-                best_intent = max(intents,
-                                  key=lambda x: x.get('confidence', 0.0))
+            for num_results in (1, 100):
+                intents = list(self.adapt.determine_intent(
+                    utterance, num_results, include_tags=True))
+                if intents:
+                    return max(intents,
+                               key=lambda x: x.get('confidence', 0.0))
         except Exception as err:
             LOG.exception(err)
+        return None
 
-        if not best_intent:
-            LOG.warning(f"{len(self.adapt.intent_parsers)} Intents loaded")
-            raise IntentNotMatched(utterance)
-        LOG.debug(best_intent)
+    @staticmethod
+    def _get_intent_match(best_intent: dict, utterance: str) -> IntentMatch:
         skill_id = best_intent['intent_type'].split(":")[0]
         _norm_id = skill_id.replace('.', '_')
         intent_data = {k.replace(_norm_id, '', 1): v for k, v in
                        best_intent.items() if k.startswith(_norm_id) and
                        isinstance(v, str)}
-        LOG.debug(intent_data)
-        ret = IntentMatch('Adapt', best_intent['intent_type'], intent_data,
-                          skill_id, utterance)
+        return IntentMatch('Adapt', best_intent['intent_type'], intent_data,
+                           skill_id, utterance)
+
+    def test_intent(self, utterance: str) -> Optional[IntentMatch]:
+        best_intent = self._determine_best_intent(utterance)
+        if not best_intent:
+            LOG.warning(f"{len(self.adapt.intent_parsers)} Intents loaded")
+            raise IntentNotMatched(utterance)
+        LOG.debug(best_intent)
+        ret = self._get_intent_match(best_intent, utterance)
+        LOG.debug(ret.intent_data)
         return ret
+
+    def test_intents(self, utterances: List[str]) -> \
+            List[Union[IntentMatch, IntentNotMatched]]:
+        """
+        Match a batch of utterances. Utterances are normalized and each unique
+        normalized utterance is only matched once.
+        @param utterances: list of utterances to match
+        @returns: list of IntentMatch objects in input order, with an
+            IntentNotMatched exception in place of any unmatched utterance
+        """
+        best_intents = dict()
+        results = list()
+        for utterance in utterances:
+            normalized = normalize_utterance(utterance)
+            if normalized not in best_intents:
+                best_intents[normalized] = \
+                    self._determine_best_intent(normalized)
+            best_intent = best_intents[normalized]
+            if best_intent:
+                results.append(self._get_intent_match(best_intent, utterance))
+            else:
+                results.append(IntentNotMatched(utterance))
+        LOG.debug(f"Matched {len(best_intents)} unique utterances with "
+                  f"{len(self.adapt.intent_parsers)} intents loaded")
+        return results
@@ -0,0 +1,159 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from itertools import cycle, islice
+from os.path import join
+from resource import getrusage, RUSAGE_SELF
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from ovos_utils.fakebus import FakeBus
+from ovos_utils.log import LOG
+
+from neon_minerva.skill import replay_messages
+from neon_minerva.stats import summarize
+
+ENGINES = ("adapt", "padatious", "padacioso")
+
+
+def get_corpus(intent_tests: dict, corpus_size: int) -> List[Tuple[str, str]]:
+    """
+    Build a benchmark corpus from every utterance in an intent test spec.
+    @param intent_tests: loaded intent test spec
+    @param corpus_size: number of utterances to return; spec utterances are
+        repeated as needed
+    @returns: list of (lang, utterance) tuples
+    """
+    utterances = list()
+    for lang, intents in intent_tests.items():
+        if lang == 'common query':
+            continue
+        if lang == 'unmatched intents':
+            for unmatched_lang, examples in intents.items():
+                if unmatched_lang != 'config':
+                    utterances.extend((unmatched_lang, utt.lower())
+                                      for utt in examples)
+            continue
+        for examples in intents.values():
+            for utt in examples:
+                if isinstance(utt, dict):
+                    utt = list(utt.keys())[0]
+                utterances.append((lang, utt.lower()))
+    if not utterances:
+        return []
+    return list(islice(cycle(utterances), corpus_size))
+
+
+def _get_matcher(engine: str, lang: str, bus: FakeBus,
+                 cache_dir: str) -> Tuple[object, Callable[[str], bool]]:
+    """
+    Create an intent container and a method to match one utterance with it.
+    @returns: container, callable returning True if an utterance matched
+    """
+    if engine == "adapt":
+        from neon_minerva.intent_services.adapt import AdaptContainer
+        container = AdaptContainer(lang, bus)
+        return container, lambda utt: not isinstance(
+            container.test_intents([utt])[0], Exception)
+    if engine == "padatious":
+        from neon_minerva.intent_services.padatious import PadatiousContainer
+        container = PadatiousContainer(lang, join(cache_dir, lang), bus)
+    elif engine == "padacioso":
+        from neon_minerva.intent_services.padacioso import PadaciosoContainer
+        container = PadaciosoContainer(lang, join(cache_dir, lang), bus)
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+    return container, lambda utt: bool(container.calc_intent(utt).get('name'))
+
+
+def benchmark_engine(engine: str, messages: List[dict],
+                     corpus: List[Tuple[str, str]], cache_dir: str) -> dict:
+    """
+    Benchmark one intent engine. This should be called in a new process so
+    reported peak memory is specific to the engine.
+    @param engine: engine to benchmark (one of `ENGINES`)
+    @param messages: recorded skill messages to register intents from
+    @param corpus: list of (lang, utterance) to match
+    @param cache_dir: directory for trained models
+    @returns: dict benchmark results
+    """
+    langs = list(dict.fromkeys(lang for lang, _ in corpus))
+    bus = FakeBus()
+    try:
+        start = perf_counter()
+        matchers: Dict[str, Callable[[str], bool]] = dict()
+        containers = list()
+        for lang in langs:
+            container, matchers[lang] = _get_matcher(engine, lang, bus,
+                                                     cache_dir)
+            containers.append(container)
+        replay_messages(messages, bus)
+        for container in containers:
+            if hasattr(container, "train"):
+                container.train()
+        registration_time = perf_counter() - start
+    except ImportError as e:
+        LOG.error(f"{engine} is not installed: {e}")
+        return {"error": repr(e)}
+
+    latencies = list()
+    matched = 0
+    start = perf_counter()
+    for lang, utt in corpus:
+        utt_start = perf_counter()
+        matched += matchers[lang](utt)
+        latencies.append(perf_counter() - utt_start)
+    elapsed = perf_counter() - start
+
+    # ru_maxrss is reported in KiB on Linux
+    peak_rss = getrusage(RUSAGE_SELF).ru_maxrss
+    return {"registration_time": round(registration_time, 6),
+            "latency": summarize(latencies),
+            "throughput": round(len(corpus) / elapsed, 3) if elapsed else None,
+            "matched": matched,
+            "peak_rss_mb": round(peak_rss / 1024, 3)}
+
+
+def run_benchmarks(engines: List[str], messages: List[dict],
+                   corpus: List[Tuple[str, str]], cache_dir: str) -> dict:
+    """
+    Benchmark each engine in its own process.
+    @param engines: list of engines to benchmark
+    @param messages: recorded skill messages to register intents from
+    @param corpus: list of (lang, utterance) to match
+    @param cache_dir: directory for trained models
+    @returns: dict of engine name to benchmark results
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+    results = dict()
+    for engine in engines:
+        LOG.info(f"Benchmarking {engine}")
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as ex:
+            results[engine] = ex.submit(benchmark_engine, engine, messages,
+                                        corpus, join(cache_dir, engine)
+                                        ).result()
+    return results
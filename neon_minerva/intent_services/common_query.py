@@ -27,12 +27,16 @@
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from threading import Event
-from typing import Dict
+from typing import Dict, List, Optional
+from uuid import uuid4
 
+from ovos_bus_client import Message
 from ovos_utils import flatten_list
 from ovos_utils.log import LOG
+from neon_minerva.clock import Clock
 from neon_minerva.intent_services import IntentMatch
 
 
@@ -44,24 +48,57 @@ MIN_RESPONSE_WAIT = 3
 class Query:
     session_id: str
     query: str
-    replies: list = None
-    extensions: list = None
-    query_time: float = time.time()
-    timeout_time: float = time.time() + 1
-    responses_gathered: Event = Event()
-    completed: Event = Event()
+    replies: list = field(default_factory=list)
+    extensions: list = field(default_factory=list)
+    query_time: float = field(default_factory=time.time)
+    timeout_time: float = field(default_factory=lambda: time.time() + 1)
+    responses_gathered: Event = field(default_factory=Event)
+    completed: Event = field(default_factory=Event)
     answered: bool = False
+    pending_skills: set = field(default_factory=set)
+    # True if CommonQuery skills were known when the query started
+    known_skills: bool = False
 
 
 class CommonQuery:
-    def __init__(self, bus):
+    def __init__(self, bus, min_response_wait: float = MIN_RESPONSE_WAIT,
+                 extension_time: float = EXTENSION_TIME,
+                 completion_timeout: float = 10, clock: Clock = None):
+        """
+        Test CommonQuery service
+        @param bus: bus to send questions and receive responses on
+        @param min_response_wait: seconds to wait for responses from skills
+            that have not registered as CommonQuery skills
+        @param extension_time: seconds to extend a query while a skill is
+            searching
+        @param completion_timeout: seconds to wait for responses to be
+            processed before raising a TimeoutError
+        @param clock: Clock to use for timeouts (default wall clock)
+        """
         self.bus = bus
+        self.clock = clock or Clock()
         self.skill_id = "common_query.test"  # fake skill
+        self.min_response_wait = min_response_wait
+        self.extension_time = extension_time
+        self.completion_timeout = completion_timeout
         self.active_queries: Dict[str, Query] = dict()
+        self.common_query_skills = set()
         self._vocabs = {}
         self.bus.on('question:query.response', self.handle_query_response)
         self.bus.on('common_query.question', self.handle_question)
-        # TODO: Register available CommonQuery skills
+        self.bus.on('ovos.common_query.pong', self.handle_skill_pong)
+        # Request any loaded CommonQuery skills to register
+        self.bus.emit(Message('ovos.common_query.ping'))
+
+    def handle_skill_pong(self, message):
+        """
+        Register a skill that responds to CommonQuery questions.
+        @param message: Message with the responding `skill_id`
+        """
+        skill_id = message.data.get('skill_id')
+        if skill_id:
+            LOG.debug(f"Registered CommonQuery skill: {skill_id}")
+            self.common_query_skills.add(skill_id)
 
     def is_question_like(self, utterance, lang):
         # skip utterances with less than 3 words
@@ -94,22 +131,39 @@ class CommonQuery:
                 break
         return match
 
+    def handle_questions(self, messages: List[Message]) -> List[bool]:
+        """
+        Handle multiple questions concurrently. Each question is tracked with
+        its own session so total time is bounded by the slowest question.
+        @param messages: list of Messages with an `utterance` to query
+        @returns: list of bools in input order, True if a question was answered
+        """
+        if not messages:
+            return list()
+        with ThreadPoolExecutor(max_workers=len(messages)) as executor:
+            return list(executor.map(self.handle_question, messages))
+
+    @staticmethod
+    def _get_session_id(message: Message) -> Optional[str]:
+        return message.context.get('session', {}).get('session_id')
+
     def handle_question(self, message):
         """
         Send the phrase to the CommonQuerySkills and prepare for handling
         the replies.
         """
         utt = message.data.get('utterance')
-        sid = "test_session"
+        sid = self._get_session_id(message)
+        if not sid or sid in self.active_queries:
+            # Ensure every active query has a unique session
+            sid = str(uuid4())
         message.context.setdefault('session', {})
         message.context['session']['session_id'] = sid
-        # TODO: Why are defaults not creating new objects on init?
-        query = Query(session_id=sid, query=utt, replies=[], extensions=[],
-                      query_time=time.time(), timeout_time=time.time() + 1,
-                      responses_gathered=Event(), completed=Event(),
-                      answered=False)
-        assert query.responses_gathered.is_set() is False
-        assert query.completed.is_set() is False
+        query = Query(session_id=sid, query=utt,
+                      query_time=self.clock.time(),
+                      timeout_time=self.clock.time() + 1,
+                      pending_skills=set(self.common_query_skills),
+                      known_skills=bool(self.common_query_skills))
         self.active_queries[sid] = query
 
         LOG.info(f'Searching for {utt}')
@@ -119,10 +173,11 @@ class CommonQuery:
             msg.context["skill_id"] = self.skill_id
         self.bus.emit(msg)
 
-        query.timeout_time = time.time() + 1
+        query.timeout_time = self.clock.time() + 1
         timeout = False
-        while not query.responses_gathered.wait(EXTENSION_TIME):
-            if time.time() > query.timeout_time + 1:
+        while not self.clock.wait(query.responses_gathered,
+                                  self.extension_time):
+            if self.clock.time() > query.timeout_time + 1:
                 LOG.debug(f"Timeout gathering responses ({query.session_id})")
                 timeout = True
                 break
@@ -130,8 +185,8 @@ class CommonQuery:
         # forcefully timeout if search is still going
         if timeout:
             LOG.warning(f"Timed out getting responses for: {query.query}")
-        self._query_timeout(message)
-        if not query.completed.wait(10):
+        self._query_timeout(message, query)
+        if not self.clock.wait(query.completed, self.completion_timeout):
             raise TimeoutError("Timed out processing responses")
         answered = bool(query.answered)
         self.active_queries.pop(sid)
@@ -145,14 +200,18 @@ class CommonQuery:
         searching = message.data.get('searching')
         answer = message.data.get('answer')
 
-        query = self.active_queries.get("test_session")
+        query = self.active_queries.get(self._get_session_id(message))
         if not query:
             LOG.warning(f"No active query for: {search_phrase}")
+            return
+        if skill_id not in self.common_query_skills:
+            # Wait for this skill in future queries
+            self.common_query_skills.add(skill_id)
         # Manage requests for time to complete searches
         if searching:
             LOG.debug(f"{skill_id} is searching")
-            # request extending the timeout by EXTENSION_TIME
-            query.timeout_time = time.time() + EXTENSION_TIME
+            # request extending the timeout by `extension_time`
+            query.timeout_time = self.clock.time() + self.extension_time
             # TODO: Perhaps block multiple extensions?
             if skill_id not in query.extensions:
                 query.extensions.append(skill_id)
@@ -167,19 +226,29 @@ class CommonQuery:
                 LOG.debug(f"Done waiting for {skill_id}")
                 query.extensions.remove(skill_id)
 
-            time_to_wait = query.query_time + MIN_RESPONSE_WAIT - time.time()
+            # Only skills known when the query started may end it early
+            was_pending = skill_id in query.pending_skills
+            query.pending_skills.discard(skill_id)
+            if query.known_skills and was_pending and \
+                    not query.pending_skills and not query.extensions:
+                LOG.debug(f"All CommonQuery skills responded "
+                          f"({query.session_id})")
+                query.responses_gathered.set()
+                return
+
+            time_to_wait = query.query_time + self.min_response_wait - \
+                self.clock.time()
             if time_to_wait > 0:
                 LOG.debug(f"Waiting {time_to_wait}s before checking extensions")
-                query.responses_gathered.wait(time_to_wait)
+                self.clock.wait(query.responses_gathered, time_to_wait)
             # not waiting for any more skills
             if not query.extensions:
                 LOG.debug(f"No more skills to wait for ({query.session_id})")
                 query.responses_gathered.set()
 
-    def _query_timeout(self, message):
-        query = self.active_queries.get("test_session")
+    def _query_timeout(self, message, query: Query):
         LOG.info(f'Check responses with {len(query.replies)} replies')
-        search_phrase = message.data.get('phrase', "")
+        search_phrase = message.data.get('phrase') or query.query
         if query.extensions:
             query.extensions = []
 
@@ -26,10 +26,13 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+from typing import List
 from padacioso import IntentContainer
 from ovos_utils.log import LOG
 from ovos_utils.fakebus import FakeBus
 
+from neon_minerva.intent_services import normalize_utterance
+
 
 class PadaciosoContainer:
     def __init__(self, lang: str, cache_dir: str, bus: FakeBus):
@@ -71,3 +74,19 @@ class PadaciosoContainer:
         intent = self.padatious.calc_intent(utt)
         LOG.debug(intent)
         return intent or dict()
+
+    def calc_intents(self, utterances: List[str]) -> List[dict]:
+        """
+        Calculate the best intent for a batch of utterances. Utterances are
+        normalized and each unique normalized utterance is only matched once.
+        @param utterances: list of utterances to match
+        @returns: list of intent dicts in input order (empty if unmatched)
+        """
+        intents = dict()
+        for utt in utterances:
+            normalized = normalize_utterance(utt)
+            if normalized not in intents:
+                intents[normalized] = \
+                    self.padatious.calc_intent(normalized) or dict()
+        LOG.debug(f"Calculated intents for {len(intents)} unique utterances")
+        return [intents[normalize_utterance(utt)] for utt in utterances]
@@ -26,23 +26,129 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import shutil
+
+from hashlib import sha256
+from os import listdir
+from os.path import join, isfile
+from typing import Dict, List, Optional, Union
 from ovos_utils.log import LOG
 from ovos_utils.fakebus import FakeBus
 
-from neon_minerva.exceptions import IntentNotMatched, ConfidenceTooLow
-from neon_minerva.intent_services import IntentMatch
+from neon_minerva.cache import DiskCache
+from neon_minerva.exceptions import IntentException, IntentNotMatched, \
+    ConfidenceTooLow
+from neon_minerva.intent_services import IntentMatch, normalize_utterance
+
+
+class PadatiousModelCache(DiskCache):
+    # Suffixes of files Padatious writes for a trained intent or entity
+    _model_suffixes = ('.hash', '.intent.net', '.intent.ids', '.pos')
+
+    def __init__(self, *args, **kwargs):
+        """
+        Persistent cache of trained Padatious models, keyed by the name and
+        contents of each intent/entity file, its language, and the Padatious
+        version.
+        Note that, as with Padatious' own cache, a model is not retrained when
+        other intents in the same container change.
+        """
+        DiskCache.__init__(self, "padatious", *args, **kwargs)
+
+    @staticmethod
+    def get_key(name: str, file_name: str, lang: str, kind: str) -> str:
+        """
+        Get the cache key for an intent or entity file.
+        @param name: Padatious intent or entity name (included in the hash
+            Padatious checks before loading a model)
+        @param file_name: path to the `.intent` or `.entity` file
+        @param lang: language the file is registered for
+        @param kind: `intent` or `entity`
+        @returns: hex digest identifying the trained model
+        """
+        from padatious import __version__ as padatious_version
+        digest = sha256(
+            f"{padatious_version}|{lang}|{kind}|{name}|".encode())
+        with open(file_name, 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    def _model_files(self, directory: str, prefix: str) -> Dict[str, str]:
+        """
+        Get a mapping of model file suffix to path for `prefix` in `directory`.
+        """
+        files = dict()
+        for file in listdir(directory):
+            if not file.startswith(prefix):
+                continue
+            suffix = file[len(prefix):]
+            if suffix in self._model_suffixes or suffix.startswith('.pos.'):
+                files[suffix] = join(directory, file)
+        return files
+
+    def restore(self, key: str, prefix: str, cache_dir: str) -> bool:
+        """
+        Copy a cached model into a Padatious cache directory so it is loaded
+        instead of retrained.
+        @param key: cache key of the model
+        @param prefix: Padatious object name to restore the model as
+        @param cache_dir: Padatious container cache directory
+        @returns: True if a cached model was restored
+        """
+        entry = self.get(key)
+        if not entry:
+            return False
+        for suffix, path in self._model_files(entry, "").items():
+            shutil.copy(path, join(cache_dir, prefix + suffix))
+        return True
+
+    def store(self, key: str, prefix: str, cache_dir: str) -> bool:
+        """
+        Copy a trained model out of a Padatious cache directory.
+        @param key: cache key of the model
+        @param prefix: Padatious object name the model was trained as
+        @param cache_dir: Padatious container cache directory
+        @returns: True if a trained model was stored
+        """
+        if not isfile(join(cache_dir, prefix + '.hash')):
+            LOG.warning(f"No trained model to cache for {prefix}")
+            return False
+        staging = self.make_staging_dir()
+        for suffix, path in self._model_files(cache_dir, prefix).items():
+            shutil.copy(path, join(staging, suffix))
+        self.put(key, staging)
+        return True
 
 
 class PadatiousContainer:
-    def __init__(self, lang: str, cache_path: str, bus: FakeBus):
+    def __init__(self, lang: str, cache_path: str, bus: FakeBus,
+                 model_cache: Optional[PadatiousModelCache] = None):
         from padatious import IntentContainer
         self.cache_dir = cache_path
         self.lang = lang.lower()
         self.bus = bus
         self.padatious = IntentContainer(cache_path)
+        self.model_cache = model_cache
+        self._untrained: Dict[str, str] = dict()
         self.bus.on('padatious:register_intent', self.register_intent)
         self.bus.on('padatious:register_entity', self.register_entity)
 
+    def _check_model_cache(self, prefix: str, file_name: str, kind: str):
+        """
+        Restore a trained model from `model_cache` if available, otherwise
+        track it to be cached after training.
+        @param prefix: Padatious object name
+        @param file_name: path to the `.intent` or `.entity` file
+        @param kind: `intent` or `entity`
+        """
+        if not self.model_cache:
+            return
+        key = self.model_cache.get_key(prefix, file_name, self.lang, kind)
+        if self.model_cache.restore(key, prefix, self.cache_dir):
+            LOG.debug(f"Loaded cached model for {prefix}")
+        else:
+            self._untrained[prefix] = key
+
     def register_intent(self, message):
         """Messagebus handler for registering intents.
 
@@ -53,6 +159,8 @@ class PadatiousContainer:
         lang = lang.lower()
         if lang == self.lang:
             LOG.debug(f"Loading intent: {message.data['name']}")
+            self._check_model_cache(message.data['name'],
+                                    message.data['file_name'], "intent")
             self.padatious.load_intent(message.data['name'],
                                        message.data['file_name'])
         else:
@@ -67,14 +175,48 @@ class PadatiousContainer:
         lang = message.data.get('lang', self.lang)
         lang = lang.lower()
         if lang == self.lang:
+            from padatious.entity import Entity
+            self._check_model_cache(Entity.wrap_name(message.data['name']),
+                                    message.data['file_name'], "entity")
             self.padatious.load_entity(message.data['name'],
                                        message.data['file_name'])
 
+    def train(self):
+        """
+        Train any intents or entities that were not loaded from cache and add
+        the newly trained models to `model_cache`.
+        """
+        if not self.padatious.must_train:
+            return
+        self.padatious.train()
+        if self.model_cache:
+            for prefix, key in self._untrained.items():
+                self.model_cache.store(key, prefix, self.cache_dir)
+        self._untrained.clear()
+
     def calc_intent(self, utt: str) -> dict:
+        self.train()
         intent = self.padatious.calc_intent(utt)
         LOG.debug(intent)
         return intent.__dict__ if intent else dict()
 
+    def calc_intents(self, utterances: List[str]) -> List[dict]:
+        """
+        Calculate the best intent for a batch of utterances. Utterances are
+        normalized and each unique normalized utterance is only matched once.
+        @param utterances: list of utterances to match
+        @returns: list of intent dicts in input order (empty if unmatched)
+        """
+        self.train()
+        intents = dict()
+        for utt in utterances:
+            normalized = normalize_utterance(utt)
+            if normalized not in intents:
+                intent = self.padatious.calc_intent(normalized)
+                intents[normalized] = intent.__dict__ if intent else dict()
+        LOG.debug(f"Calculated intents for {len(intents)} unique utterances")
+        return [intents[normalize_utterance(utt)] for utt in utterances]
+
 
 class TestPadatiousMatcher:
     def __init__(self, container: PadatiousContainer,
@@ -88,16 +230,47 @@ class TestPadatiousMatcher:
             self.min_conf = 0.95
         self.padatious = container
 
-    def test_intent(self, utterance: str) -> IntentMatch:
-        intent = self.padatious.calc_intent(utterance)
+    def _get_intent_match(self, intent: dict,
+                          utterance: str) -> Union[IntentMatch,
+                                                   IntentException]:
+        """
+        Build an IntentMatch for a calculated intent.
+        @param intent: intent dict returned by the container
+        @param utterance: utterance that was matched
+        @returns: IntentMatch, or IntentException if no intent was matched
+            with at least `min_conf`
+        """
         if not intent:
-            LOG.warning(f"{len(self.padatious.padatious.intents.objects)} objects loaded")
-            raise IntentNotMatched(utterance)
+            return IntentNotMatched(utterance)
         conf = intent.get("conf") or 0.0
         if conf < self.min_conf:
-            raise ConfidenceTooLow(f"{conf} less than minimum {self.min_conf}: "
-                                   f"{utterance}. intent={intent}")
+            return ConfidenceTooLow(f"{conf} less than minimum "
+                                    f"{self.min_conf}: {utterance}. "
+                                    f"intent={intent}")
         skill_id = intent.get('name').split(':')[0]
         return IntentMatch('Padatious', intent.get('name'),
                            intent.get('matches') or intent.get('entities'),
                            skill_id, utterance)
+
+    def test_intent(self, utterance: str) -> IntentMatch:
+        intent = self.padatious.calc_intent(utterance)
+        if not intent:
+            LOG.warning(f"{len(self.padatious.padatious.intents.objects)} objects loaded")
+        match = self._get_intent_match(intent, utterance)
+        if isinstance(match, IntentException):
+            raise match
+        return match
+
+    def test_intents(self, utterances: List[str]) -> \
+            List[Union[IntentMatch, IntentException]]:
+        """
+        Match a batch of utterances. Utterances are normalized and each unique
+        normalized utterance is only matched once.
+        @param utterances: list of utterances to match
+        @returns: list of IntentMatch objects in input order, with an
+            IntentException in place of any utterance that was not matched
+            with at least `min_conf`
+        """
+        intents = self.padatious.calc_intents(utterances)
+        return [self._get_intent_match(intent, utterance)
+                for intent, utterance in zip(intents, utterances)]
@@ -24,14 +24,28 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import gzip
+import json
 import yaml
 
-from os.path import expanduser, isfile, isdir
-from typing import Optional
+from collections import namedtuple
+from hashlib import sha256
+from os.path import expanduser, isfile, isdir, join
+from typing import Dict, Iterable, List, Optional, Tuple
+from ovos_bus_client import Message
 from ovos_utils.fakebus import FakeBus
 from ovos_workshop.skills.base import BaseSkill
 from ovos_utils.log import LOG
 
+# Messages a skill emits to register intents with intent services
+REGISTRATION_MESSAGES = ("register_vocab", "register_intent",
+                         "padatious:register_intent",
+                         "padatious:register_entity")
+
+RecordedSkill = namedtuple('RecordedSkill', ['skill', 'bus', 'messages'])
+
+_recorded_skills: Dict[Tuple[str, str, str], RecordedSkill] = dict()
+
 
 def get_skill_object(skill_entrypoint: str, bus: FakeBus,
                      skill_id: str, config_patch: Optional[dict] = None) -> BaseSkill:
@@ -63,6 +77,74 @@ def get_skill_object(skill_entrypoint: str, bus: FakeBus,
     return skill
 
 
+def get_recorded_skill(skill_entrypoint: str, skill_id: str,
+                       config_patch: Optional[dict] = None) -> RecordedSkill:
+    """
+    Get an initialized skill object with every message it emits recorded.
+    Each skill is only loaded once per process and configuration so multiple
+    test cases can share a skill instance and its registration messages.
+    @param skill_entrypoint: Skill plugin entrypoint or directory path
+    @param skill_id: skill_id to initialize skill with
+    @param config_patch: Configuration update to apply if the skill is loaded
+    @returns: RecordedSkill with the skill, its FakeBus, and recorded messages
+    """
+    key = (skill_entrypoint, skill_id,
+           json.dumps(config_patch or dict(), sort_keys=True))
+    if key not in _recorded_skills:
+        bus = FakeBus()
+        bus.run_forever()
+        messages = record_messages(bus)
+        skill = get_skill_object(skill_entrypoint=skill_entrypoint, bus=bus,
+                                 skill_id=skill_id, config_patch=config_patch)
+        _recorded_skills[key] = RecordedSkill(skill, bus, messages)
+    else:
+        LOG.debug(f"Using loaded skill: {skill_entrypoint}")
+    return _recorded_skills[key]
+
+
+def get_recorded_skill_count(skill_entrypoint: str, skill_id: str) -> int:
+    """
+    Get the number of times a skill has been loaded by `get_recorded_skill`.
+    @param skill_entrypoint: Skill plugin entrypoint or directory path
+    @param skill_id: skill_id the skill was initialized with
+    @returns: number of configurations the skill has been loaded with
+    """
+    return len([key for key in _recorded_skills
+                if key[:2] == (skill_entrypoint, skill_id)])
+
+
+def get_lang_config_patch(languages: Iterable[str]) -> dict:
+    """
+    Get a configuration patch to load a skill with the specified languages.
+    Equal sets of languages produce equal patches, so test cases testing the
+    same languages share one skill load.
+    @param languages: languages the skill should be loaded with
+    @returns: dict configuration patch
+    """
+    return {"secondary_langs": sorted(set(languages))}
+
+
+def get_skill_version(skill_entrypoint: str) -> Optional[str]:
+    """
+    Get a string identifying the version of a skill.
+    @param skill_entrypoint: Skill plugin entrypoint, directory path, or
+        replay file path
+    @returns: hash of the skill directory or replay file contents, or the name
+        and version of the package providing a plugin skill; None if not found
+    """
+    if isdir(skill_entrypoint):
+        from neon_minerva.cache import hash_directory
+        return hash_directory(skill_entrypoint)
+    if isfile(skill_entrypoint):
+        from neon_minerva.cache import hash_file
+        return hash_file(skill_entrypoint)
+    from importlib.metadata import distributions
+    for dist in distributions():
+        if any(ep.name == skill_entrypoint for ep in dist.entry_points):
+            return f"{dist.metadata['Name']}=={dist.version}"
+    return None
+
+
 def load_resource_tests(test_file: str) -> dict:
     """
     Load resource tests from a file
@@ -89,3 +171,92 @@ def load_intent_tests(test_file: str) -> dict:
     with open(test_file) as f:
         intents = yaml.safe_load(f)
     return intents
+
+
+def get_intent_test_languages(intent_tests: dict) -> List[str]:
+    """
+    Get every language with tests defined in an intent test spec.
+    @param intent_tests: intent test spec (see `load_intent_tests`)
+    @returns: list of languages in the order they are defined
+    """
+    langs = list()
+    for key, value in intent_tests.items():
+        if key in ('unmatched intents', 'common query'):
+            langs.extend(lang for lang in value if lang != 'config')
+        else:
+            langs.append(key)
+    return list(dict.fromkeys(langs))
+
+
+def record_messages(bus: FakeBus) -> List[dict]:
+    """
+    Record every message emitted on a bus.
+    @param bus: FakeBus instance to record
+    @returns: list that is populated with deserialized messages as emitted
+    """
+    messages = list()
+    bus.on("message", lambda msg: messages.append(json.loads(msg)))
+    return messages
+
+
+def replay_messages(messages: List[dict], bus: FakeBus,
+                    msg_types: Iterable[str] = REGISTRATION_MESSAGES):
+    """
+    Emit recorded messages on a bus.
+    @param messages: list of deserialized messages to replay
+    @param bus: FakeBus instance to emit messages on
+    @param msg_types: message types to replay (default intent registration)
+    """
+    for msg in messages:
+        if msg["type"] in msg_types:
+            bus.emit(Message(msg["type"], msg["data"], msg["context"]))
+
+
+def save_replay(messages: List[dict], file_path: str):
+    """
+    Save intent registration messages to a replay file. Contents of any
+    referenced intent or entity files are included so that intents can be
+    registered without the skill installed.
+    @param messages: list of deserialized messages emitted by a skill
+    @param file_path: path to write the gzipped replay file to
+    """
+    registrations = list()
+    files = dict()
+    for msg in messages:
+        if msg["type"] not in REGISTRATION_MESSAGES:
+            continue
+        msg = {"type": msg["type"], "data": dict(msg["data"]),
+               "context": msg["context"]}
+        file_name = msg["data"].get("file_name")
+        if file_name and isfile(file_name):
+            with open(file_name) as f:
+                contents = f.read()
+            file_hash = sha256(contents.encode()).hexdigest()
+            files[file_hash] = contents
+            msg["data"]["file_name"] = file_hash
+        registrations.append(msg)
+    with gzip.open(expanduser(file_path), 'wt') as f:
+        json.dump({"messages": registrations, "files": files}, f)
+    LOG.info(f"Saved {len(registrations)} messages to {file_path}")
+
+
+def load_replay(file_path: str, resource_dir: str) -> List[dict]:
+    """
+    Load intent registration messages from a replay file.
+    @param file_path: path to a replay file written by `save_replay`
+    @param resource_dir: directory to write referenced intent/entity files to
+    @returns: list of deserialized registration messages
+    """
+    file_path = expanduser(file_path)
+    if not isfile(file_path):
+        raise FileNotFoundError(file_path)
+    with gzip.open(file_path, 'rt') as f:
+        replay = json.load(f)
+    for file_hash, contents in replay["files"].items():
+        with open(join(resource_dir, file_hash), 'w') as f:
+            f.write(contents)
+    for msg in replay["messages"]:
+        if msg["data"].get("file_name") in replay["files"]:
+            msg["data"]["file_name"] = join(resource_dir,
+                                            msg["data"]["file_name"])
+    return replay["messages"]
@@ -0,0 +1,360 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# BSD-3
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import math
+import random
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """
+    Get a percentile of a list of values, interpolating between the closest
+    ranks.
+    @param values: values to evaluate (need not be sorted)
+    @param pct: percentile in the range 0-100
+    @returns: value at the requested percentile, None if `values` is empty
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values: List[float], percentiles: Sequence[float] = (50, 95, 99),
+              precision: int = 6) -> dict:
+    """
+    Get summary statistics for a list of values.
+    @param values: values to summarize
+    @param percentiles: percentiles to report as `p<N>` keys
+    @param precision: number of decimal places to round to
+    @returns: dict of count, average, minimum, maximum and percentiles
+    """
+    if not values:
+        return {"count": 0}
+    summary = {"count": len(values),
+               "average": round(sum(values) / len(values), precision),
+               "minimum": round(min(values), precision),
+               "maximum": round(max(values), precision)}
+    for pct in percentiles:
+        summary[f"p{pct}"] = round(percentile(values, pct), precision)
+    return summary
+
+
+def mann_whitney_u(x: Sequence[float],
+                   y: Sequence[float]) -> Tuple[float, float]:
+    """
+    Two-sided Mann-Whitney U test of whether values in `x` and `y` come from
+    the same distribution, using the normal approximation with tie and
+    continuity corrections (suitable for samples larger than ~20).
+    @param x: first sample
+    @param y: second sample
+    @returns: U statistic of `x`, two-sided p-value
+    """
+    n1, n2 = len(x), len(y)
+    if not n1 or not n2:
+        raise ValueError("Both samples must be non-empty")
+    combined = sorted([(v, 0) for v in x] + [(v, 1) for v in y])
+    n = n1 + n2
+    rank_sum = 0.0
+    tie_term = 0.0
+    idx = 0
+    while idx < n:
+        end = idx
+        while end + 1 < n and combined[end + 1][0] == combined[idx][0]:
+            end += 1
+        ties = end - idx + 1
+        # Ranks are 1-based; tied values share the average rank
+        avg_rank = (idx + end) / 2 + 1
+        rank_sum += avg_rank * sum(1 for _, group in combined[idx:end + 1]
+                                   if group == 0)
+        tie_term += ties ** 3 - ties
+        idx = end + 1
+    u = rank_sum - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) \
+        if n > 1 else 0
+    if variance <= 0:
+        return u, 1.0
+    z = max(abs(u - mean) - 0.5, 0) / math.sqrt(variance)
+    return u, min(1.0, math.erfc(z / math.sqrt(2)))
+
+
+def bootstrap_change(baseline: Sequence[float], current: Sequence[float],
+                     pct: float = 50, confidence: float = 0.95,
+                     iterations: int = 1000,
+                     seed: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Estimate a confidence interval for the relative change of a percentile
+    between two samples by bootstrap resampling.
+    @param baseline: baseline sample
+    @param current: sample to compare to `baseline`
+    @param pct: percentile to compare in the range 0-100
+    @param confidence: confidence level of the interval
+    @param iterations: number of bootstrap resamples
+    @param seed: optional seed for reproducible intervals
+    @returns: lower and upper bounds of `current / baseline - 1`
+    """
+    if not baseline or not current:
+        raise ValueError("Both samples must be non-empty")
+    rng = random.Random(seed)
+    changes = list()
+    for _ in range(iterations):
+        base = percentile(rng.choices(baseline, k=len(baseline)), pct)
+        if base:
+            changes.append(percentile(rng.choices(current, k=len(current)),
+                                      pct) / base - 1)
+    if not changes:
+        return 0.0, 0.0
+    tail = (1 - confidence) / 2 * 100
+    return percentile(changes, tail), percentile(changes, 100 - tail)
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = 0.01,
+                 min_value: float = 1e-9):
+        """
+        Streaming quantile estimator using logarithmically sized buckets
+        (as in DDSketch). Estimated quantiles are within `relative_accuracy`
+        of the true value and memory is bounded by the range of values rather
+        than the number of values added.
+        @param relative_accuracy: maximum relative error of quantile estimates
+        @param min_value: magnitude below which values are counted as zero
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"Invalid relative_accuracy: {relative_accuracy}")
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._min_value = min_value
+        self._positive: Dict[int, int] = dict()
+        self._negative: Dict[int, int] = dict()
+        self._zero_count = 0
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float):
+        """
+        Add a value to the sketch.
+        @param value: value to add
+        """
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        self.minimum = value if self.minimum is None else \
+            min(self.minimum, value)
+        self.maximum = value if self.maximum is None else \
+            max(self.maximum, value)
+        if abs(value) < self._min_value:
+            self._zero_count += 1
+            return
+        buckets = self._positive if value > 0 else self._negative
+        key = math.ceil(math.log(abs(value)) / self._log_gamma)
+        buckets[key] = buckets.get(key, 0) + 1
+
+    def merge(self, other: 'QuantileSketch'):
+        """
+        Add all values from another sketch with the same accuracy.
+        @param other: sketch to merge into this one
+        """
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / count
+        self._mean += delta * other.count / count
+        self.count = count
+        for value in (other.minimum, other.maximum):
+            self.minimum = value if self.minimum is None else \
+                min(self.minimum, value)
+            self.maximum = value if self.maximum is None else \
+                max(self.maximum, value)
+        self._zero_count += other._zero_count
+        for buckets, other_buckets in ((self._positive, other._positive),
+                                       (self._negative, other._negative)):
+            for key, bucket_count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + bucket_count
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._mean if self.count else None
+
+    @property
+    def std(self) -> Optional[float]:
+        """
+        Population standard deviation of added values.
+        """
+        return math.sqrt(self._m2 / self.count) if self.count else None
+
+    def _bucket_value(self, key: int) -> float:
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def quantile(self, pct: float) -> Optional[float]:
+        """
+        Estimate a percentile of added values.
+        @param pct: percentile in the range 0-100
+        @returns: estimated value at the requested percentile, None if no
+            values have been added
+        """
+        if not self.count:
+            return None
+        rank = (self.count - 1) * pct / 100
+        seen = 0
+        value = None
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                value = -self._bucket_value(key)
+                break
+        if value is None:
+            seen += self._zero_count
+            if seen > rank:
+                value = 0.0
+        if value is None:
+            for key in sorted(self._positive):
+                seen += self._positive[key]
+                if seen > rank:
+                    value = self._bucket_value(key)
+                    break
+        if value is None:
+            value = self.maximum
+        return min(max(value, self.minimum), self.maximum)
+
+    def count_above(self, threshold: float) -> int:
+        """
+        Estimate the number of added values greater than a threshold.
+        @param threshold: value to compare against
+        @returns: approximate count of values above `threshold`
+        """
+        if self.maximum is None or self.maximum <= threshold:
+            return 0
+        count = self._zero_count if threshold < 0 else 0
+        for key, bucket_count in self._positive.items():
+            if self._bucket_value(key) > threshold:
+                count += bucket_count
+        for key, bucket_count in self._negative.items():
+            if -self._bucket_value(key) > threshold:
+                count += bucket_count
+        return count
+
+    def upper_fence(self, k: float = 1.5) -> Optional[float]:
+        """
+        Get the upper Tukey fence (Q3 + k * IQR) of added values; values above
+        this are considered outliers.
+        @param k: multiple of the interquartile range
+        @returns: upper fence, None if no values have been added
+        """
+        if not self.count:
+            return None
+        q1 = self.quantile(25)
+        q3 = self.quantile(75)
+        return q3 + k * (q3 - q1)
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float]):
+        """
+        Fixed-bucket histogram of values.
+        @param bounds: inclusive upper bounds of each bucket; values greater
+            than the last bound are counted in a `+Inf` bucket
+        """
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def add(self, value: float):
+        for idx, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[idx] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self) -> Dict[str, int]:
+        """
+        Get a dict of bucket upper bound to count of values in that bucket
+        """
+        keys = [str(bound) for bound in self.bounds] + ["+Inf"]
+        return dict(zip(keys, self.counts))
+
+
+class StreamingStats:
+    def __init__(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                 histogram_bounds: Optional[Sequence[float]] = None,
+                 relative_accuracy: float = 0.01):
+        """
+        Constant-memory summary statistics for a stream of values.
+        @param percentiles: percentiles to report as `p<N>` keys
+        @param histogram_bounds: optional histogram bucket upper bounds
+        @param relative_accuracy: relative accuracy of percentile estimates
+        """
+        self.percentiles = percentiles
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.histogram = Histogram(histogram_bounds) \
+            if histogram_bounds else None
+        self.failures = 0
+
+    def add(self, value: float):
+        self.sketch.add(value)
+        if self.histogram:
+            self.histogram.add(value)
+
+    def add_failure(self):
+        """
+        Count a sample that failed to produce a value.
+        """
+        self.failures += 1
+
+    def summary(self, precision: int = 6) -> dict:
+        """
+        Get summary statistics for added values.
+        @param precision: number of decimal places to round to
+        @returns: dict of count, failures, average, std, minimum, maximum,
+            percentiles, count of outliers above the upper Tukey fence, and
+            optional histogram
+        """
+        summary = {"count": self.sketch.count, "failures": self.failures}
+        if self.sketch.count:
+            summary["average"] = round(self.sketch.mean, precision)
+            summary["std"] = round(self.sketch.std, precision)
+            summary["minimum"] = round(self.sketch.minimum, precision)
+            summary["maximum"] = round(self.sketch.maximum, precision)
+            for pct in self.percentiles:
+                summary[f"p{pct}"] = round(self.sketch.quantile(pct),
+                                           precision)
+            summary["outliers"] = self.sketch.count_above(
+                self.sketch.upper_fence())
+        if self.histogram:
+            summary["histogram"] = self.histogram.to_dict()
+        return summary
@@ -30,6 +30,7 @@ import unittest
 
 from os import getenv
 from os.path import join, exists
+from tempfile import mkdtemp
 from unittest.mock import Mock
 
 from ovos_bus_client import Message
@@ -37,8 +38,11 @@ from ovos_utils.fakebus import FakeBus
 from ovos_utils.log import LOG
 
 from neon_minerva.exceptions import IntentException
-from neon_minerva.skill import get_skill_object, load_intent_tests
-from neon_minerva.intent_services.padatious import PadatiousContainer, TestPadatiousMatcher
+from neon_minerva.skill import get_recorded_skill, load_intent_tests, \
+    replay_messages, load_replay, save_replay, get_intent_test_languages, \
+    get_lang_config_patch
+from neon_minerva.intent_services.padatious import PadatiousContainer, \
+    TestPadatiousMatcher, PadatiousModelCache
 from neon_minerva.intent_services.adapt import AdaptContainer
 from neon_minerva.intent_services.padacioso import PadaciosoContainer
 from neon_minerva.intent_services.common_query import CommonQuery
@@ -57,11 +61,20 @@ class TestSkillIntentMatching(unittest.TestCase):
     skill_entrypoint = getenv("TEST_SKILL_ENTRYPOINT")
 
     # Populate configuration
-    languages = list(valid_intents.keys())
-    core_config_patch = {"secondary_langs": languages}
+    languages = get_intent_test_languages(valid_intents)
+    core_config_patch = get_lang_config_patch(languages)
     negative_intents = valid_intents.pop('unmatched intents', dict())
     common_query = valid_intents.pop("common query", dict())
 
+    # Optionally limit tests to a subset of languages
+    if getenv("INTENT_TEST_LANGS"):
+        languages = getenv("INTENT_TEST_LANGS").split(',')
+        core_config_patch = get_lang_config_patch(languages)
+        for spec in (valid_intents, negative_intents, common_query):
+            for key in list(spec.keys()):
+                if key not in languages and key != 'config':
+                    spec.pop(key)
+
     # Define intent parsers for tests
     if getenv("TEST_PADACIOSO") == "true":
         container = PadaciosoContainer
@@ -78,19 +91,33 @@ class TestSkillIntentMatching(unittest.TestCase):
             else:
                 # Explicitly requested Padatious/non-Padacioso
                 raise e
+    container_kwargs = dict()
+    model_cache = None
+    if container is PadatiousContainer and \
+            getenv("MINERVA_MODEL_CACHE") == "true":
+        model_cache = PadatiousModelCache()
+        container_kwargs["model_cache"] = model_cache
     padatious_services = dict()
     adapt_services = dict()
     for lang in languages:
         padatious_services[lang] = container(lang, join(padatious_cache, lang),
-                                             bus)
+                                             bus, **container_kwargs)
         adapt_services[lang] = AdaptContainer(lang, bus)
 
-    if common_query:
-        common_query_service = CommonQuery(bus)
-
-    skill = get_skill_object(skill_entrypoint=skill_entrypoint,
-                             skill_id=test_skill_id, bus=bus,
-                             config_patch=core_config_patch)
+    # Register skill intents from the messages emitted when it was loaded
+    replay_file = getenv("INTENT_REPLAY_FILE")
+    if replay_file:
+        skill = None
+        skill_messages = load_replay(replay_file, mkdtemp())
+    else:
+        skill, skill_bus, skill_messages = get_recorded_skill(
+            skill_entrypoint=skill_entrypoint, skill_id=test_skill_id,
+            config_patch=core_config_patch)
+        if common_query:
+            common_query_service = CommonQuery(skill_bus)
+    replay_messages(skill_messages, bus)
+    if getenv("INTENT_RECORD_FILE"):
+        save_replay(skill_messages, getenv("INTENT_RECORD_FILE"))
 
     @classmethod
     def tearDownClass(cls) -> None:
@@ -101,6 +128,8 @@ class TestSkillIntentMatching(unittest.TestCase):
                     shutil.rmtree(service.cache_dir)
             except Exception as e:
                 LOG.exception(e)
+        if cls.model_cache:
+            cls.model_cache.prune()
 
     def test_intents(self):
         for lang in self.valid_intents.keys():
@@ -116,14 +145,22 @@ class TestSkillIntentMatching(unittest.TestCase):
                 else:
                     parser = self.adapt_services[lang]
 
+                utterances = list()
+                expected_data = list()
                 for utt in examples:
                     if isinstance(utt, dict):
                         data = list(utt.values())[0]
                         utt = list(utt.keys())[0]
                     else:
                         data = list()
-                    utt = utt.lower()
-                    match = parser.test_intent(utt)
+                    utterances.append(utt.lower())
+                    expected_data.append(data)
+
+                matches = parser.test_intents(utterances)
+                for utt, data, match in zip(utterances, expected_data,
+                                            matches):
+                    if isinstance(match, IntentException):
+                        raise match
                     self.assertIsInstance(match, IntentMatch)
                     self.assertEqual(match.skill_id, self.test_skill_id)
                     self.assertEqual(match.intent_type,
@@ -151,21 +188,26 @@ class TestSkillIntentMatching(unittest.TestCase):
             padatious = TestPadatiousMatcher(self.padatious_services[lang],
                                              include_med=include_med,
                                              include_low=include_low)
-            for utt in self.negative_intents[lang]:
-                with self.assertRaises(IntentException, msg=utt):
-                    adapt.test_intent(utt)
-                with self.assertRaises(IntentException, msg=utt):
-                    padatious.test_intent(utt)
+            utterances = self.negative_intents[lang]
+            for utt, match in zip(utterances, adapt.test_intents(utterances)):
+                self.assertIsInstance(match, IntentException, utt)
+            for utt, match in zip(utterances,
+                                  padatious.test_intents(utterances)):
+                self.assertIsInstance(match, IntentException, utt)
 
     def test_common_query(self):
         if not self.common_query:
             return
+        if not self.skill:
+            self.skipTest("Common query tests require a loaded skill")
 
         qa_callback = Mock()
         qa_response = Mock()
         self.skill.events.add('question:action', qa_callback)
         self.skill.events.add('question:query.response', qa_response)
         for lang in self.common_query.keys():
+            messages = list()
+            expected = list()
             for utt in self.common_query[lang]:
                 if isinstance(utt, dict):
                     data = list(utt.values())[0]
@@ -173,21 +215,35 @@ class TestSkillIntentMatching(unittest.TestCase):
                 else:
                     data = dict()
                 utt = utt.lower()
-                message = Message('test_utterance',
-                                  {"utterance": utt, "lang": lang},
-                                  {"session": {"lang": lang}})
-                self.common_query_service.handle_question(message)
-                response = qa_response.call_args[0][0]
-                callback = qa_response.call_args[0][0]
-                self.assertIsInstance(response, Message)
+                messages.append(Message('test_utterance',
+                                        {"utterance": utt, "lang": lang},
+                                        {"session": {"lang": lang}}))
+                expected.append(data)
+            qa_response.reset_mock()
+            qa_callback.reset_mock()
+            self.common_query_service.handle_questions(messages)
+
+            # Get the last response and callback for each question's session
+            responses = {call[0][0].context['session']['session_id']:
+                         call[0][0] for call in qa_response.call_args_list}
+            callbacks = {call[0][0].context['session']['session_id']:
+                         call[0][0] for call in qa_callback.call_args_list}
+            for message, data in zip(messages, expected):
+                utt = message.data['utterance']
+                session_id = message.context['session']['session_id']
+                response = responses.get(session_id)
+                callback = callbacks.get(session_id)
+                self.assertIsInstance(response, Message, utt)
                 self.assertTrue(response.data["phrase"] in utt)
-                self.assertEqual(response.data["skill_id"], self.skill.skill_id)
+                self.assertEqual(response.data["skill_id"],
+                                 self.skill.skill_id)
                 self.assertIn("callback_data", response.data.keys())
                 self.assertIsInstance(response.data["conf"], float)
                 self.assertIsInstance(response.data["answer"], str)
 
-                self.assertIsInstance(callback, Message)
-                self.assertEqual(callback.data['skill_id'], self.skill.skill_id)
+                self.assertIsInstance(callback, Message, utt)
+                self.assertEqual(callback.data['skill_id'],
+                                 self.skill.skill_id)
                 self.assertEqual(callback.data['phrase'],
                                  response.data['phrase'])
                 if not data:
@@ -27,19 +27,15 @@
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import unittest
-import json
 
 from os import getenv
-from ovos_utils.messagebus import FakeBus
 
-from neon_minerva.skill import get_skill_object, load_resource_tests
+from neon_minerva.skill import get_recorded_skill, load_resource_tests, \
+    get_lang_config_patch
 
 
 class TestSkillResources(unittest.TestCase):
     # Static parameters
-    messages = list()
-    bus = FakeBus()
-    bus.run_forever()
     test_skill_id = 'test_skill.test'
 
     # Define skill and resource spec to use in tests
@@ -60,25 +56,19 @@ class TestSkillResources(unittest.TestCase):
     # dialog is .dialog file basenames (case-sensitive)
     dialog = set(resources['dialog'])
 
-    core_config_patch = {"secondary_langs": supported_languages}
+    core_config_patch = get_lang_config_patch(supported_languages)
 
     @classmethod
     def setUpClass(cls) -> None:
-        cls.bus.on("message", cls._on_message)
-
-        cls.skill = get_skill_object(skill_entrypoint=cls.skill_entrypoint,
-                                     bus=cls.bus, skill_id=cls.test_skill_id,
-                                     config_patch=cls.core_config_patch)
+        cls.skill, cls.bus, cls.messages = get_recorded_skill(
+            skill_entrypoint=cls.skill_entrypoint,
+            skill_id=cls.test_skill_id, config_patch=cls.core_config_patch)
 
         cls.adapt_intents = {f'{cls.test_skill_id}:{intent}'
                              for intent in cls.adapt_intents}
         cls.padatious_intents = {f'{cls.test_skill_id}:{intent}'
                                  for intent in cls.padatious_intents}
 
-    @classmethod
-    def _on_message(cls, message):
-        cls.messages.append(json.loads(message))
-
     def test_skill_setup(self):
         self.assertEqual(self.skill.skill_id, self.test_skill_id)
         self.assertEqual(set([self.skill.core_lang] +
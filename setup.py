@@ -74,7 +74,8 @@ setuptools.setup(
     ],
     python_requires='>=3.6',
     install_requires=get_requirements("requirements.txt"),
-    extras_require={"chatbots": get_requirements("chatbots.txt"),
+    extras_require={"async": get_requirements("async.txt"),
+                    "chatbots": get_requirements("chatbots.txt"),
                     "padatious": get_requirements("padatious.txt"),
                     "rmq": get_requirements("rabbit_mq.txt")},
     entry_points={